@@ -1,16 +1,21 @@
 import os
+from functools import partial
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
-from spotipy.oauth2 import SpotifyClientCredentials
-import spotipy
 
 from .config import Config
+from .cache import SheetCache, FragmentCache, song_cards
+from .preview import PreviewStore
+from .search import CatalogSearch
+from .popularity import ViewCounter
+from .artwork import ArtworkCache, http_fetcher, artwork_url, artwork_srcset
+from .database import build_engine_options, configure_engine
 
 db = SQLAlchemy()
 migrate = Migrate()  # Initialize Migrate object globally
 
-def create_app():
+def create_app(test_config=None):
     # Explicitly set template and static folders at the root level
     root_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
     app = Flask(
@@ -24,36 +29,56 @@ def create_app():
 
     # Load additional config
     app.config.from_object(Config)
+
+    # Overrides must be applied before the engine is created in db.init_app
+    if test_config:
+        app.config.update(test_config)
+
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = build_engine_options(app.config)
     
     # Initialize Extensions
     db.init_app(app)
     migrate.init_app(app, db) # 3. Initialize Migrate with app and db
+    configure_engine(app, db)  # SQLite pragmas (WAL, busy_timeout, ...) on connect
 
-    # --- SPOTIPY CLIENT INITIALIZATION ---
-    client_id = app.config.get('SPOTIPY_CLIENT_ID')
-    client_secret = app.config.get('SPOTIPY_CLIENT_SECRET')
-    
-    app.sp_client = None # Default to None
-    
-    if client_id and client_secret:
-        try:
-            auth_manager = SpotifyClientCredentials(
-                client_id=client_id,
-                client_secret=client_secret
-            )
-            # Initialize Spotipy and store it on the app instance
-            app.sp_client = spotipy.Spotify(auth_manager=auth_manager)
-            app.logger.info("Spotipy client initialized successfully.")
-        except Exception:
-            app.logger.error("Spotipy initialization failed. Images will not be fetched.")
-    else:
-        app.logger.warning("SPOTIPY_CLIENT_ID or SECRET not found. Artist images disabled.")
+    # The Spotipy client is built lazily on first use; see app.spotify.get_spotify_client
+
+    # Per-process caches; filled by app.warmup.warm_up() before serving
+    app.sheet_cache = SheetCache(app.config['SHEET_CACHE_SIZE'])
+    app.fragment_cache = FragmentCache(app.config['FRAGMENT_CACHE_SIZE'])
+    app.preview_store = PreviewStore(app.config['PREVIEW_MAX_SESSIONS'])
+    data_dir = app.config.get('SONG_DATA_DIR', os.path.join(root_dir, 'static', 'data'))
+    app.catalog_search = CatalogSearch(os.path.join(data_dir, '.catalog_version'))
+    app.artwork_cache = ArtworkCache(
+        app.config['ARTWORK_CACHE_DIR'] or os.path.join(app.instance_path, 'artwork'),
+        app.config['ARTWORK_CACHE_MAX_MB'] * 1024 * 1024,
+        fetcher=partial(http_fetcher, timeout=app.config['ARTWORK_FETCH_TIMEOUT']),
+        failure_ttl=app.config['ARTWORK_FAILURE_TTL']
+    )
+    app.view_counter = ViewCounter(app.config['VIEW_FLUSH_INTERVAL'], app.config['VIEW_FLUSH_MAX_PENDING'])
+    app.jinja_env.globals.update(artwork_url=artwork_url, artwork_srcset=artwork_srcset, song_cards=song_cards)
+    app.warmed_up = False
 
     # Import and register blueprints
     from .routes.main import main_bp
     from .routes.creator import creator_bp
+    from .routes.health import health_bp
 
     app.register_blueprint(main_bp)
     app.register_blueprint(creator_bp)
+    app.register_blueprint(health_bp)
+
+    from .cli import LazyCommand
+    from .profiling import profile_startup_command
+    from .voicings import build_voicings_command
+    from .revisions import compact_revisions_command
+    app.cli.add_command(profile_startup_command)
+    app.cli.add_command(build_voicings_command)
+    app.cli.add_command(compact_revisions_command)
+    # Batch jobs (process pools, ChordPro conversion) are imported only when run
+    app.cli.add_command(LazyCommand('prerender', 'app.prerender:prerender_command'))
+    app.cli.add_command(LazyCommand('rekey', 'app.rekey:rekey_command'))
+    app.cli.add_command(LazyCommand('import-chordpro', 'app.chordpro:import_chordpro_command'))
+    app.cli.add_command(LazyCommand('export-chordpro', 'app.chordpro:export_chordpro_command'))
 
     return app
\ No newline at end of file
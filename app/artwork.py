@@ -0,0 +1,293 @@
+import hashlib
+import io
+import os
+import socket
+import threading
+import time
+from urllib.parse import urlsplit
+
+from flask import url_for
+
+# Card thumbnail widths in pixels; images are never upscaled
+THUMBNAIL_SIZES = {'sm': 200, 'md': 400, 'lg': 640}
+
+# Output formats, best first; WebP is served to clients that accept it
+FORMATS = {
+    'webp': ('image/webp', {'format': 'WEBP', 'quality': 80, 'method': 4}),
+    'jpeg': ('image/jpeg', {'format': 'JPEG', 'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+MAX_SOURCE_BYTES = 10 * 1024 * 1024
+
+
+class ArtworkError(Exception):
+    """The source image could not be fetched or decoded."""
+
+
+def is_public_address(address) -> bool:
+    """False for private, loopback, link-local, multicast and other non-global addresses."""
+    import ipaddress
+
+    if isinstance(address, ipaddress.IPv6Address) and address.ipv4_mapped:
+        address = address.ipv4_mapped
+    return address.is_global and not address.is_multicast
+
+
+def resolve_public_address(host: str, port: int) -> str:
+    """
+    Resolve `host` to an address that is safe to fetch from. Raises
+    ArtworkError if any of its addresses is not public, so an image URL
+    can't reach localhost, cloud metadata or internal services.
+    """
+    try:
+        infos = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    except (socket.gaierror, UnicodeError) as e:
+        raise ArtworkError(f"Cannot resolve {host}: {e}") from e
+
+    import ipaddress
+
+    addresses = [ipaddress.ip_address(sockaddr[0].split('%')[0]) for *_, sockaddr in infos]
+    if not addresses:
+        raise ArtworkError(f"Cannot resolve {host}")
+    for address in addresses:
+        if not is_public_address(address):
+            raise ArtworkError(f"Refusing to fetch from non-public address {address} ({host})")
+    return str(addresses[0])
+
+
+def http_fetcher(url: str, timeout: float = 10) -> bytes:
+    """
+    Download an image over http(s), refusing anything larger than
+    MAX_SOURCE_BYTES. The connection goes to the address checked by
+    resolve_public_address (not a second lookup, which DNS rebinding could
+    change) and redirects are not followed.
+    """
+    import urllib3
+
+    parts = urlsplit(url)
+    if parts.scheme not in ('http', 'https') or not parts.hostname:
+        raise ArtworkError(f"Only http(s) image URLs are fetched: {url}")
+    try:
+        port = parts.port or (443 if parts.scheme == 'https' else 80)
+    except ValueError as e:
+        raise ArtworkError(f"Invalid image URL: {url}") from e
+    address = resolve_public_address(parts.hostname, port)
+
+    if parts.scheme == 'https':
+        # Verify the certificate (and send SNI) for the host name, not the address
+        pool = urllib3.HTTPSConnectionPool(
+            address, port, server_hostname=parts.hostname, assert_hostname=parts.hostname,
+            cert_reqs='CERT_REQUIRED', timeout=timeout, retries=False
+        )
+    else:
+        pool = urllib3.HTTPConnectionPool(address, port, timeout=timeout, retries=False)
+    host_header = parts.hostname if parts.port is None else f"{parts.hostname}:{parts.port}"
+    path = (parts.path or '/') + (f"?{parts.query}" if parts.query else '')
+
+    try:
+        with pool:
+            response = pool.urlopen(
+                'GET', path, headers={'Host': host_header}, redirect=False, preload_content=False
+            )
+            try:
+                if response.status != 200:
+                    raise ArtworkError(f"HTTP {response.status} fetching {url}")
+                data = bytearray()
+                for chunk in response.stream(64 * 1024):
+                    data += chunk
+                    if len(data) > MAX_SOURCE_BYTES:
+                        raise ArtworkError(f"Image larger than {MAX_SOURCE_BYTES} bytes: {url}")
+                return bytes(data)
+            finally:
+                response.release_conn()
+    except urllib3.exceptions.HTTPError as e:
+        raise ArtworkError(str(e)) from e
+
+
+def url_digest(url: str) -> str:
+    return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def make_thumbnails(data: bytes) -> dict:
+    """Resize a source image to every THUMBNAIL_SIZES width in every FORMATS format."""
+    from PIL import Image, UnidentifiedImageError
+
+    try:
+        with Image.open(io.BytesIO(data)) as source:
+            source.load()
+            image = source.convert('RGB')
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError) as e:
+        raise ArtworkError(f"Unreadable image: {e}") from e
+
+    thumbnails = {}
+    for size, width in THUMBNAIL_SIZES.items():
+        resized = image
+        if image.width > width:
+            height = max(1, round(image.height * width / image.width))
+            resized = image.resize((width, height), Image.LANCZOS)
+        for fmt, (_, options) in FORMATS.items():
+            buffer = io.BytesIO()
+            resized.save(buffer, **options)
+            thumbnails[(size, fmt)] = buffer.getvalue()
+    return thumbnails
+
+
+class ArtworkCache:
+    """
+    Disk cache of resized artwork, shared by all workers.
+
+    The first request for an image URL fetches it once (through the pluggable
+    `fetcher`, a callable url -> bytes) and writes every thumbnail size and
+    format; later requests are a stat() away. Hits bump the file's mtime, and
+    once the cache outgrows max_bytes the least recently used files are
+    removed until it is back under 90% of the cap. A failed fetch is
+    remembered for failure_ttl seconds, during which requests for that URL
+    fail straight away instead of fetching it again.
+    """
+
+    def __init__(self, root: str, max_bytes: int, fetcher=http_fetcher, failure_ttl: float = 60):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.fetcher = fetcher
+        self.failure_ttl = failure_ttl
+        self.hits = 0
+        self.misses = 0
+        self._size = None        # estimated bytes on disk; None until first scanned
+        self._lock = threading.Lock()
+        self._fetch_locks = {}   # url digest -> [lock, users], so concurrent misses fetch once
+        self._failures = {}      # url digest -> monotonic time the failure expires
+
+    def path_for(self, url: str, size: str, fmt: str) -> str:
+        digest = url_digest(url)
+        return os.path.join(self.root, digest[:2], f"{digest}-{size}.{fmt}")
+
+    def get(self, url: str, size: str, fmt: str) -> str:
+        """
+        Path to the cached thumbnail of `url` at `size` in `fmt`, fetching and
+        resizing the source on a miss. Raises ArtworkError if that fails, or
+        failed within the last failure_ttl seconds.
+        """
+        if size not in THUMBNAIL_SIZES or fmt not in FORMATS:
+            raise ValueError(f"Unknown thumbnail {size}/{fmt}")
+
+        path = self.path_for(url, size, fmt)
+        if self._touch(path):
+            self.hits += 1
+            return path
+
+        digest = url_digest(url)
+        self._check_failure(digest)
+        with self._lock:
+            entry = self._fetch_locks.setdefault(digest, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                # Another thread may have filled the cache (or failed) while we waited
+                if self._touch(path):
+                    self.hits += 1
+                    return path
+                self._check_failure(digest)
+                self.misses += 1
+                try:
+                    thumbnails = make_thumbnails(self.fetcher(url))
+                except ArtworkError:
+                    self._record_failure(digest)
+                    raise
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                written = 0
+                for (thumb_size, thumb_fmt), data in thumbnails.items():
+                    _write_atomic(self.path_for(url, thumb_size, thumb_fmt), data)
+                    written += len(data)
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._fetch_locks[digest]
+
+        self._account(written, keep=digest)
+        return path
+
+    def _check_failure(self, digest: str) -> None:
+        expires = self._failures.get(digest)
+        if expires is not None:
+            if time.monotonic() < expires:
+                raise ArtworkError("Source image failed recently")
+            self._failures.pop(digest, None)
+
+    def _record_failure(self, digest: str) -> None:
+        now = time.monotonic()
+        with self._lock:
+            for expired in [key for key, expires in self._failures.items() if expires <= now]:
+                del self._failures[expired]
+            self._failures[digest] = now + self.failure_ttl
+
+    def _touch(self, path: str) -> bool:
+        try:
+            os.utime(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def _files(self) -> list[tuple[float, int, str]]:
+        """(mtime, size, path) of every cached file."""
+        files = []
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+        return files
+
+    def _account(self, added: int, keep: str) -> None:
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._files())
+            else:
+                self._size += added
+            if self._size > self.max_bytes:
+                self._evict(keep)
+
+    def _evict(self, keep: str) -> None:
+        """Remove least recently used files, never those of the image just written (`keep`)."""
+        # Re-scan: other workers write to the same directory
+        files = sorted(self._files())
+        total = sum(size for _, size, _ in files)
+        target = self.max_bytes * 0.9
+        for _, size, path in files:
+            if total <= target:
+                break
+            if os.path.basename(path).startswith(keep):
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        self._size = total
+
+    def size(self) -> int:
+        return sum(size for _, size, _ in self._files())
+
+
+def artwork_url(song, size: str = 'md') -> str | None:
+    """Thumbnail URL for a song's artwork; versioned by the source URL so it can be cached forever."""
+    if not song.image_url:
+        return None
+    return url_for('main.artwork', song_id=song.id, size=size, v=url_digest(song.image_url)[:12])
+
+
+def artwork_srcset(song) -> str:
+    """srcset listing every thumbnail width of a song's artwork."""
+    if not song.image_url:
+        return ''
+    return ', '.join(f"{artwork_url(song, size)} {width}w" for size, width in THUMBNAIL_SIZES.items())
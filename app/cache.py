@@ -0,0 +1,154 @@
+import os
+import threading
+from collections import OrderedDict
+
+from flask import current_app, render_template
+from markupsafe import Markup
+
+from .utils import prepare_song, compute_layout_metrics
+
+
+def build_sheet(raw_text: str) -> dict:
+    """Prepare a chord sheet for view_sheet.html: the processed 'lines' and their 'layout' metrics."""
+    tuple_lines = prepare_song(raw_text, add_data_attr=True)
+    return {
+        'lines': [{"chord": chord, "lyric": lyric} for chord, lyric in tuple_lines],
+        'layout': compute_layout_metrics(tuple_lines),
+    }
+
+
+class SheetCache:
+    """
+    Per-process LRU cache of prepared chord sheets, keyed by song id.
+
+    Entries are validated against the file's mtime and size on every lookup,
+    so edits written by any worker are picked up without cross-process
+    invalidation. A single os.stat() replaces the read + parse on a hit.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, song_id: int, filepath: str) -> dict:
+        """
+        Return the prepared sheet for a song's file as a dict with the
+        processed 'lines' and their 'layout' metrics.
+        Raises FileNotFoundError if the file does not exist.
+        """
+        stat = os.stat(filepath)
+        signature = (stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            entry = self._entries.get(song_id)
+            if entry and entry[0] == signature:
+                self._entries.move_to_end(song_id)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        with open(filepath, 'r', encoding='utf-8') as f:
+            raw_text = f.read()
+
+        sheet = build_sheet(raw_text)
+
+        with self._lock:
+            self._entries[song_id] = (signature, sheet)
+            self._entries.move_to_end(song_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+        return sheet
+
+    def invalidate(self, song_id: int) -> None:
+        """Drop a song's cached sheet (e.g. after it is edited or deleted)."""
+        with self._lock:
+            self._entries.pop(song_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, song_id):
+        return song_id in self._entries
+
+
+class FragmentCache:
+    """
+    Per-process LRU cache of rendered HTML fragments, such as song cards.
+
+    Keys must identify everything the fragment depends on, typically
+    (song id, row version, variant): an edit bumps the row version, so every
+    worker re-renders the card the next time it reads the row, with no
+    cross-process invalidation.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, render) -> str:
+        """Return the fragment cached under `key`, calling render() to produce it on a miss."""
+        with self._lock:
+            fragment = self._entries.get(key)
+            if fragment is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return fragment
+            self.misses += 1
+
+        fragment = render()
+
+        with self._lock:
+            self._entries[key] = fragment
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return fragment
+
+    def invalidate(self, song_id: int) -> None:
+        """Drop every fragment of a song (keys whose first element is its id)."""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == song_id]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else None,
+        }
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def song_cards(songs, static_site: bool = False) -> Markup:
+    """
+    HTML of the explore cards for `songs`, assembled from the app's fragment
+    cache; only cards of new or edited songs go through the template.
+    """
+    cache = current_app.fragment_cache
+    variant = 'static' if static_site else 'live'
+    return Markup(''.join(
+        cache.get(
+            (song.id, song.version, variant),
+            lambda song=song: render_template('_song_card.html', song=song, static_site=static_site)
+        )
+        for song in songs
+    ))
@@ -0,0 +1,380 @@
+import os
+import re
+from typing import Iterable, Iterator
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from .utils import BRACKETED_CHORD_REGEX, SECTION_KEYWORDS, split_chord_lyric_line, normalize_text
+
+CHORDPRO_EXTENSIONS = ('.cho', '.chopro', '.chordpro', '.crd', '.pro')
+
+# {name: value}, {name value} or {name}; a '-suffix' on the name is a ChordPro selector
+_DIRECTIVE_REGEX = re.compile(r'^\{\s*([A-Za-z_]+)(?:-[\w]+)?\s*(?::\s*|\s+)?(.*?)\s*\}$')
+
+_DIRECTIVE_ALIASES = {
+    't': 'title', 'st': 'subtitle', 'c': 'comment', 'ci': 'comment_italic', 'cb': 'comment_box',
+    'soc': 'start_of_chorus', 'eoc': 'end_of_chorus', 'sov': 'start_of_verse', 'eov': 'end_of_verse',
+    'sob': 'start_of_bridge', 'eob': 'end_of_bridge', 'sot': 'start_of_tab', 'eot': 'end_of_tab',
+    'sog': 'start_of_grid', 'eog': 'end_of_grid',
+}
+_COMMENT_DIRECTIVES = {'comment', 'comment_italic', 'comment_box', 'highlight'}
+
+# Native section keyword -> ChordPro environment; other sections become comments
+_ENVIRONMENTS = {'chorus': 'chorus', 'verse': 'verse', 'bridge': 'bridge'}
+
+# A tablature string line such as 'e|---0---3---|' or 'G#|--5h7--|'
+_TAB_LINE_REGEX = re.compile(r'^[A-Ga-g][#b]?\|[-0-9|hpbrxv/\\~^().* ]*-[-0-9|hpbrxv/\\~^().* ]*$')
+
+_SECTION_NAMES = {keyword.lower(): keyword for keyword in SECTION_KEYWORDS}
+
+
+def _section_keyword(label: str) -> str | None:
+    """Canonical SECTION_KEYWORDS entry a label starts with ('chorus 2' -> 'Chorus'), if any."""
+    words = label.split()
+    return _SECTION_NAMES.get(words[0].rstrip(':').lower()) if words else None
+
+
+def _header(label: str) -> str:
+    label = label.strip().rstrip(':')
+    return f"{label[0].upper()}{label[1:]}:"
+
+
+def normalised_lines(lines: Iterable[str]) -> Iterator[str]:
+    """Streaming normalise_spacing: strips trailing whitespace, collapses blank runs, drops edge blanks."""
+    started, blank_pending = False, False
+    for line in lines:
+        line = line.rstrip()
+        if not line:
+            blank_pending = started
+            continue
+        if blank_pending:
+            yield ''
+            blank_pending = False
+        started = True
+        yield line
+
+
+class ChordProReader:
+    """
+    Streaming ChordPro -> native converter.
+
+    convert() yields native sheet lines one at a time while collecting the
+    song's directives into `metadata`; song_fields() maps them to Song
+    columns. Environments ({start_of_chorus}, {sov: Verse 2}, ...) and
+    section comments ({c: Intro}) become native section headers, {chorus}
+    repeats the Chorus header, other comments are kept as '(text)' lines and
+    tab/grid blocks pass through untouched. Chords already use the native
+    [bracket] syntax.
+    """
+
+    def __init__(self):
+        self.metadata = {}
+        self._verses = 0
+
+    def convert(self, lines: Iterable[str]) -> Iterator[str]:
+        return normalised_lines(self._convert(lines))
+
+    def _convert(self, lines: Iterable[str]) -> Iterator[str]:
+        for line in lines:
+            line = line.rstrip('\r\n')
+            stripped = line.strip()
+            if stripped.startswith('#'):
+                continue  # ChordPro comment line
+
+            match = _DIRECTIVE_REGEX.match(stripped)
+            if not match:
+                yield line
+                continue
+
+            name = match.group(1).lower()
+            name = _DIRECTIVE_ALIASES.get(name, name)
+            value = match.group(2)
+
+            if name.startswith('start_of_'):
+                part = name[len('start_of_'):]
+                # Labels the native parser would not see as a section fall back to the part name
+                label = None
+                if value and _section_keyword(value):
+                    label = value
+                elif part == 'verse':
+                    self._verses += 1
+                    label = f"Verse {self._verses}"
+                elif part in _SECTION_NAMES:
+                    label = _SECTION_NAMES[part]
+                if label:
+                    yield ''
+                    yield _header(label)
+            elif name.startswith('end_of_'):
+                yield ''
+            elif name == 'chorus':
+                yield ''
+                yield _header(value if _section_keyword(value) else 'Chorus')
+                yield ''
+            elif name in _COMMENT_DIRECTIVES:
+                if _section_keyword(value):
+                    yield ''
+                    yield _header(value)
+                elif value:
+                    yield f"({value})"
+            else:
+                self.metadata.setdefault(name, value)
+
+    def song_fields(self, fallback_title: str = '') -> dict:
+        """Song columns from the directives read so far: title, artist and song_key."""
+        artist = self.metadata.get('artist') or self.metadata.get('subtitle') or None
+        return {
+            'title': (self.metadata.get('title') or fallback_title).strip()[:100],
+            'artist': artist.strip()[:100] if artist else None,
+            'song_key': (self.metadata.get('key') or '').strip()[:100],
+        }
+
+
+def _chorus_recall(label: str) -> str:
+    return '{chorus}' if label.lower() == 'chorus' else f"{{chorus: {label}}}"
+
+
+def native_to_chordpro(fields: dict, lines: Iterable[str]) -> Iterator[str]:
+    """
+    Streaming native -> ChordPro converter. `fields` supplies the title,
+    artist and song_key directives; Chorus/Verse/Bridge sections become
+    environments and other section headers become {comment} directives.
+    A Chorus header with no lines of its own (a repeat) becomes {chorus},
+    and runs of tablature lines become tab environments.
+    """
+    for name, directive in (('title', 'title'), ('artist', 'artist'), ('song_key', 'key')):
+        if fields.get(name):
+            yield f"{{{directive}: {fields[name]}}}"
+    yield ''
+
+    environment, blanks, chorus_label = None, 0, None
+    for line in lines:
+        line = line.rstrip('\r\n')
+        if not line.strip():
+            blanks += 1
+            continue
+
+        chord_line, lyric_line = split_chord_lyric_line(line)
+        is_header = not lyric_line and not BRACKETED_CHORD_REGEX.search(chord_line)
+        is_tab = not is_header and bool(_TAB_LINE_REGEX.match(line.strip()))
+
+        if chorus_label is not None:
+            # Decided by the line after the header: the chorus's own lines, or nothing (a repeat)
+            if blanks or is_header or is_tab:
+                yield _chorus_recall(chorus_label)
+            else:
+                yield f"{{start_of_chorus: {chorus_label}}}"
+                environment = 'chorus'
+            chorus_label = None
+
+        # Close the open environment before the blank lines that separate it from what follows
+        if environment and (is_header or (environment == 'tab') != is_tab):
+            yield f"{{end_of_{environment}}}"
+            environment = None
+        yield from [''] * blanks
+        blanks = 0
+
+        if is_header:
+            label = line.strip().rstrip(':')
+            keyword = _section_keyword(label)
+            section = _ENVIRONMENTS.get(keyword.lower()) if keyword else None
+            if section == 'chorus':
+                chorus_label = label
+            elif section:
+                yield f"{{start_of_{section}: {label}}}"
+                environment = section
+            else:
+                yield f"{{comment: {label}}}"
+            continue
+
+        if is_tab and environment is None:
+            yield '{start_of_tab}'
+            environment = 'tab'
+        yield line.rstrip()
+
+    if chorus_label is not None:
+        yield _chorus_recall(chorus_label)
+    if environment:
+        yield f"{{end_of_{environment}}}"
+
+
+def _write_lines(path: str, lines: Iterable[str]) -> None:
+    """Write lines joined by newlines through a temp file and rename."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as out:
+            for i, line in enumerate(lines):
+                out.write(line if i == 0 else '\n' + line)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def import_file(task: dict) -> dict:
+    """Convert one ChordPro file to a native sheet at task['dest'] (runs in a pool worker)."""
+    reader = ChordProReader()
+    fallback_title = os.path.splitext(os.path.basename(task['source']))[0].replace('_', ' ')
+    try:
+        with open(task['source'], 'r', encoding='utf-8-sig', errors='replace') as f:
+            _write_lines(task['dest'], reader.convert(f))
+    except OSError as e:
+        return {'source': task['source'], 'error': str(e)}
+    return {'source': task['source'], 'dest': task['dest'], 'fields': reader.song_fields(fallback_title)}
+
+
+def export_file(task: dict) -> dict:
+    """Convert one native sheet to a ChordPro file at task['dest'] (runs in a pool worker)."""
+    try:
+        with open(task['source'], 'r', encoding='utf-8') as f:
+            _write_lines(task['dest'], native_to_chordpro(task['fields'], f))
+    except OSError as e:
+        return {'id': task['id'], 'error': str(e)}
+    return {'id': task['id'], 'dest': task['dest']}
+
+
+def imap_bounded(fn, tasks: Iterable[dict], workers: int) -> Iterator[dict]:
+    """
+    Run fn over tasks on a process pool, yielding results as they finish.
+    Tasks are drawn lazily with at most 4 per worker in flight, so memory
+    stays constant however many files there are.
+    """
+    if workers <= 1:
+        yield from map(fn, tasks)
+        return
+
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        for task in tasks:
+            pending.add(pool.submit(fn, task))
+            if len(pending) >= workers * 4:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        for future in wait(pending).done:
+            yield future.result()
+
+
+def find_chordpro_files(paths: Iterable[str]) -> Iterator[str]:
+    """ChordPro files among `paths`, searching directories recursively (lazily)."""
+    for path in paths:
+        if os.path.isdir(path):
+            for dirpath, dirnames, filenames in os.walk(path):
+                dirnames.sort()
+                for name in sorted(filenames):
+                    if name.lower().endswith(CHORDPRO_EXTENSIONS):
+                        yield os.path.join(dirpath, name)
+        else:
+            yield path
+
+
+def _save_imported(batch: list[dict]) -> int:
+    """Create songs for a batch of converted files and move their sheets into place."""
+    from . import db
+    from .models import Song
+    from .routes.creator import save_song_content
+
+    songs = []
+    try:
+        for result in batch:
+            song = Song(**result['fields'])
+            db.session.add(song)
+            songs.append((song, result))
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        for result in batch:
+            os.remove(result['dest'])
+        raise
+
+    for song, result in songs:
+        with open(result['dest'], 'r', encoding='utf-8') as f:
+            save_song_content(song.id, f.read())  # one sheet in memory at a time
+        os.remove(result['dest'])
+        current_app.catalog_search.song_saved(song)
+    return len(songs)
+
+
+@click.command('import-chordpro')
+@click.argument('paths', nargs=-1, required=True, type=click.Path(exists=True))
+@click.option('--workers', type=int, default=os.cpu_count() or 1, show_default=True, help='Worker processes.')
+@click.option('--batch-size', type=int, default=200, show_default=True, help='Songs committed per transaction.')
+@with_appcontext
+def import_chordpro_command(paths, workers, batch_size):
+    """Import ChordPro files (or directories of them) as new songs."""
+    from .routes.creator import get_data_folder
+
+    staging = os.path.join(get_data_folder(), '.import')
+    os.makedirs(staging, exist_ok=True)
+    tasks = (
+        {'source': source, 'dest': os.path.join(staging, f"{os.getpid()}-{n}.txt")}
+        for n, source in enumerate(find_chordpro_files(paths))
+    )
+
+    imported, failed, batch = 0, [], []
+    for result in imap_bounded(import_file, tasks, workers):
+        if 'error' in result:
+            failed.append(result)
+        elif not result['fields']['title']:
+            os.remove(result['dest'])
+            failed.append({**result, 'error': 'no title'})
+        else:
+            batch.append(result)
+        if len(batch) >= batch_size:
+            imported += _save_imported(batch)
+            batch = []
+    if batch:
+        imported += _save_imported(batch)
+
+    for result in failed:
+        click.echo(f"Skipped {result['source']}: {result['error']}")
+    click.echo(f"Imported {imported} songs.")
+
+
+def export_filename(song_id: int, title: str) -> str:
+    slug = re.sub(r'[^a-z0-9]+', '-', normalize_text(title)).strip('-')
+    return f"{song_id}-{slug or 'song'}.cho"
+
+
+@click.command('export-chordpro')
+@click.option('--out', 'out_dir', required=True, type=click.Path(file_okay=False), help='Output directory.')
+@click.option('--ids', default=None, help='Only these song ids, comma separated.')
+@click.option('--workers', type=int, default=os.cpu_count() or 1, show_default=True, help='Worker processes.')
+@with_appcontext
+def export_chordpro_command(out_dir, ids, workers):
+    """Export song sheets as ChordPro files."""
+    from .models import Song
+    from .routes.creator import get_song_filepath
+
+    query = Song.query.order_by(Song.id)
+    if ids:
+        try:
+            query = query.filter(Song.id.in_([int(part) for part in ids.split(',') if part.strip()]))
+        except ValueError:
+            raise click.BadParameter('Expected comma separated integers', param_hint='--ids')
+    os.makedirs(out_dir, exist_ok=True)
+
+    tasks = (
+        {
+            'id': song.id,
+            'source': get_song_filepath(song.id),
+            'dest': os.path.join(out_dir, export_filename(song.id, song.title)),
+            'fields': {'title': song.title, 'artist': song.artist, 'song_key': song.song_key},
+        }
+        for song in query.yield_per(500)
+    )
+
+    exported, failed = 0, []
+    for result in imap_bounded(export_file, tasks, workers):
+        if 'error' in result:
+            failed.append(result)
+        else:
+            exported += 1
+
+    for result in failed:
+        click.echo(f"Skipped song {result['id']}: {result['error']}")
+    click.echo(f"Exported {exported} songs to {out_dir}.")
@@ -0,0 +1,34 @@
+import importlib
+
+import click
+
+
+class LazyCommand(click.Command):
+    """
+    CLI command whose module is imported only when the command is run or its
+    help is shown, so registering it in create_app costs nothing at startup.
+    `import_path` is 'package.module:command_object'.
+    """
+
+    def __init__(self, name: str, import_path: str):
+        super().__init__(name)
+        self.import_path = import_path
+        self._command = None
+
+    def _load(self) -> click.Command:
+        if self._command is None:
+            module_name, attribute = self.import_path.split(':')
+            self._command = getattr(importlib.import_module(module_name), attribute)
+        return self._command
+
+    def get_params(self, ctx):
+        return self._load().get_params(ctx)
+
+    def get_short_help_str(self, limit: int = 45) -> str:
+        return self._load().get_short_help_str(limit)
+
+    def format_help_text(self, ctx, formatter) -> None:
+        self._load().format_help_text(ctx, formatter)
+
+    def invoke(self, ctx):
+        return self._load().invoke(ctx)
@@ -5,9 +5,65 @@ from dotenv import load_dotenv
 load_dotenv()
 
 class Config:
-    SQLALCHEMY_DATABASE_URI = "sqlite:///songs.db"
+    # DATABASE_URL lets deployments point at a server database (e.g. PostgreSQL)
+    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', "sqlite:///songs.db")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Database engine profile: 'production' (tuned) or 'default' (SQLAlchemy stock)
+    DB_ENGINE_PROFILE = os.environ.get('DB_ENGINE_PROFILE', 'production')
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))  # seconds
+
+    # SQLite pragmas applied on every new connection (production profile only)
+    SQLITE_JOURNAL_MODE = os.environ.get('SQLITE_JOURNAL_MODE', 'WAL')
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
+    SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_CACHE_SIZE_KB = int(os.environ.get('SQLITE_CACHE_SIZE_KB', 16384))
+    SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE', 64 * 1024 * 1024))
+
+    # Production server (serve.py)
+    SERVE_HOST = os.environ.get('SERVE_HOST', '0.0.0.0')
+    SERVE_PORT = int(os.environ.get('SERVE_PORT', 8000))
+    SERVE_WORKERS = int(os.environ.get('SERVE_WORKERS', (os.cpu_count() or 1) * 2 + 1))
+    SERVE_THREADS = int(os.environ.get('SERVE_THREADS', 4))
+    SERVE_TIMEOUT = int(os.environ.get('SERVE_TIMEOUT', 30))  # seconds
+    SERVE_GRACEFUL_TIMEOUT = int(os.environ.get('SERVE_GRACEFUL_TIMEOUT', 30))  # seconds
+
+    # Caches warmed before serving
+    SHEET_CACHE_SIZE = int(os.environ.get('SHEET_CACHE_SIZE', 512))
+    WARMUP_SHEET_COUNT = int(os.environ.get('WARMUP_SHEET_COUNT', 100))
+
+    # Rendered song cards kept per process, keyed by song id and row version
+    FRAGMENT_CACHE_SIZE = int(os.environ.get('FRAGMENT_CACHE_SIZE', 10000))
+
+    # Live preview sessions kept per process for the sheet editor. Sessions are
+    # not shared between workers; see README for routing across workers.
+    PREVIEW_MAX_SESSIONS = int(os.environ.get('PREVIEW_MAX_SESSIONS', 256))
+
+    # Ranked fuzzy search: maximum results shown on the explore page
+    SEARCH_MAX_RESULTS = int(os.environ.get('SEARCH_MAX_RESULTS', 100))
+    SUGGEST_LIMIT = int(os.environ.get('SUGGEST_LIMIT', 8))
+
+    # View counters: buffered per worker, flushed every N seconds or after N pending views
+    VIEW_FLUSH_INTERVAL = float(os.environ.get('VIEW_FLUSH_INTERVAL', 30))
+    VIEW_FLUSH_MAX_PENDING = int(os.environ.get('VIEW_FLUSH_MAX_PENDING', 1000))
+    TRENDING_HALF_LIFE_HOURS = float(os.environ.get('TRENDING_HALF_LIFE_HOURS', 48))
+
+    # Artwork thumbnail cache (defaults to <instance>/artwork)
+    ARTWORK_CACHE_DIR = os.environ.get('ARTWORK_CACHE_DIR')
+    ARTWORK_CACHE_MAX_MB = int(os.environ.get('ARTWORK_CACHE_MAX_MB', 256))
+    ARTWORK_FETCH_TIMEOUT = float(os.environ.get('ARTWORK_FETCH_TIMEOUT', 10))
+    # Seconds a failed source fetch is remembered before it is retried
+    ARTWORK_FAILURE_TTL = float(os.environ.get('ARTWORK_FAILURE_TTL', 60))
+
+    # Song revision history: full snapshot every N revisions, deltas in between
+    REVISION_SNAPSHOT_INTERVAL = int(os.environ.get('REVISION_SNAPSHOT_INTERVAL', 10))
+    REVISION_KEEP = int(os.environ.get('REVISION_KEEP', 50))  # per song, for `flask compact-revisions`
+
+    # Cold-start budget for `from app import create_app; create_app()`, enforced by tests
+    STARTUP_BUDGET_MS = int(os.environ.get('STARTUP_BUDGET_MS', 1500))
     
     # Keep the credentials as configuration attributes
     SPOTIPY_CLIENT_ID = os.environ.get('SPOTIPY_CLIENT_ID')
-    SPOTIPY_CLIENT_SECRET = os.environ.get('SPOTIPY_CLIENT_SECRET')
\ No newline at end of file
+    SPOTIPY_CLIENT_SECRET = os.environ.get('SPOTIPY_CLIENT_SECRET')
@@ -0,0 +1,99 @@
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+# Engine profiles selectable through DB_ENGINE_PROFILE:
+# - 'production': WAL journal, busy timeout, tuned pragmas and pool sizing
+# - 'default': leave SQLAlchemy's stock engine settings untouched
+ENGINE_PROFILES = ('production', 'default')
+
+_SYNCHRONOUS_LEVELS = {'OFF', 'NORMAL', 'FULL', 'EXTRA'}
+_JOURNAL_MODES = {'DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF'}
+
+
+def is_sqlite_uri(uri) -> bool:
+    """Return True if the database URI points at SQLite."""
+    return make_url(uri).get_backend_name() == 'sqlite'
+
+
+def is_sqlite_memory_uri(uri) -> bool:
+    """Return True for in-memory SQLite URIs (which use a static pool)."""
+    url = make_url(uri)
+    return url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')
+
+
+def build_engine_options(config) -> dict:
+    """
+    Build SQLALCHEMY_ENGINE_OPTIONS for the configured engine profile.
+    Explicit SQLALCHEMY_ENGINE_OPTIONS entries always win over profile values.
+    """
+    options = {}
+    uri = config.get('SQLALCHEMY_DATABASE_URI')
+
+    if uri and config.get('DB_ENGINE_PROFILE') == 'production':
+        if is_sqlite_uri(uri):
+            # Fail over to the driver-level timeout if the pragma is ignored
+            options['connect_args'] = {'timeout': config['SQLITE_BUSY_TIMEOUT_MS'] / 1000}
+            if not is_sqlite_memory_uri(uri):
+                options['pool_size'] = config['DB_POOL_SIZE']
+                options['max_overflow'] = config['DB_MAX_OVERFLOW']
+        else:
+            # Server databases: size the pool and drop stale connections
+            options['pool_size'] = config['DB_POOL_SIZE']
+            options['max_overflow'] = config['DB_MAX_OVERFLOW']
+            options['pool_recycle'] = config['DB_POOL_RECYCLE']
+            options['pool_pre_ping'] = True
+
+    options.update(config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    return options
+
+
+def sqlite_pragmas(config) -> list[str]:
+    """Return the PRAGMA statements to run on each new SQLite connection."""
+    journal_mode = str(config['SQLITE_JOURNAL_MODE']).upper()
+    synchronous = str(config['SQLITE_SYNCHRONOUS']).upper()
+
+    if journal_mode not in _JOURNAL_MODES:
+        raise ValueError(f"Unsupported SQLITE_JOURNAL_MODE: {journal_mode}")
+    if synchronous not in _SYNCHRONOUS_LEVELS:
+        raise ValueError(f"Unsupported SQLITE_SYNCHRONOUS: {synchronous}")
+
+    return [
+        f"PRAGMA journal_mode={journal_mode}",
+        f"PRAGMA busy_timeout={int(config['SQLITE_BUSY_TIMEOUT_MS'])}",
+        f"PRAGMA synchronous={synchronous}",
+        # Negative cache_size is interpreted by SQLite as KiB rather than pages
+        f"PRAGMA cache_size={-int(config['SQLITE_CACHE_SIZE_KB'])}",
+        f"PRAGMA mmap_size={int(config['SQLITE_MMAP_SIZE'])}",
+        "PRAGMA foreign_keys=ON",
+    ]
+
+
+def install_sqlite_pragmas(engine, config) -> None:
+    """Apply the profile's PRAGMAs whenever the engine opens a new SQLite connection."""
+    if engine.dialect.name != 'sqlite' or config.get('DB_ENGINE_PROFILE') != 'production':
+        return
+
+    statements = sqlite_pragmas(config)
+    if is_sqlite_memory_uri(engine.url):
+        # WAL is not available for in-memory databases
+        statements = [s for s in statements if not s.startswith("PRAGMA journal_mode")]
+
+    @event.listens_for(engine, 'connect')
+    def _apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for statement in statements:
+                cursor.execute(statement)
+        finally:
+            cursor.close()
+
+
+def configure_engine(app, db) -> None:
+    """Validate the engine profile and install connection hooks on the app's engines."""
+    profile = app.config.get('DB_ENGINE_PROFILE')
+    if profile not in ENGINE_PROFILES:
+        raise ValueError(f"Unknown DB_ENGINE_PROFILE: {profile!r}")
+
+    with app.app_context():
+        for engine in db.engines.values():
+            install_sqlite_pragmas(engine, app.config)
@@ -1,4 +1,14 @@
+import time
+
+from sqlalchemy.orm import validates
 from . import db
+from .parsing import parse_key
+
+def _new_row_version() -> int:
+    # Start from the creation time rather than 1, so a song reusing a deleted
+    # song's id never matches fragments cached for the old row
+    return int(time.time() * 1000) % 2**31
+
 
 class Song(db.Model):
     __tablename__ = 'songs'
@@ -9,6 +19,34 @@ class Song(db.Model):
     song_key = db.Column(db.String(100), nullable=False)
     image_url = db.Column(db.String(512), nullable=True)
 
+    # Canonical key derived from song_key: tonic pitch class (0-11) and mode (0 major, 1 minor)
+    key_tonic = db.Column(db.Integer, nullable=True)
+    key_mode = db.Column(db.Integer, nullable=True)
+
+    # Usage signal, written in batches by app.popularity.flush_view_counts
+    view_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    trending_score = db.Column(db.Float, nullable=True)  # see app.popularity; None = never viewed
+
+    # Bumped on every edit of the fields shown on song cards; keys the card fragment cache
+    version = db.Column(db.Integer, nullable=False, default=_new_row_version, server_default='1')
+
+    __table_args__ = (
+        db.Index('ix_songs_key_tonic_mode', 'key_tonic', 'key_mode'),
+        db.Index('ix_songs_view_count', 'view_count'),
+        db.Index('ix_songs_trending_score', 'trending_score'),
+    )
+
+    @validates('song_key')
+    def _sync_canonical_key(self, field, value):
+        """Keep key_tonic/key_mode in step with every assignment to song_key."""
+        parsed = parse_key(value)
+        self.key_tonic, self.key_mode = parsed if parsed else (None, None)
+        return value
+
+    def bump_version(self) -> None:
+        """Mark the row as changed, so cached fragments of it are re-rendered."""
+        self.version = (self.version or 0) + 1
+
     def __repr__(self):
         if self.artist:
             return f"<Song {self.title} by {self.artist}>"
@@ -11,6 +11,17 @@ CHORD_BODY_REGEX = re.compile(
     r'$'
 )
 
+# Pitch class (0-11) of every spelling of a note, and the sharp spelling of each
+NOTE_TO_PC = {
+    'C': 0, 'B#': 0, 'C#': 1, 'Db': 1, 'D': 2, 'D#': 3, 'Eb': 3,
+    'E': 4, 'Fb': 4, 'E#': 5, 'F': 5, 'F#': 6, 'Gb': 6, 'G': 7,
+    'G#': 8, 'Ab': 8, 'A': 9, 'A#': 10, 'Bb': 10, 'B': 11, 'Cb': 11,
+}
+SHARP_NAMES = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
+FLAT_NAMES = ['C', 'Db', 'D', 'Eb', 'E', 'F', 'Gb', 'G', 'Ab', 'A', 'Bb', 'B']
+
+_NOTE_PREFIX_REGEX = re.compile(r'^[A-G][b#]?')
+
 
 def strip_brackets(chord_text: str) -> str:
     """Remove square brackets from a chord token, if present."""
@@ -40,4 +51,118 @@ def parse_chord(chord_text: str) -> tuple[str, str, str]:
 
 def extract_bracketed_chords(text: str) -> list[str]:
     """Return a list of all bracketed chord strings found in the given text."""
-    return [match.group(1) for match in BRACKETED_CHORD_REGEX.finditer(text)]
\ No newline at end of file
+    return [match.group(1) for match in BRACKETED_CHORD_REGEX.finditer(text)]
+
+KEY_MAJOR = 0
+KEY_MINOR = 1
+
+_MINOR_WORDS = {'minor', 'min', 'm'}
+_MAJOR_WORDS = {'major', 'maj'}
+
+
+def parse_key(key_text: str) -> tuple[int, int] | None:
+    """
+    Parse a song key into a canonical (tonic pitch class, mode) pair, so that
+    enharmonic spellings compare equal: 'C#m', 'Dbm', 'C# minor' and 'c#m '
+    all give (1, KEY_MINOR). Returns None if the key cannot be parsed.
+    """
+    words = (key_text or '').split()
+    if not words:
+        return None
+
+    # Same shape as get_key_preference: the first word carries the tonic
+    tonic = words[0][0].upper() + words[0][1:]
+    root, quality, bass = parse_chord(tonic)
+    if not root or bass:
+        return None
+
+    suffix = ' '.join(words[1:]).lower()
+    if quality in ('m', 'min') and (not suffix or suffix in _MINOR_WORDS):
+        mode = KEY_MINOR
+    elif quality in ('', 'maj') and suffix in _MINOR_WORDS:
+        mode = KEY_MINOR
+    elif quality in ('', 'maj') and (not suffix or suffix in _MAJOR_WORDS):
+        mode = KEY_MAJOR
+    else:
+        return None
+
+    return NOTE_TO_PC[root], mode
+
+
+def relative_key(tonic: int, mode: int) -> tuple[int, int]:
+    """The relative minor of a major key, or relative major of a minor key."""
+    if mode == KEY_MAJOR:
+        return (tonic + 9) % 12, KEY_MINOR
+    return (tonic + 3) % 12, KEY_MAJOR
+
+
+# Conventional tonic spelling per pitch class (fewest accidentals in the key signature)
+_MAJOR_KEY_NAMES = ['C', 'Db', 'D', 'Eb', 'E', 'F', 'F#', 'G', 'Ab', 'A', 'Bb', 'B']
+_MINOR_KEY_NAMES = ['C', 'C#', 'D', 'Eb', 'E', 'F', 'F#', 'G', 'G#', 'A', 'Bb', 'B']
+_FLAT_MAJOR_KEYS = {5, 10, 3, 8, 1}      # F, Bb, Eb, Ab, Db
+_FLAT_MINOR_KEYS = {2, 7, 0, 5, 10, 3}   # Dm, Gm, Cm, Fm, Bbm, Ebm
+
+
+def key_name(tonic: int, mode: int) -> str:
+    """Conventional name of a canonical key, e.g. (8, KEY_MAJOR) -> 'Ab', (1, KEY_MINOR) -> 'C#m'."""
+    if mode == KEY_MINOR:
+        return _MINOR_KEY_NAMES[tonic % 12] + 'm'
+    return _MAJOR_KEY_NAMES[tonic % 12]
+
+
+def key_accidentals(tonic: int, mode: int) -> str:
+    """'flat' if the key signature uses flats, else 'sharp' (C major / A minor count as sharp)."""
+    flat_keys = _FLAT_MINOR_KEYS if mode == KEY_MINOR else _FLAT_MAJOR_KEYS
+    return 'flat' if tonic % 12 in flat_keys else 'sharp'
+
+
+def transpose_key(key_text: str, steps: int) -> str | None:
+    """Name of a key moved by `steps` semitones (see key_name), or None if unparseable."""
+    parsed = parse_key(key_text)
+    if not parsed:
+        return None
+    return key_name((parsed[0] + steps) % 12, parsed[1])
+
+
+def transpose_chord(chord_text: str, steps: int, prefer: str = 'sharp') -> str:
+    """
+    Move a chord by `steps` semitones, spelling the root and bass with sharps
+    or flats per `prefer` and keeping the quality as written, e.g.
+    transpose_chord('[F#m7/C#]', 1, 'sharp') -> '[Gm7/D]'. Brackets are kept
+    if present; unparseable chords are returned unchanged.
+    """
+    root, quality, bass = parse_chord(chord_text)
+    if not root:
+        return chord_text
+
+    names = FLAT_NAMES if prefer == 'flat' else SHARP_NAMES
+    name = names[(NOTE_TO_PC[root] + steps) % 12] + quality
+    if bass:
+        bass_note = _NOTE_PREFIX_REGEX.match(bass).group()
+        name += '/' + names[(NOTE_TO_PC[bass_note] + steps) % 12] + bass[len(bass_note):]
+
+    bracketed = chord_text.strip().startswith('[')
+    return f'[{name}]' if bracketed else name
+
+
+def transpose_sheet(text: str, steps: int, prefer: str = 'sharp') -> str:
+    """Transpose every bracketed chord in a sheet's text (see transpose_chord), leaving lyrics untouched."""
+    return BRACKETED_CHORD_REGEX.sub(lambda m: transpose_chord(m.group(1), steps, prefer), text)
+
+
+def respell_key(key_text: str, steps: int) -> str | None:
+    """
+    Move a song key by `steps` semitones keeping the way it was written,
+    e.g. respell_key('C major', 8) -> 'Ab major', respell_key('Am', 4) -> 'C#m'.
+    Returns None if the key cannot be parsed.
+    """
+    parsed = parse_key(key_text)
+    if not parsed:
+        return None
+    tonic, mode = (parsed[0] + steps) % 12, parsed[1]
+    root = key_name(tonic, mode).removesuffix('m')
+
+    words = key_text.split()
+    first = words[0][0].upper() + words[0][1:]
+    written_root = _NOTE_PREFIX_REGEX.match(first).group()
+    return ' '.join([root + first[len(written_root):]] + words[1:])
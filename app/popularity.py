@@ -0,0 +1,161 @@
+import math
+import threading
+import time
+
+# Trending scores are log2 of the song's views weighted by 2^((t - TRENDING_EPOCH) / half-life).
+# Anchoring every view to one epoch makes scores written at different times directly
+# comparable, so ordering by the stored column ranks by the decayed view count "now"
+# without touching rows that received no new views.
+TRENDING_EPOCH = 1704067200  # 2024-01-01 UTC
+
+
+def trending_increment(views: int, at: float, half_life: float) -> float:
+    """Log-space weight of `views` views at time `at` (seconds)."""
+    return math.log2(views) + (at - TRENDING_EPOCH) / half_life
+
+
+def combine_trending(score: float | None, increment: float) -> float:
+    """log2(2^score + 2^increment), without overflow."""
+    if score is None:
+        return increment
+    high, low = max(score, increment), min(score, increment)
+    return high + math.log2(1 + 2 ** (low - high))
+
+
+def decayed_views(score: float | None, now: float, half_life: float) -> float:
+    """The view count a trending score amounts to at time `now`, after decay."""
+    if score is None:
+        return 0.0
+    return 2 ** (score - (now - TRENDING_EPOCH) / half_life)
+
+
+class ViewCounter:
+    """
+    Per-process buffer of sheet views, so /view_sheet never waits on the
+    database write lock. Views are summed per song in memory and handed out
+    by drain() once a flush is due: every `flush_interval` seconds, or
+    sooner when `max_pending` views are waiting.
+    """
+
+    def __init__(self, flush_interval: float = 30, max_pending: int = 1000):
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._counts = {}
+        self._pending = 0
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+
+    def record(self, song_id: int) -> bool:
+        """Count one view; returns True if a flush is due."""
+        with self._lock:
+            self._counts[song_id] = self._counts.get(song_id, 0) + 1
+            self._pending += 1
+            return (
+                self._pending >= self.max_pending
+                or time.monotonic() - self._last_flush >= self.flush_interval
+            )
+
+    def drain(self) -> dict[int, int]:
+        """Take every pending count (song_id -> views), leaving the buffer empty."""
+        with self._lock:
+            counts, self._counts, self._pending = self._counts, {}, 0
+            self._last_flush = time.monotonic()
+            return counts
+
+    def restore(self, counts: dict[int, int]) -> None:
+        """Put back counts whose flush failed, to retry with the next one."""
+        with self._lock:
+            for song_id, views in counts.items():
+                self._counts[song_id] = self._counts.get(song_id, 0) + views
+                self._pending += views
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+
+def write_view_counts(counts: dict[int, int], now: float, half_life: float) -> dict[int, int]:
+    """
+    Add a batch of view counts to the songs table in one transaction:
+    view_count is incremented in place and trending_score is folded forward
+    (see TRENDING_EPOCH), so both sort orders are ready-made indexed columns.
+    Returns the new view_count of each song written. Must run inside an app
+    context.
+    """
+    from sqlalchemy import bindparam, select
+    from . import db
+    from .models import Song
+
+    songs = Song.__table__
+    try:
+        # The increment comes first so the write lock is held before scores are read
+        db.session.execute(
+            songs.update()
+            .where(songs.c.id == bindparam('song_id'))
+            .values(view_count=songs.c.view_count + bindparam('views')),
+            [{'song_id': song_id, 'views': views} for song_id, views in counts.items()]
+        )
+        current = {
+            song_id: (view_count, score)
+            for song_id, view_count, score in db.session.execute(
+                select(songs.c.id, songs.c.view_count, songs.c.trending_score)
+                .where(songs.c.id.in_(list(counts)))
+                .with_for_update()
+            )
+        }
+        updates = [
+            {'song_id': song_id,
+             'score': combine_trending(current[song_id][1], trending_increment(views, now, half_life))}
+            for song_id, views in counts.items() if song_id in current
+        ]
+        if updates:
+            db.session.execute(
+                songs.update()
+                .where(songs.c.id == bindparam('song_id'))
+                .values(trending_score=bindparam('score')),
+                updates
+            )
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return {song_id: view_count for song_id, (view_count, _) in current.items()}
+
+
+def flush_view_counts(app) -> int:
+    """
+    Write this process's pending views to the database and re-rank their
+    songs in autocomplete. Failed batches are kept for the next flush.
+    Returns the number of views written.
+    """
+    counts = app.view_counter.drain()
+    if not counts:
+        return 0
+    half_life = app.config['TRENDING_HALF_LIFE_HOURS'] * 3600
+    try:
+        with app.app_context():
+            view_counts = write_view_counts(counts, time.time(), half_life)
+    except Exception:
+        app.view_counter.restore(counts)
+        app.logger.exception("Flushing %d view counts failed; will retry", len(counts))
+        return 0
+    app.catalog_search.update_popularity(view_counts)
+    return sum(counts.values())
+
+
+def start_view_flusher(app, interval: float | None = None) -> threading.Event:
+    """
+    Flush this process's views every `interval` seconds (VIEW_FLUSH_INTERVAL
+    by default) from a daemon thread, so counts reach the database even when
+    no further view arrives to trigger a flush. Threads don't survive fork,
+    so each worker starts its own. Set the returned event to stop it.
+    """
+    interval = app.config['VIEW_FLUSH_INTERVAL'] if interval is None else interval
+    stop = threading.Event()
+
+    def run():
+        while not stop.wait(interval):
+            flush_view_counts(app)
+
+    threading.Thread(target=run, name='view-flusher', daemon=True).start()
+    return stop
@@ -0,0 +1,378 @@
+import hashlib
+import json
+import math
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from types import SimpleNamespace
+
+import click
+from flask import current_app, render_template
+from flask.cli import with_appcontext
+
+from .cache import build_sheet
+from .parsing import KEY_MINOR, key_accidentals, key_name, parse_key, transpose_chord
+from .voicings import INSTRUMENTS
+
+MANIFEST_NAME = 'manifest.json'
+
+# Bump when rendered output changes for reasons other than templates or data
+RENDER_VERSION = 1
+
+# Templates whose changes invalidate every rendered page
+TEMPLATES = ('index.html', 'view_sheet.html', 'explore.html', '_song_card.html')
+
+_CHORD_SPAN_REGEX = re.compile(r'(<span class="chord" data-chord="([^"]+)">)([^<]*)(</span>)')
+
+_worker_app = None
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def write_output(out_dir: str, relpath: str, data: bytes, previous_hash: str | None) -> tuple[str, bool]:
+    """
+    Atomically write one output file unless it already holds the same bytes.
+    Returns (content hash, whether the file was written).
+    """
+    digest = content_hash(data)
+    path = os.path.join(out_dir, relpath)
+    if digest == previous_hash and os.path.exists(path):
+        return digest, False
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return digest, True
+
+
+def sheet_relpath(song_id: int, steps: int = 0) -> str:
+    if steps:
+        return f"view_sheet/{song_id}/transpose/{steps}/index.html"
+    return f"view_sheet/{song_id}/index.html"
+
+
+def key_slug(tonic: int, mode: int) -> str:
+    """URL-safe key name, e.g. 'c-sharp-minor', 'b-flat-major'."""
+    name = key_name(tonic, mode).removesuffix('m')
+    root = name[0].lower() + {'#': '-sharp', 'b': '-flat'}.get(name[1:], '')
+    return f"{root}-{'minor' if mode == KEY_MINOR else 'major'}"
+
+
+def transpose_sheet_lines(lines: list[dict], steps: int, prefer: str) -> list[dict]:
+    """Transpose the visible chord text of prepared lines, keeping data-chord as written."""
+    def replace(match):
+        return match.group(1) + transpose_chord(match.group(2), steps, prefer) + match.group(4)
+    return [{'chord': _CHORD_SPAN_REGEX.sub(replace, line['chord']), 'lyric': line['lyric']} for line in lines]
+
+
+def render_song_pages(song: dict, raw_text: str, transpose: bool) -> dict[str, bytes]:
+    """Render view_sheet.html for a song, plus its 11 transposed variants if requested."""
+    song_ns = SimpleNamespace(**song)
+    sheet = build_sheet(raw_text)
+    parsed_key = parse_key(song['song_key'])
+    pages = {}
+
+    for steps in range(12 if transpose else 1):
+        lines, display_key = sheet['lines'], None
+        if steps:
+            prefer = 'sharp'
+            if parsed_key:
+                target = ((parsed_key[0] + steps) % 12, parsed_key[1])
+                display_key = key_name(*target)
+                prefer = key_accidentals(*target)
+            lines = transpose_sheet_lines(lines, steps, prefer)
+        html = render_template(
+            'view_sheet.html',
+            song=song_ns,
+            lines=lines,
+            layout=sheet['layout'],
+            instruments=INSTRUMENTS,
+            static_site=True,
+            initial_steps=steps,
+            display_key=display_key
+        )
+        pages[sheet_relpath(song['id'], steps)] = html.encode('utf-8')
+    return pages
+
+
+def _render_song_task(task: dict) -> dict:
+    """Render and write one song's pages (runs in a pool worker or in-process)."""
+    app = _worker_app or current_app._get_current_object()
+    try:
+        with open(task['path'], 'r', encoding='utf-8') as f:
+            raw_text = f.read()
+    except FileNotFoundError:
+        return {'id': task['song']['id'], 'error': 'missing sheet file', 'files': {}, 'written': 0}
+
+    with app.test_request_context():
+        pages = render_song_pages(task['song'], raw_text, task['transpose'])
+
+    files, written = {}, 0
+    for relpath, data in pages.items():
+        digest, changed = write_output(task['out_dir'], relpath, data, task['previous'].get(relpath))
+        files[relpath] = digest
+        written += changed
+    return {'id': task['song']['id'], 'files': files, 'written': written}
+
+
+def _render_page_task(task: dict) -> dict:
+    """Render and write one explore listing page."""
+    app = _worker_app or current_app._get_current_object()
+    with app.test_request_context():
+        html = render_template(
+            'explore.html',
+            songs=[SimpleNamespace(**song) for song in task['songs']],
+            query='',
+            selected_key=task['selected_key'],
+            include_relative=False,
+            static_site=True,
+            key_links=task['key_links'],
+            pagination=task['pagination']
+        )
+    digest, changed = write_output(task['out_dir'], task['relpath'], html.encode('utf-8'), task['previous'])
+    return {'relpath': task['relpath'], 'hash': digest, 'written': int(changed)}
+
+
+def _init_worker(config: dict) -> None:
+    global _worker_app
+    from . import create_app
+    _worker_app = create_app(config)
+
+
+def _file_signature(path: str):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def _row_hash(song: dict) -> str:
+    return content_hash(json.dumps(
+        [song['title'], song['artist'], song['song_key'], song['image_url']]
+    ).encode('utf-8'))
+
+
+def _templates_hash(app, transpose: bool) -> str:
+    digest = hashlib.sha256(f"{RENDER_VERSION}:{transpose}".encode())
+    for name in TEMPLATES:
+        with open(os.path.join(app.template_folder, name), 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def _load_manifest(out_dir: str) -> dict:
+    try:
+        with open(os.path.join(out_dir, MANIFEST_NAME), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _remove_output(out_dir: str, relpath: str) -> None:
+    path = os.path.join(out_dir, relpath)
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        return
+    # Prune directories left empty, up to the output root
+    directory = os.path.dirname(path)
+    while os.path.abspath(directory) != os.path.abspath(out_dir):
+        try:
+            os.rmdir(directory)
+        except OSError:
+            break
+        directory = os.path.dirname(directory)
+
+
+def _explore_tasks(songs: list[dict], page_size: int, out_dir: str, previous: dict) -> list[dict]:
+    """One task per explore page: the full catalog paginated, plus one listing per key."""
+    songs = sorted(songs, key=lambda s: s['title'].lower())
+    by_key = {}
+    for song in songs:
+        parsed = parse_key(song['song_key'])
+        if parsed:
+            by_key.setdefault(parsed, []).append(song)
+
+    key_links = [
+        {'name': key_name(*key), 'url': f"/explore/key/{key_slug(*key)}/"}
+        for key in sorted(by_key, key=lambda k: (k[1], k[0]))
+    ]
+
+    listings = [('explore', None, songs)]
+    listings += [(f"explore/key/{key_slug(*key)}", key_name(*key), by_key[key]) for key in by_key]
+
+    tasks = []
+    for base, selected_key, listing in listings:
+        pages = max(1, math.ceil(len(listing) / page_size))
+        for page in range(1, pages + 1):
+            def page_url(n):
+                return f"/{base}/" if n == 1 else f"/{base}/page/{n}/"
+            relpath = f"{base}/index.html" if page == 1 else f"{base}/page/{page}/index.html"
+            tasks.append({
+                'relpath': relpath,
+                'out_dir': out_dir,
+                'previous': previous.get(relpath),
+                'songs': listing[(page - 1) * page_size:page * page_size],
+                'selected_key': selected_key,
+                'key_links': key_links,
+                'pagination': {
+                    'page': page,
+                    'pages': pages,
+                    'prev_url': page_url(page - 1) if page > 1 else None,
+                    'next_url': page_url(page + 1) if page < pages else None,
+                },
+            })
+    return tasks
+
+
+def _sync_static(app, out_dir: str, previous: dict) -> tuple[dict, int]:
+    """Copy static assets (except song data) into the output, skipping unchanged files."""
+    files, written = {}, 0
+    for dirpath, dirnames, filenames in os.walk(app.static_folder):
+        rel_dir = os.path.relpath(dirpath, app.static_folder)
+        if rel_dir == '.':
+            dirnames[:] = [d for d in dirnames if d != 'data']
+        for name in filenames:
+            relpath = os.path.normpath(os.path.join('static', rel_dir, name)).replace(os.sep, '/')
+            with open(os.path.join(dirpath, name), 'rb') as f:
+                digest, changed = write_output(out_dir, relpath, f.read(), previous.get(relpath))
+            files[relpath] = digest
+            written += changed
+    return files, written
+
+
+def prerender_site(out_dir: str, transpose: bool = False, workers: int = 1,
+                   page_size: int = 60, force: bool = False) -> dict:
+    """
+    Render the catalog to static HTML under out_dir (view_sheet pages, optional
+    transposed variants, explore listings and static assets).
+
+    Incremental: manifest.json records each song's row hash, sheet file
+    signature/content hash and output hashes, so only songs whose row or
+    sheet changed are re-rendered; files whose bytes are unchanged are never
+    rewritten, and pages of deleted songs are removed. Template changes (or
+    --force) re-render everything. Must run inside an app context.
+    """
+    from .models import Song
+    from .routes.main import get_song_filepath
+
+    app = current_app._get_current_object()
+    started = time.perf_counter()
+    os.makedirs(out_dir, exist_ok=True)
+
+    manifest = _load_manifest(out_dir)
+    templates = _templates_hash(app, transpose)
+    if force or manifest.get('templates') != templates:
+        manifest = {'songs': {}, 'pages': {}, 'static': manifest.get('static', {})}
+    old_songs = manifest.get('songs', {})
+
+    songs = [
+        {'id': s.id, 'title': s.title, 'artist': s.artist, 'song_key': s.song_key, 'image_url': s.image_url,
+         'version': s.version}
+        for s in Song.query.order_by(Song.id).all()
+    ]
+
+    new_songs, tasks = {}, []
+    for song in songs:
+        path = get_song_filepath(song['id'])
+        entry = old_songs.get(str(song['id']), {})
+        row = _row_hash(song)
+        signature = _file_signature(path)
+
+        if entry.get('stat') == signature and signature is not None:
+            sheet_hash = entry.get('content')
+        else:
+            try:
+                with open(path, 'rb') as f:
+                    sheet_hash = content_hash(f.read())
+            except FileNotFoundError:
+                sheet_hash = None
+
+        new_songs[str(song['id'])] = {
+            'row': row, 'content': sheet_hash, 'stat': signature, 'files': entry.get('files', {})
+        }
+        if entry.get('row') != row or entry.get('content') != sheet_hash or not entry.get('files'):
+            tasks.append({
+                'song': song, 'path': path, 'out_dir': out_dir,
+                'transpose': transpose, 'previous': entry.get('files', {}),
+            })
+
+    config = {
+        key: app.config[key]
+        for key in ('SQLALCHEMY_DATABASE_URI', 'SONG_DATA_DIR', 'ARTWORK_CACHE_DIR')
+        if app.config.get(key) is not None
+    }
+    catalog_changed = bool(tasks) or set(old_songs) != set(new_songs) or not manifest.get('pages')
+    page_tasks = _explore_tasks(songs, page_size, out_dir, manifest.get('pages', {})) if catalog_changed else []
+
+    stats = {'songs': len(songs), 'rendered': 0, 'files_written': 0, 'removed': 0,
+             'pages': 0, 'missing': []}
+    if workers > 1 and len(tasks) + len(page_tasks) > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(config,)) as pool:
+            song_results = list(pool.map(_render_song_task, tasks, chunksize=16))
+            page_results = list(pool.map(_render_page_task, page_tasks, chunksize=16))
+    else:
+        song_results = [_render_song_task(task) for task in tasks]
+        page_results = [_render_page_task(task) for task in page_tasks]
+
+    for result in song_results:
+        entry = new_songs[str(result['id'])]
+        if 'error' in result:
+            stats['missing'].append(result['id'])
+        for relpath in set(entry['files']) - set(result['files']):
+            _remove_output(out_dir, relpath)
+        entry['files'] = result['files']
+        stats['rendered'] += 1
+        stats['files_written'] += result['written']
+
+    for song_id in set(old_songs) - set(new_songs):
+        for relpath in old_songs[song_id].get('files', {}):
+            _remove_output(out_dir, relpath)
+            stats['removed'] += 1
+
+    pages = manifest.get('pages', {})
+    if catalog_changed:
+        new_pages = {result['relpath']: result['hash'] for result in page_results}
+        for relpath in set(pages) - set(new_pages):
+            _remove_output(out_dir, relpath)
+        pages = new_pages
+        stats['pages'] = len(page_results)
+        stats['files_written'] += sum(result['written'] for result in page_results)
+
+    static_files, static_written = _sync_static(app, out_dir, manifest.get('static', {}))
+    stats['files_written'] += static_written
+
+    manifest = {
+        'version': RENDER_VERSION,
+        'templates': templates,
+        'built_at': time.time(),
+        'songs': new_songs,
+        'pages': pages,
+        'static': static_files,
+    }
+    write_output(out_dir, MANIFEST_NAME, json.dumps(manifest, sort_keys=True).encode('utf-8'), None)
+    stats['seconds'] = round(time.perf_counter() - started, 2)
+    return stats
+
+
+@click.command('prerender')
+@click.option('--out', 'out_dir', required=True, type=click.Path(file_okay=False), help='Output directory.')
+@click.option('--transpose', is_flag=True, help='Also render the 11 transposed variants of every sheet.')
+@click.option('--workers', type=int, default=os.cpu_count() or 1, show_default=True, help='Render processes.')
+@click.option('--page-size', type=int, default=60, show_default=True, help='Songs per explore page.')
+@click.option('--force', is_flag=True, help='Re-render everything, ignoring the manifest.')
+@with_appcontext
+def prerender_command(out_dir, transpose, workers, page_size, force):
+    """Render the catalog to static HTML for serving from a CDN."""
+    stats = prerender_site(out_dir, transpose, workers, page_size, force)
+    click.echo(
+        f"Rendered {stats['rendered']} of {stats['songs']} songs and {stats['pages']} explore pages; "
+        f"wrote {stats['files_written']} files, removed {stats['removed']} in {stats['seconds']}s."
+    )
+    if stats['missing']:
+        click.echo(f"No sheet file for song ids: {', '.join(map(str, stats['missing']))}")
@@ -0,0 +1,103 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+from .utils import process_line
+
+
+class PreviewConflict(Exception):
+    """The client's view of a preview session is out of date and must resync."""
+
+
+class PreviewSession:
+    """Server-side copy of one editor's lines, plus its per-line render cache."""
+
+    def __init__(self):
+        self.lines = []
+        self.version = 0
+        self.line_cache = {}  # content hash -> rendered line (or None for blank)
+
+
+def _line_hash(line: str) -> bytes:
+    return hashlib.blake2b(line.encode('utf-8'), digest_size=16).digest()
+
+
+class PreviewStore:
+    """
+    Per-process LRU of live-preview sessions for the sheet editor.
+
+    Clients send splice edits ({start, delete, insert}) against a session
+    version; only inserted lines are rendered, and each distinct line is
+    rendered once per session (cached by content hash). A session missing
+    from this process (e.g. handled by another worker) raises
+    PreviewConflict so the client resends its full text.
+    """
+
+    def __init__(self, max_sessions: int = 256, max_cached_lines: int = 5000, max_lines: int = 5000):
+        self.max_sessions = max_sessions
+        self.max_cached_lines = max_cached_lines
+        self.max_lines = max_lines
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _session(self, session_id: str, create: bool) -> PreviewSession:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                if not create:
+                    raise PreviewConflict("Unknown preview session")
+                session = self._sessions[session_id] = PreviewSession()
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+            self._sessions.move_to_end(session_id)
+            return session
+
+    def _render(self, session: PreviewSession, line: str):
+        key = _line_hash(line)
+        if key in session.line_cache:
+            return session.line_cache[key]
+        pair = process_line(line.rstrip(), add_data_attr=True)
+        rendered = {"chord": pair[0], "lyric": pair[1]} if pair else None
+        if len(session.line_cache) >= self.max_cached_lines:
+            session.line_cache.clear()
+        session.line_cache[key] = rendered
+        return rendered
+
+    def reset(self, session_id: str, lines: list[str]) -> dict:
+        """Start (or restart) a session from the editor's full text."""
+        if len(lines) > self.max_lines:
+            raise ValueError(f"Sheets are limited to {self.max_lines} lines")
+        session = self._session(session_id, create=True)
+        session.lines = list(lines)
+        session.version += 1
+        return {
+            "version": session.version,
+            "start": 0,
+            "delete": 0,
+            "insert": [self._render(session, line) for line in session.lines],
+        }
+
+    def apply(self, session_id: str, version: int, start: int, delete: int, insert: list[str]) -> dict:
+        """
+        Replace `delete` lines at `start` with `insert`, render only the
+        inserted lines, and return the same splice over rendered lines.
+        """
+        session = self._session(session_id, create=False)
+        if version != session.version:
+            raise PreviewConflict("Preview session version mismatch")
+        if not (0 <= start <= len(session.lines)) or not (0 <= delete <= len(session.lines) - start):
+            raise ValueError("Edit range is outside the sheet")
+        if len(session.lines) - delete + len(insert) > self.max_lines:
+            raise ValueError(f"Sheets are limited to {self.max_lines} lines")
+
+        session.lines[start:start + delete] = insert
+        session.version += 1
+        return {
+            "version": session.version,
+            "start": start,
+            "delete": delete,
+            "insert": [self._render(session, line) for line in insert],
+        }
+
+    def __len__(self):
+        return len(self._sessions)
@@ -0,0 +1,88 @@
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+import click
+
+# Heavy packages only some requests or CLI commands need; they must be imported on first use
+DEFERRED_MODULES = (
+    'spotipy', 'requests', 'urllib3', 'charset_normalizer', 'PIL', 'multiprocessing',
+    'app.chordpro', 'app.prerender', 'app.rekey',
+)
+
+# Measured in a fresh interpreter so imports are cold, as in a new worker or CLI run
+_PROBE = f"""
+import json, time
+t0 = time.perf_counter()
+from app import create_app
+t1 = time.perf_counter()
+app = create_app()
+t2 = time.perf_counter()
+import sys
+print(json.dumps({{
+    "import_ms": (t1 - t0) * 1000,
+    "create_app_ms": (t2 - t1) * 1000,
+    "total_ms": (t2 - t0) * 1000,
+    "spotipy_loaded": "spotipy" in sys.modules,
+    "deferred_loaded": [name for name in {DEFERRED_MODULES!r} if name in sys.modules],
+}}))
+"""
+
+_ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def _parse_importtime(stderr: str) -> dict[str, float]:
+    """Sum `-X importtime` self times (µs) per top-level package, in ms."""
+    totals = defaultdict(float)
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3:
+            continue
+        self_us, _, name = parts
+        try:
+            totals[name.strip().split('.')[0]] += int(self_us) / 1000
+        except ValueError:
+            continue  # header line
+    return dict(totals)
+
+
+def profile_startup(top: int = 15) -> dict:
+    """
+    Run `from app import create_app; create_app()` in a fresh interpreter and
+    report where startup time goes: import vs create_app time, and the
+    heaviest top-level packages by import time.
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', _PROBE],
+        capture_output=True, text=True, cwd=_ROOT_DIR, check=True
+    )
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    packages = sorted(_parse_importtime(result.stderr).items(), key=lambda item: item[1], reverse=True)
+    timings['imports_by_package_ms'] = {name: round(ms, 1) for name, ms in packages[:top]}
+    for key in ('import_ms', 'create_app_ms', 'total_ms'):
+        timings[key] = round(timings[key], 1)
+    return timings
+
+
+@click.command('profile-startup')
+@click.option('--top', default=15, show_default=True, help='Number of packages to list.')
+@click.option('--json', 'as_json', is_flag=True, help='Print the raw report as JSON.')
+def profile_startup_command(top, as_json):
+    """Report where application startup time goes."""
+    report = profile_startup(top)
+    if as_json:
+        click.echo(json.dumps(report, indent=2))
+        return
+
+    click.echo(f"import app:    {report['import_ms']:8.1f} ms")
+    click.echo(f"create_app():  {report['create_app_ms']:8.1f} ms")
+    click.echo(f"total:         {report['total_ms']:8.1f} ms")
+    click.echo(f"spotipy loaded at startup: {report['spotipy_loaded']}")
+    click.echo(f"deferred packages loaded at startup: {', '.join(report['deferred_loaded']) or 'none'}")
+    click.echo("\nSlowest imports (self time by top-level package):")
+    for name, ms in report['imports_by_package_ms'].items():
+        click.echo(f"  {name:<24} {ms:8.1f} ms")
@@ -0,0 +1,234 @@
+import difflib
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from .parsing import key_accidentals, parse_key, respell_key, transpose_sheet
+
+
+def _hash(content: str) -> str:
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+def rekey_song(task: dict) -> dict:
+    """
+    Transpose one song's sheet (runs in a pool worker; no app needed).
+
+    `task` holds id, path, song_key and either `steps` or a `target`
+    (tonic, mode) key. Returns the new key and content, the hash of the
+    content it was computed from and a unified diff, or a `skipped` reason
+    (including a sheet that cannot be read or transposed, so one bad song
+    doesn't stop the job).
+    """
+    try:
+        return _rekey_song(task)
+    except (OSError, ValueError) as e:
+        return {'id': task['id'], 'skipped': f"{type(e).__name__}: {e}"}
+
+
+def _rekey_song(task: dict) -> dict:
+    result = {'id': task['id']}
+    parsed = parse_key(task['song_key'])
+
+    steps = task.get('steps')
+    if task.get('target') is not None:
+        if not parsed:
+            return {**result, 'skipped': f"key '{task['song_key']}' not recognised"}
+        if parsed[1] != task['target'][1]:
+            return {**result, 'skipped': f"key '{task['song_key']}' is not in the target mode"}
+        steps = (task['target'][0] - parsed[0]) % 12
+    if steps % 12 == 0:
+        return {**result, 'skipped': 'already in the target key'}
+
+    try:
+        with open(task['path'], 'r', encoding='utf-8') as f:
+            content = f.read()
+    except FileNotFoundError:
+        return {**result, 'skipped': 'no sheet file'}
+
+    # Spell chords with the accidentals of the new key (sharps if it is unknown)
+    prefer = key_accidentals((parsed[0] + steps) % 12, parsed[1]) if parsed else 'sharp'
+    new_content = transpose_sheet(content, steps, prefer)
+    new_key = respell_key(task['song_key'], steps) or task['song_key']
+    if new_content == content and new_key == task['song_key']:
+        return {**result, 'skipped': 'no chords or key to transpose'}
+
+    diff = [f"Key: {task['song_key']} -> {new_key}"] if new_key != task['song_key'] else []
+    diff += difflib.unified_diff(
+        content.split('\n'), new_content.split('\n'),
+        fromfile=f"{task['id']}.txt", tofile=f"{task['id']}.txt (rekeyed)", lineterm=''
+    )
+    return {
+        **result,
+        'song_key': new_key,
+        'content': new_content,
+        'base_hash': _hash(content),
+        'diff': diff,
+    }
+
+
+def _batches(results, size: int):
+    batch = []
+    for result in results:
+        batch.append(result)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _apply_batch(batch: list[dict]) -> tuple[int, list[tuple[int, str]]]:
+    """
+    Save one batch: each sheet file is replaced atomically (recording a
+    revision) and the batch's song_key updates are committed in a single
+    transaction. If any write or the commit fails, the transaction is rolled
+    back and the sheets already rewritten are restored to their original
+    content. Songs edited since they were read are skipped as conflicts.
+    """
+    from . import db
+    from .models import Song
+    from .routes.creator import load_song_content, save_song_content
+
+    applied, written, conflicts = [], [], []
+    try:
+        for result in batch:
+            original = load_song_content(result['id'])
+            if _hash(original) != result['base_hash']:
+                conflicts.append((result['id'], 'sheet changed while the job was running'))
+                continue
+            song = db.session.get(Song, result['id'])
+            if song is None:
+                conflicts.append((result['id'], 'song was deleted'))
+                continue
+            song.song_key = result['song_key']
+            song.bump_version()
+            if save_song_content(result['id'], result['content']):
+                written.append((result['id'], original))
+            applied.append(song)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        # Keep files and keys in step: the restore is recorded as a new revision
+        for song_id, original in reversed(written):
+            try:
+                save_song_content(song_id, original)
+            except Exception:
+                current_app.logger.exception("Could not restore the sheet of song %s", song_id)
+        raise
+
+    for song in applied:
+        current_app.catalog_search.song_saved(song)
+    return len(applied), conflicts
+
+
+def rekey_songs(songs, steps: int | None = None, target: str | None = None, dry_run: bool = False,
+                workers: int = 1, batch_size: int = 100):
+    """
+    Transpose the sheets of `songs` by `steps` semitones, or to the `target`
+    key, and update their song_key. Generator yielding each song's result
+    dict (see rekey_song) once it has been written, or computed if dry_run;
+    results carry 'conflict' if the song changed underneath the job.
+    Must run inside an app context.
+    """
+    from .routes.creator import get_song_filepath
+
+    target_key = None
+    if target is not None:
+        target_key = parse_key(target)
+        if not target_key:
+            raise ValueError(f"Unrecognised target key '{target}'")
+
+    tasks = [
+        {'id': song.id, 'path': get_song_filepath(song.id), 'song_key': song.song_key,
+         'steps': steps, 'target': target_key}
+        for song in songs
+    ]
+
+    if workers > 1 and len(tasks) > 1:
+        pool = ProcessPoolExecutor(max_workers=workers)
+        results = pool.map(rekey_song, tasks, chunksize=max(1, min(batch_size, len(tasks) // workers)))
+    else:
+        pool = None
+        results = map(rekey_song, tasks)
+
+    try:
+        # Writes of one batch overlap with the pool transposing the next
+        for batch in _batches(results, batch_size):
+            pending = [result for result in batch if 'skipped' not in result]
+            conflicts = {}
+            if pending and not dry_run:
+                conflicts = dict(_apply_batch(pending)[1])
+            for result in batch:
+                if result['id'] in conflicts:
+                    result['conflict'] = conflicts[result['id']]
+                yield result
+    finally:
+        if pool:
+            pool.shutdown(cancel_futures=True)
+
+
+@click.command('rekey')
+@click.option('--steps', type=click.IntRange(-11, 11), default=None, help='Semitones to transpose by.')
+@click.option('--to', 'target', default=None, help="Move every song to this key (e.g. 'D', 'Bbm').")
+@click.option('--artist', multiple=True, help='Only songs by this artist (repeatable).')
+@click.option('--key', 'current_keys', multiple=True, help='Only songs currently in this key (repeatable).')
+@click.option('--ids', default=None, help='Only these song ids, comma separated.')
+@click.option('--all', 'all_songs', is_flag=True, help='Select every song (when no filter is given).')
+@click.option('--dry-run', is_flag=True, help='Print the diff of every change without writing anything.')
+@click.option('--workers', type=int, default=os.cpu_count() or 1, show_default=True, help='Worker processes.')
+@click.option('--batch-size', type=int, default=100, show_default=True, help='Songs committed per transaction.')
+@with_appcontext
+def rekey_command(steps, target, artist, current_keys, ids, all_songs, dry_run, workers, batch_size):
+    """Transpose the stored sheets of a group of songs into a new key."""
+    from sqlalchemy import func, or_
+    from .models import Song
+    from .routes.main import key_filter_clause
+
+    if (steps is None) == (target is None):
+        raise click.UsageError('Give exactly one of --steps or --to.')
+    if not (artist or current_keys or ids or all_songs):
+        raise click.UsageError('Give a filter (--artist, --key, --ids) or --all.')
+    if target is not None and not parse_key(target):
+        raise click.BadParameter(f"Unrecognised target key '{target}'", param_hint='--to')
+
+    query = Song.query
+    if artist:
+        query = query.filter(func.lower(Song.artist).in_([name.strip().lower() for name in artist]))
+    if current_keys:
+        clauses = []
+        for key in current_keys:
+            clause = key_filter_clause(key)
+            if clause is None:
+                raise click.BadParameter(f"Unrecognised key '{key}'", param_hint='--key')
+            clauses.append(clause)
+        query = query.filter(or_(*clauses))
+    if ids:
+        try:
+            id_list = [int(part) for part in ids.split(',') if part.strip()]
+        except ValueError:
+            raise click.BadParameter('Expected comma separated integers', param_hint='--ids')
+        query = query.filter(Song.id.in_(id_list))
+
+    songs = query.order_by(Song.id).all()
+    changed, skipped, conflicts = 0, [], []
+    for result in rekey_songs(songs, steps, target, dry_run, workers, batch_size):
+        if 'skipped' in result:
+            skipped.append(result)
+        elif 'conflict' in result:
+            conflicts.append(result)
+        else:
+            changed += 1
+            if dry_run:
+                click.echo('\n'.join(result['diff']) + '\n')
+
+    for result in skipped:
+        click.echo(f"Skipped song {result['id']}: {result['skipped']}")
+    for result in conflicts:
+        click.echo(f"Not saved song {result['id']}: {result['conflict']}")
+    verb = 'Would rekey' if dry_run else 'Rekeyed'
+    click.echo(f"{verb} {changed} of {len(songs)} matching songs.")
@@ -0,0 +1,273 @@
+import difflib
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+try:
+    import fcntl
+except ImportError:  # Windows: saves are only serialised within one process
+    fcntl = None
+
+_fallback_lock = threading.Lock()
+_held = threading.local()
+
+
+def content_hash(content: str) -> str:
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _remove_quietly(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def line_delta(old_lines: list[str], new_lines: list[str]) -> list:
+    """Line-level edit script turning old_lines into new_lines: [[i1, i2, replacement], ...]."""
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    return [
+        [i1, i2, new_lines[j1:j2]]
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes()
+        if tag != 'equal'
+    ]
+
+
+def apply_delta(lines: list[str], delta: list) -> list[str]:
+    lines = list(lines)
+    # Apply from the end so earlier indices stay valid
+    for i1, i2, replacement in reversed(delta):
+        lines[i1:i2] = replacement
+    return lines
+
+
+class RevisionStore:
+    """
+    Revision history for song content files.
+
+    Each song gets a directory holding an index.json plus one zlib-compressed
+    file per revision: a full snapshot every `snapshot_interval` revisions and
+    line-level deltas against the previous revision in between, so rebuilding
+    any revision reads one snapshot and at most snapshot_interval - 1 deltas.
+    """
+
+    def __init__(self, root: str, snapshot_interval: int = 10):
+        self.root = root
+        self.snapshot_interval = max(1, snapshot_interval)
+
+    def _song_dir(self, song_id: int) -> str:
+        return os.path.join(self.root, str(song_id))
+
+    def _blob_path(self, song_id: int, entry: dict) -> str:
+        return os.path.join(self._song_dir(song_id), f"{entry['rev']}.{entry['kind']}.z")
+
+    @contextmanager
+    def lock(self, song_id: int):
+        """
+        Exclusive lock on one song's history, shared by every worker process
+        (flock on the song directory). Re-entrant within a thread, so callers
+        can hold it around record() to keep other files in step.
+        """
+        held = _held.__dict__.setdefault('songs', set())
+        key = (self.root, song_id)
+        if key in held:
+            yield
+            return
+
+        song_dir = self._song_dir(song_id)
+        os.makedirs(song_dir, exist_ok=True)
+        if fcntl is None:
+            fd = None
+            _fallback_lock.acquire()
+        else:
+            fd = os.open(song_dir, os.O_RDONLY)
+        held.add(key)
+        try:
+            if fd is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            held.discard(key)
+            if fd is None:
+                _fallback_lock.release()
+            else:
+                os.close(fd)  # releases the flock
+
+    def list_revisions(self, song_id: int) -> list[dict]:
+        """Index entries (oldest first): rev, kind, hash, created_at, lines."""
+        try:
+            with open(os.path.join(self._song_dir(song_id), 'index.json'), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return []
+
+    def _save_index(self, song_id: int, index: list[dict]) -> None:
+        data = json.dumps(index, separators=(',', ':')).encode('utf-8')
+        _write_atomic(os.path.join(self._song_dir(song_id), 'index.json'), data)
+
+    def _read_blob(self, song_id: int, entry: dict):
+        with open(self._blob_path(song_id, entry), 'rb') as f:
+            return json.loads(zlib.decompress(f.read()).decode('utf-8'))
+
+    def _write_blob(self, song_id: int, entry: dict, payload) -> None:
+        data = zlib.compress(json.dumps(payload, separators=(',', ':')).encode('utf-8'), 9)
+        _write_atomic(self._blob_path(song_id, entry), data)
+
+    def latest_hash(self, song_id: int) -> str | None:
+        index = self.list_revisions(song_id)
+        return index[-1]['hash'] if index else None
+
+    def record(self, song_id: int, content: str) -> dict | None:
+        """
+        Store `content` as the song's next revision.
+        Returns the new index entry, or None if it matches the latest revision.
+        """
+        with self.lock(song_id):
+            return self._record(song_id, content)
+
+    def _record(self, song_id: int, content: str) -> dict | None:
+        digest = content_hash(content)
+        index = self.list_revisions(song_id)
+        if index and index[-1]['hash'] == digest:
+            return None
+
+        rev = index[-1]['rev'] + 1 if index else 1
+        since_snapshot = 0
+        for entry in reversed(index):
+            if entry['kind'] == 'snap':
+                break
+            since_snapshot += 1
+
+        new_lines = content.split('\n')
+        entry = {'rev': rev, 'hash': digest, 'created_at': time.time(), 'lines': len(new_lines)}
+
+        if not index or since_snapshot + 1 >= self.snapshot_interval:
+            entry['kind'] = 'snap'
+            self._write_blob(song_id, entry, content)
+        else:
+            entry['kind'] = 'delta'
+            old_lines = self.get_content(song_id, index[-1]['rev'], index).split('\n')
+            self._write_blob(song_id, entry, line_delta(old_lines, new_lines))
+
+        index.append(entry)
+        self._save_index(song_id, index)
+        return entry
+
+    def get_content(self, song_id: int, rev: int, index: list[dict] | None = None) -> str:
+        """Rebuild a revision from its nearest preceding snapshot. Raises KeyError if unknown."""
+        index = index if index is not None else self.list_revisions(song_id)
+        position = next((i for i, entry in enumerate(index) if entry['rev'] == rev), None)
+        if position is None:
+            raise KeyError(f"Song {song_id} has no revision {rev}")
+
+        start = position
+        while index[start]['kind'] != 'snap':
+            start -= 1
+
+        lines = self._read_blob(song_id, index[start]).split('\n')
+        for entry in index[start + 1:position + 1]:
+            lines = apply_delta(lines, self._read_blob(song_id, entry))
+        return '\n'.join(lines)
+
+    def diff(self, song_id: int, from_rev: int, to_rev: int) -> list[str]:
+        """Unified diff lines between two revisions."""
+        old = self.get_content(song_id, from_rev).split('\n')
+        new = self.get_content(song_id, to_rev).split('\n')
+        return list(difflib.unified_diff(
+            old, new, fromfile=f"revision {from_rev}", tofile=f"revision {to_rev}", lineterm=''
+        ))
+
+    def compact(self, song_id: int, keep: int, max_age_days: float | None = None) -> int:
+        """
+        Drop all but the newest `keep` revisions (and, if given, those older
+        than max_age_days, always keeping the latest). The oldest survivor is
+        rewritten as a snapshot so every remaining chain still resolves.
+        Returns the number of revisions removed.
+        """
+        if not self.list_revisions(song_id):
+            return 0
+        with self.lock(song_id):
+            return self._compact(song_id, keep, max_age_days)
+
+    def _compact(self, song_id: int, keep: int, max_age_days: float | None) -> int:
+        index = self.list_revisions(song_id)
+        if not index:
+            return 0
+
+        cutoff = len(index) - max(1, keep)
+        if max_age_days is not None:
+            min_created = time.time() - max_age_days * 86400
+            too_old = sum(1 for entry in index[:-1] if entry['created_at'] < min_created)
+            cutoff = max(cutoff, too_old)
+        if cutoff <= 0:
+            return 0
+
+        # Write the new snapshot and the index before deleting anything, so a
+        # failure part way leaves the old index and its blobs readable
+        first_kept = index[cutoff]
+        stale_blobs = [self._blob_path(song_id, entry) for entry in index[:cutoff]]
+        new_snapshot = None
+        if first_kept['kind'] != 'snap':
+            content = self.get_content(song_id, first_kept['rev'], index)
+            stale_blobs.append(self._blob_path(song_id, first_kept))
+            first_kept['kind'] = 'snap'
+            self._write_blob(song_id, first_kept, content)
+            new_snapshot = self._blob_path(song_id, first_kept)
+
+        try:
+            self._save_index(song_id, index[cutoff:])
+        except Exception:
+            if new_snapshot:
+                _remove_quietly(new_snapshot)
+            raise
+        for path in stale_blobs:
+            _remove_quietly(path)
+        return cutoff
+
+    def delete(self, song_id: int) -> None:
+        shutil.rmtree(self._song_dir(song_id), ignore_errors=True)
+
+    def song_ids(self) -> list[int]:
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(int(name) for name in os.listdir(self.root) if name.isdigit())
+
+
+def get_revision_store() -> RevisionStore:
+    """Revision store for the current app, kept next to the song data files."""
+    data_dir = current_app.config.get(
+        'SONG_DATA_DIR',
+        os.path.join(current_app.root_path, '..', 'static', 'data')
+    )
+    return RevisionStore(
+        os.path.join(data_dir, 'revisions'),
+        current_app.config['REVISION_SNAPSHOT_INTERVAL']
+    )
+
+
+@click.command('compact-revisions')
+@click.option('--keep', type=int, default=None, help='Revisions kept per song (default: REVISION_KEEP).')
+@click.option('--max-age-days', type=float, default=None, help='Also drop revisions older than this.')
+@with_appcontext
+def compact_revisions_command(keep, max_age_days):
+    """Apply the revision retention policy to every song."""
+    store = get_revision_store()
+    keep = keep if keep is not None else current_app.config['REVISION_KEEP']
+    removed = sum(store.compact(song_id, keep, max_age_days) for song_id in store.song_ids())
+    click.echo(f"Removed {removed} revisions.")
@@ -3,5 +3,6 @@
 
 from .main import main_bp
 from .creator import creator_bp
+from .health import health_bp
 
-__all__ = ['main_bp', 'creator_bp']
\ No newline at end of file
+__all__ = ['main_bp', 'creator_bp', 'health_bp']
\ No newline at end of file
@@ -1,7 +1,13 @@
 import os
-from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app
+import threading
+import time
+from datetime import datetime
+from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app, jsonify, abort
 from ..models import Song
 from ..utils import normalise_spacing, process_song_text, get_song_image_url
+from ..spotify import get_spotify_client
+from ..preview import PreviewConflict
+from ..revisions import get_revision_store
 from .. import db
 
 creator_bp = Blueprint('creator', __name__)
@@ -21,11 +27,31 @@ def get_song_filepath(song_id):
 
 
 def save_song_content(song_id, content):
-    """Save normalized song content to file."""
+    """
+    Save normalized song content to file and record it as a new revision.
+    Returns False (writing nothing) if the content is unchanged.
+    """
+    store = get_revision_store()
     filepath = get_song_filepath(song_id)
-    os.makedirs(os.path.dirname(filepath), exist_ok=True)
-    with open(filepath, 'w', encoding='utf-8') as f:
-        f.write(content)
+    # One save per song at a time across workers, so the file matches its latest revision
+    with store.lock(song_id):
+        if store.latest_hash(song_id) is None:
+            # Songs created before revision history: keep the current file as the baseline
+            existing = load_song_content(song_id)
+            if existing and existing != content:
+                store.record(song_id, existing)
+
+        if store.record(song_id, content) is None:
+            return False
+
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        # Write-then-rename, so concurrent readers never see a half-written sheet
+        tmp_path = f"{filepath}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(tmp_path, filepath)
+    current_app.sheet_cache.invalidate(song_id)
+    return True
 
 
 def load_song_content(song_id):
@@ -43,6 +69,16 @@ def delete_song_file(song_id):
     filepath = get_song_filepath(song_id)
     if os.path.exists(filepath):
         os.remove(filepath)
+    # Ids can be reused by SQLite, so history must not outlive the song
+    get_revision_store().delete(song_id)
+    current_app.sheet_cache.invalidate(song_id)
+
+
+def _string_list(value):
+    """Validate a JSON list of lines for the preview API."""
+    if not isinstance(value, list) or not all(isinstance(line, str) for line in value):
+        raise ValueError("Lines must be a list of strings.")
+    return value
 
 
 @creator_bp.route('/creator')
@@ -98,10 +134,10 @@ def create():
         elif custom_image_url:
             # User provided a custom image URL
             new_song.image_url = custom_image_url
-        elif hasattr(current_app, 'sp_client') and current_app.sp_client:
+        elif get_spotify_client(current_app):
             # Auto-search Spotify if no custom URL and not clearing
             image_url = get_song_image_url(
-                current_app.sp_client, 
+                get_spotify_client(current_app), 
                 title, 
                 artist if artist else None
             )
@@ -110,6 +146,7 @@ def create():
         
         db.session.add(new_song)
         db.session.commit()
+        current_app.catalog_search.song_saved(new_song)
         
         # Save content to file
         save_song_content(new_song.id, content)
@@ -149,13 +186,13 @@ def edit_song(song_id):
         elif custom_image_url:
             # User provided a custom image URL
             song.image_url = custom_image_url
-        elif hasattr(current_app, 'sp_client') and current_app.sp_client:
+        elif get_spotify_client(current_app):
             # Auto-search if title/artist changed or no image exists
             title_changed = song.title != original_title
             artist_changed = song.artist != original_artist
             if title_changed or artist_changed or not original_image_url:
                 image_url = get_song_image_url(
-                    current_app.sp_client, 
+                    get_spotify_client(current_app), 
                     song.title, 
                     song.artist if song.artist else None
                 )
@@ -180,8 +217,10 @@ def edit_song(song_id):
             )
         
         # Save changes
+        song.bump_version()
         save_song_content(song_id, content)
         db.session.commit()
+        current_app.catalog_search.song_saved(song)
         
         flash(f"Song '{song.title}' updated successfully!", "success")
         return redirect(url_for('main.explore'))
@@ -205,10 +244,98 @@ def delete_song(song_id):
     song = Song.query.get_or_404(song_id)
     song_title = song.title  # Store for flash message
     
-    # Delete file and database record
-    delete_song_file(song_id)
+    # Remove the sheet and its history only once the row is gone, so a
+    # failed commit leaves the song intact
     db.session.delete(song)
     db.session.commit()
+    delete_song_file(song_id)
+    current_app.catalog_search.song_deleted(song_id)
+    current_app.fragment_cache.invalidate(song_id)
     
     flash(f"Song '{song_title}' deleted successfully.", "success")
-    return redirect(url_for('main.explore'))
\ No newline at end of file
+    return redirect(url_for('main.explore'))
+
+
+@creator_bp.route('/song/<int:song_id>/history')
+def song_history(song_id):
+    """List a song's revisions, optionally with a diff between two of them."""
+    song = Song.query.get_or_404(song_id)
+    store = get_revision_store()
+    revisions = list(reversed(store.list_revisions(song_id)))
+    for entry in revisions:
+        entry['saved'] = datetime.fromtimestamp(entry['created_at']).strftime('%Y-%m-%d %H:%M')
+
+    from_rev = request.args.get('from', type=int)
+    to_rev = request.args.get('to', type=int)
+    diff_lines = None
+    if from_rev is not None and to_rev is not None:
+        try:
+            diff_lines = store.diff(song_id, from_rev, to_rev)
+        except KeyError as e:
+            abort(404, description=str(e.args[0]))
+
+    return render_template(
+        "history.html",
+        song=song,
+        revisions=revisions,
+        diff_lines=diff_lines,
+        from_rev=from_rev,
+        to_rev=to_rev
+    )
+
+
+@creator_bp.route('/song/<int:song_id>/history/<int:rev>/restore', methods=['POST'])
+def restore_revision(song_id, rev):
+    """Restore an earlier revision's content (recorded as a new revision)."""
+    song = Song.query.get_or_404(song_id)
+    try:
+        content = get_revision_store().get_content(song_id, rev)
+    except KeyError as e:
+        abort(404, description=str(e.args[0]))
+
+    if save_song_content(song_id, content):
+        flash(f"Restored revision {rev} of '{song.title}'.", "success")
+    else:
+        flash(f"Revision {rev} matches the current sheet; nothing to restore.", "success")
+    return redirect(url_for('creator.song_history', song_id=song_id))
+
+
+@creator_bp.route('/api/preview', methods=['POST'])
+def preview():
+    """
+    Incremental live preview for the sheet editor.
+
+    Body: {"session": id, "full": [lines]} to (re)start a session, or
+    {"session": id, "version": n, "start": i, "delete": k, "insert": [lines]}
+    to splice changed lines. Responds with the same splice over rendered
+    lines, or 409 {"resync": true} when the client must resend "full".
+    Sessions live in the worker that started them; a request routed to
+    another worker gets a 409 and the client falls back to resending "full".
+    """
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        abort(400, description="Preview requests must be a JSON object.")
+    session_id = payload.get('session')
+    if not isinstance(session_id, str) or not session_id:
+        abort(400, description="A preview session id is required.")
+
+    started = time.perf_counter()
+    store = current_app.preview_store
+    try:
+        if 'full' in payload:
+            result = store.reset(session_id, _string_list(payload['full']))
+        else:
+            result = store.apply(
+                session_id,
+                payload.get('version'),
+                int(payload.get('start', 0)),
+                int(payload.get('delete', 0)),
+                _string_list(payload.get('insert', []))
+            )
+    except PreviewConflict:
+        return jsonify(resync=True), 409
+    except (TypeError, ValueError) as e:
+        abort(400, description=str(e))
+
+    result['server_ms'] = round((time.perf_counter() - started) * 1000, 3)
+    return jsonify(result)
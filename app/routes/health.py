@@ -0,0 +1,44 @@
+from flask import Blueprint, jsonify, current_app
+from sqlalchemy import text
+from .. import db
+
+health_bp = Blueprint('health', __name__)
+
+
+@health_bp.route('/healthz')
+def healthz():
+    """Liveness probe: the process is up and serving requests."""
+    return jsonify(status='ok')
+
+
+@health_bp.route('/cachez')
+def cachez():
+    """Hit rates of this worker's in-process caches."""
+    def rate(cache):
+        lookups = cache.hits + cache.misses
+        return {'hits': cache.hits, 'misses': cache.misses,
+                'hit_rate': round(cache.hits / lookups, 4) if lookups else None}
+
+    return jsonify(
+        fragments=current_app.fragment_cache.stats(),
+        sheets={'entries': len(current_app.sheet_cache), **rate(current_app.sheet_cache)},
+        artwork=rate(current_app.artwork_cache),
+    )
+
+
+@health_bp.route('/readyz')
+def readyz():
+    """Readiness probe: the database is reachable and warmup has finished."""
+    checks = {}
+
+    try:
+        db.session.execute(text('SELECT 1'))
+        checks['database'] = 'ok'
+    except Exception as e:
+        current_app.logger.error(f"Readiness check failed: {e}")
+        checks['database'] = 'error'
+
+    checks['warmup'] = 'ok' if current_app.warmed_up else 'pending'
+
+    ready = all(status == 'ok' for status in checks.values())
+    return jsonify(status='ready' if ready else 'not ready', checks=checks), (200 if ready else 503)
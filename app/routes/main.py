@@ -1,21 +1,25 @@
 import os
-import unicodedata
-from flask import Blueprint, render_template, request, current_app, abort
+from functools import partial
+from flask import (
+    Blueprint, Response, render_template, request, current_app, abort, jsonify, url_for, redirect, send_file,
+    stream_with_context
+)
+from sqlalchemy import and_, or_
+from .. import db
 from ..models import Song
-from ..utils import prepare_song
+from ..utils import normalize_text
+from ..parsing import extract_bracketed_chords, parse_key, relative_key
+from ..voicings import INSTRUMENTS, canonical_chord_name, get_voicings
+from ..artwork import ArtworkError, FORMATS, THUMBNAIL_SIZES, url_digest
+from ..popularity import flush_view_counts
 
 main_bp = Blueprint('main', __name__)
 
-
-def normalize_text(text):
-    """
-    Normalize text for accent-insensitive comparison.
-    Removes diacritical marks and converts to lowercase.
-    """
-    return ''.join(
-        char for char in unicodedata.normalize('NFD', text)
-        if unicodedata.category(char) != 'Mn'
-    ).lower()
+# Explore sort orders backed by precomputed, indexed columns (see app.popularity)
+SORT_ORDERS = {
+    'popular': (Song.view_count.desc(), Song.title),
+    'trending': (Song.trending_score.desc().nulls_last(), Song.title),
+}
 
 
 def get_song_filepath(song_id):
@@ -27,12 +31,46 @@ def get_song_filepath(song_id):
     return os.path.abspath(os.path.join(data_dir, f'{song_id}.txt'))
 
 
+def catalog_loader():
+    """
+    Loader of the id/version/title/artist rows the search indexes are built
+    from. It opens its own app context, so a background sync can call it.
+    """
+    app = current_app._get_current_object()
+
+    def load():
+        with app.app_context():
+            return db.session.execute(
+                db.select(Song.id, Song.version, Song.title, Song.artist, Song.view_count)
+            ).all()
+    return load
+
+
+def key_filter_clause(selected_key, include_relative=False):
+    """
+    Build an indexed filter on the canonical key columns, so enharmonic
+    spellings match ('C#m' finds 'Dbm'), optionally including the relative
+    major/minor. Returns None if the key cannot be parsed.
+    """
+    parsed = parse_key(selected_key)
+    if not parsed:
+        return None
+
+    keys = [parsed]
+    if include_relative:
+        keys.append(relative_key(*parsed))
+    return or_(*(
+        and_(Song.key_tonic == tonic, Song.key_mode == mode)
+        for tonic, mode in keys
+    ))
+
+
 def song_matches_filters(song, query_normalized, key_normalized):
     """
     Check if a song matches the given search filters.
     Returns True if the song matches all provided filters.
     """
-    # Check key filter
+    # Check key filter (exact text; only used for keys parse_key can't read)
     if key_normalized:
         key_match = song.song_key and song.song_key.lower() == key_normalized
         if not key_match:
@@ -59,31 +97,117 @@ def home():
 def explore():
     """
     Display searchable song list with optional filters for query and key.
-    Uses accent-insensitive search for better UX.
+    Queries use the accent-insensitive, typo-tolerant catalog index and are
+    ranked by relevance; without a query songs are listed by title.
     """
     query_raw = request.args.get('query', '').strip()
     selected_key = request.args.get('key', '').strip()
+    include_relative = request.args.get('relative') == '1'
+    sort = request.args.get('sort', '')
+    if sort not in SORT_ORDERS:
+        sort = ''
     
     # Normalize inputs for comparison
-    query_normalized = normalize_text(query_raw) if query_raw else ''
     key_normalized = selected_key.lower() if selected_key else ''
     
-    # Filter songs based on search criteria
-    all_songs = Song.query.all()
-    filtered_songs = [
-        song for song in all_songs
-        if song_matches_filters(song, query_normalized, key_normalized)
-    ]
-    
-    # Sort alphabetically by title
-    songs = sorted(filtered_songs, key=lambda s: s.title.lower())
+    # Key filter runs in the database through the canonical key index
+    songs_query = Song.query
+    key_clause = key_filter_clause(selected_key, include_relative) if selected_key else None
+    if key_clause is not None:
+        songs_query = songs_query.filter(key_clause)
+        key_normalized = ''
+
+    if query_raw:
+        # Ranked, typo-tolerant search; the key filter narrows its results
+        key_filtered = key_clause is not None or bool(key_normalized)
+        limit = current_app.config['SEARCH_MAX_RESULTS']
+        ranked_ids = [song_id for song_id, _ in current_app.catalog_search.search(
+            query_raw, load_songs=catalog_loader(), limit=None if key_filtered else limit
+        )]
+        if key_filtered:
+            candidates = songs_query.all()
+        else:
+            candidates = songs_query.filter(Song.id.in_(ranked_ids)).all() if ranked_ids else []
+        by_id = {
+            song.id: song for song in candidates
+            if song_matches_filters(song, '', key_normalized)
+        }
+        songs = [by_id[song_id] for song_id in ranked_ids if song_id in by_id][:limit]
+        if sort == 'popular':
+            songs.sort(key=lambda s: -s.view_count)  # stable: ties keep relevance order
+        elif sort == 'trending':
+            songs.sort(key=lambda s: (s.trending_score is None, -(s.trending_score or 0)))
+    else:
+        if sort:
+            songs_query = songs_query.order_by(*SORT_ORDERS[sort])
+
+        # Filter songs based on search criteria
+        all_songs = songs_query.all()
+        filtered_songs = [
+            song for song in all_songs
+            if song_matches_filters(song, '', key_normalized)
+        ]
+
+        # Sort alphabetically by title unless ranked by the database
+        songs = filtered_songs if sort else sorted(filtered_songs, key=lambda s: s.title.lower())
     
     return render_template(
         'explore.html',
         songs=songs,
         query=query_raw,
-        selected_key=selected_key
+        selected_key=selected_key,
+        include_relative=include_relative,
+        sort=sort
+    )
+
+
+@main_bp.route('/api/suggest')
+def suggest():
+    """Autocomplete for the explore search box: songs and artists matching a prefix."""
+    prefix = request.args.get('q', '').strip()
+    limit = min(request.args.get('limit', current_app.config['SUGGEST_LIMIT'], type=int), 50)
+
+    suggestions = current_app.catalog_search.suggest(
+        prefix, load_songs=catalog_loader(), limit=max(limit, 1)
+    ) if prefix else []
+    for item in suggestions:
+        if item['type'] == 'song':
+            item['url'] = url_for('main.view_sheet', song_id=item['song_id'])
+        else:
+            item['url'] = url_for('main.explore', query=item['label'])
+
+    return jsonify(query=prefix, suggestions=suggestions)
+
+
+@main_bp.route('/artwork/<int:song_id>/<size>')
+def artwork(song_id, size):
+    """
+    Serve a resized thumbnail of a song's artwork from the local cache,
+    WebP when the browser accepts it, JPEG otherwise. URLs carry a version of
+    the source URL (see artwork_url), so responses are cacheable for a year.
+    """
+    song = Song.query.get_or_404(song_id)
+    if size not in THUMBNAIL_SIZES or not song.image_url:
+        abort(404)
+
+    fmt = 'webp' if any(value == 'image/webp' for value, _ in request.accept_mimetypes) else 'jpeg'
+    try:
+        path = current_app.artwork_cache.get(song.image_url, size, fmt)
+    except ArtworkError as e:
+        current_app.logger.warning("Artwork for song %s unavailable: %s", song_id, e)
+        if not song.image_url.startswith(('http://', 'https://')):
+            abort(404)
+        return redirect(song.image_url)
+
+    # Only a URL naming the current source image may be cached for good
+    versioned = request.args.get('v') == url_digest(song.image_url)[:12]
+    response = send_file(
+        path, mimetype=FORMATS[fmt][0], max_age=31536000 if versioned else 300, conditional=True
     )
+    response.cache_control.public = True
+    response.cache_control.immutable = versioned
+    response.vary.add('Accept')
+    return response
 
 
 @main_bp.route('/view_sheet/<int:song_id>')
@@ -92,22 +216,72 @@ def view_sheet(song_id):
     song = Song.query.get_or_404(song_id)
     filepath = get_song_filepath(song_id)
     
-    # Verify file exists
-    if not os.path.isfile(filepath):
+    # Load and process the chord sheet (cached until the file changes)
+    try:
+        sheet = current_app.sheet_cache.get(song_id, filepath)
+    except FileNotFoundError:
         abort(404, description=f"Chord sheet not found for '{song.title}'")
     
-    # Load and process the chord sheet
-    with open(filepath, 'r', encoding='utf-8') as f:
-        raw_text = f.read()
-    
-    tuple_lines = prepare_song(raw_text, add_data_attr=True)
-    processed_lines = [
-        {"chord": chord, "lyric": lyric}
-        for chord, lyric in tuple_lines
-    ]
-    
-    return render_template(
+    response = current_app.make_response(render_template(
         'view_sheet.html',
         song=song,
-        lines=processed_lines
-    )
\ No newline at end of file
+        lines=sheet['lines'],
+        layout=sheet['layout'],
+        instruments=INSTRUMENTS
+    ))
+
+    # Counted in memory; the batched write happens after the response is sent
+    if current_app.view_counter.record(song_id):
+        response.call_on_close(partial(flush_view_counts, current_app._get_current_object()))
+    return response
+
+
+@main_bp.route('/song/<int:song_id>/chordpro')
+def song_chordpro(song_id):
+    """Download a song's sheet as ChordPro, converted line by line as it streams."""
+    from ..chordpro import export_filename, native_to_chordpro
+
+    song = Song.query.get_or_404(song_id)
+    filepath = get_song_filepath(song_id)
+    if not os.path.exists(filepath):
+        abort(404, description=f"Chord sheet not found for '{song.title}'")
+    fields = {'title': song.title, 'artist': song.artist, 'song_key': song.song_key}
+
+    def generate():
+        with open(filepath, 'r', encoding='utf-8') as f:
+            for line in native_to_chordpro(fields, f):
+                yield line + '\n'
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/plain',
+        headers={'Content-Disposition': f'attachment; filename="{export_filename(song.id, song.title)}"'}
+    )
+
+
+@main_bp.route('/api/voicings/<int:song_id>')
+def song_voicings(song_id):
+    """
+    Return fingerings for the chords used in a song's sheet, transposed by
+    `steps`, keyed by sharp-spelled chord name (see canonical_chord_name).
+    """
+    song = Song.query.get_or_404(song_id)
+    instrument = request.args.get('instrument', 'guitar')
+    steps = request.args.get('steps', 0, type=int)
+
+    if instrument not in INSTRUMENTS:
+        abort(400, description=f"Unknown instrument '{instrument}'")
+
+    try:
+        with open(get_song_filepath(song_id), 'r', encoding='utf-8') as f:
+            raw_text = f.read()
+    except FileNotFoundError:
+        abort(404, description=f"Chord sheet not found for '{song.title}'")
+
+    voicings = {}
+    for chord in dict.fromkeys(extract_bracketed_chords(raw_text)):
+        chord_voicings = get_voicings(chord, instrument, steps)
+        if chord_voicings:
+            voicings[canonical_chord_name(chord, steps)] = chord_voicings
+
+    return jsonify(instrument=instrument, steps=steps, voicings=voicings)
\ No newline at end of file
@@ -0,0 +1,599 @@
+import bisect
+import heapq
+import os
+import re
+import threading
+from collections import defaultdict
+
+from .utils import normalize_text
+
+_TOKEN_REGEX = re.compile(r'\w+')
+
+# Similarity credited to a query token for each kind of match
+_EXACT, _PREFIX = 1.0, 0.85
+_TYPO_PENALTY = 0.25          # per edit
+_MAX_PREFIX_EXPANSION = 200   # vocabulary tokens considered for one prefix
+_MAX_TYPO_CANDIDATES = 200    # edit distances computed per query token
+_SUGGEST_CACHE_DEPTH = 20     # suggestions memoized per prefix
+_SUGGEST_MAX_PREFIXES = 20000  # memoized prefixes before longer ones are dropped
+
+
+def tokenize(text: str) -> list[str]:
+    """Accent-folded, lowercase word tokens (see normalize_text)."""
+    return _TOKEN_REGEX.findall(normalize_text(text)) if text else []
+
+
+def trigrams(token: str) -> set[str]:
+    # Double leading pad so even short tokens keep a trigram anchored on their first letter
+    padded = f"$${token}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def max_typos(token: str) -> int:
+    """Edits tolerated for a query token of this length."""
+    if len(token) <= 3:
+        return 0
+    return 1 if len(token) <= 6 else 2
+
+
+def bounded_edit_distance(a: str, b: str, max_dist: int) -> int:
+    """
+    Optimal string alignment distance (an adjacent transposition counts as
+    one edit), computed only within max_dist of the diagonal and abandoned
+    once a whole row exceeds max_dist. Returns max_dist + 1 for anything
+    further apart.
+    """
+    len_a, len_b = len(a), len(b)
+    if abs(len_a - len_b) > max_dist:
+        return max_dist + 1
+
+    over = max_dist + 1
+    before_prev = None
+    prev = [j if j <= max_dist else over for j in range(len_b + 1)]
+    for i in range(1, len_a + 1):
+        cur = [over] * (len_b + 1)
+        if i <= max_dist:
+            cur[0] = i
+        lo = max(1, i - max_dist)
+        hi = min(len_b, i + max_dist)
+        row_min = cur[0]
+        char_a = a[i - 1]
+        for j in range(lo, hi + 1):
+            value = prev[j - 1] if char_a == b[j - 1] else prev[j - 1] + 1
+            if prev[j] + 1 < value:
+                value = prev[j] + 1
+            if cur[j - 1] + 1 < value:
+                value = cur[j - 1] + 1
+            if (i > 1 and j > 1 and char_a == b[j - 2] and a[i - 2] == b[j - 1]
+                    and before_prev[j - 2] + 1 < value):
+                value = before_prev[j - 2] + 1
+            cur[j] = value
+            if value < row_min:
+                row_min = value
+        if row_min > max_dist:
+            return over
+        before_prev, prev = prev, cur
+
+    return prev[len_b] if prev[len_b] <= max_dist else over
+
+
+class FuzzySearchIndex:
+    """
+    Typo-tolerant search over song titles and artists.
+
+    Query tokens are matched against the distinct-token vocabulary: exactly,
+    as a prefix (sorted vocabulary + bisect), or within max_typos edits.
+    Typo candidates come from a trigram index and are filtered by the q-gram
+    lemma (one edit, counting a transposition, destroys at most four trigrams)
+    before the bounded edit distance is computed for at most
+    _MAX_TYPO_CANDIDATES of them (those sharing the most trigrams). Matching tokens map to songs through posting lists;
+    every query token must match (AND), and songs are ranked by summed
+    similarity with bonuses for whole-phrase matches.
+    """
+
+    def __init__(self):
+        self._docs = {}                            # song_id -> (title_norm, artist_norm, tokens)
+        self._postings = defaultdict(dict)         # token -> {song_id: field weight}
+        self._trigram_tokens = defaultdict(set)    # trigram -> tokens
+        self._sorted_vocab = None                  # rebuilt lazily after vocabulary changes
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._docs)
+
+    def __contains__(self, song_id):
+        return song_id in self._docs
+
+    @property
+    def vocabulary_size(self) -> int:
+        return len(self._postings)
+
+    def add(self, song_id: int, title: str, artist: str | None = None) -> None:
+        """Index (or re-index) one song."""
+        with self._lock:
+            if song_id in self._docs:
+                self.remove(song_id)
+
+            title_tokens = tokenize(title)
+            artist_tokens = tokenize(artist or '')
+            tokens = set(title_tokens) | set(artist_tokens)
+            self._docs[song_id] = (normalize_text(title or ''), normalize_text(artist or ''), tokens)
+
+            for token in tokens:
+                if token not in self._postings:
+                    for gram in trigrams(token):
+                        self._trigram_tokens[gram].add(token)
+                    self._sorted_vocab = None
+                # Title matches weigh slightly more than artist matches
+                self._postings[token][song_id] = 1.0 if token in title_tokens else 0.9
+
+    def remove(self, song_id: int) -> None:
+        with self._lock:
+            doc = self._docs.pop(song_id, None)
+            if doc is None:
+                return
+            for token in doc[2]:
+                posting = self._postings[token]
+                posting.pop(song_id, None)
+                if not posting:
+                    del self._postings[token]
+                    for gram in trigrams(token):
+                        self._trigram_tokens[gram].discard(token)
+                    self._sorted_vocab = None
+
+    def _vocab(self) -> list[str]:
+        if self._sorted_vocab is None:
+            self._sorted_vocab = sorted(self._postings)
+        return self._sorted_vocab
+
+    def match_token(self, query_token: str) -> dict[str, float]:
+        """Vocabulary tokens matching one query token, with their similarity."""
+        matches = {}
+        if query_token in self._postings:
+            matches[query_token] = _EXACT
+
+        if len(query_token) >= 2:
+            vocab = self._vocab()
+            start = bisect.bisect_left(vocab, query_token)
+            for token in vocab[start:start + _MAX_PREFIX_EXPANSION]:
+                if not token.startswith(query_token):
+                    break
+                matches.setdefault(token, _PREFIX)
+
+        max_dist = max_typos(query_token)
+        if max_dist:
+            grams = trigrams(query_token)
+            shared = defaultdict(int)
+            for gram in grams:
+                for token in self._trigram_tokens.get(gram, ()):
+                    shared[token] += 1
+            min_shared = max(1, len(grams) - 4 * max_dist)
+            candidates = [
+                token for token, count in shared.items()
+                if count >= min_shared and token not in matches
+                and abs(len(token) - len(query_token)) <= max_dist
+            ]
+            if len(candidates) > _MAX_TYPO_CANDIDATES:
+                # Real typos share most trigrams; only verify the closest candidates
+                candidates = heapq.nlargest(_MAX_TYPO_CANDIDATES, candidates, key=shared.__getitem__)
+            for token in candidates:
+                dist = bounded_edit_distance(query_token, token, max_dist)
+                if dist <= max_dist:
+                    matches[token] = 1.0 - _TYPO_PENALTY * dist
+
+        return matches
+
+    def search(self, query: str, limit: int | None = 20) -> list[tuple[int, float]]:
+        """Return up to `limit` (song_id, score) pairs, best first."""
+        query_tokens = list(dict.fromkeys(tokenize(query)))
+        if not query_tokens:
+            return []
+
+        with self._lock:
+            per_token = []
+            for query_token in query_tokens:
+                doc_scores = {}
+                for token, similarity in self.match_token(query_token).items():
+                    for song_id, weight in self._postings[token].items():
+                        score = similarity * weight
+                        if score > doc_scores.get(song_id, 0.0):
+                            doc_scores[song_id] = score
+                if not doc_scores:
+                    return []
+                per_token.append(doc_scores)
+
+            # Intersect, starting from the most selective token
+            per_token.sort(key=len)
+            scores = dict(per_token[0])
+            for doc_scores in per_token[1:]:
+                scores = {
+                    song_id: score + doc_scores[song_id]
+                    for song_id, score in scores.items() if song_id in doc_scores
+                }
+
+            phrase = normalize_text(query.strip())
+            ranked = []
+            for song_id, score in scores.items():
+                title_norm, artist_norm, _ = self._docs[song_id]
+                score /= len(query_tokens)
+                if phrase in title_norm:
+                    score += 0.5
+                elif phrase in artist_norm:
+                    score += 0.25
+                ranked.append((-score, title_norm, song_id))
+
+        ranked.sort()
+        if limit is not None:
+            ranked = ranked[:limit]
+        return [(song_id, round(-neg_score, 4)) for neg_score, _, song_id in ranked]
+
+
+class SuggestIndex:
+    """
+    Autocomplete over song titles and artists.
+
+    Every word start of a normalized title or artist is a key in one sorted
+    array of (key, entry) pairs, so a prefix lookup is a bisect plus a scan
+    of the matching range. Entries are songs, ranked by their popularity, and
+    artists (shared by all their songs), ranked by the summed popularity of
+    their songs plus the number of songs; matches on the first word rank
+    higher, then labels alphabetically.
+
+    The best _SUGGEST_CACHE_DEPTH entries per prefix are memoized, and all
+    one- and two-character prefixes (the widest ranges) are computed up front
+    by load(). add() and remove() patch the memoized lists in place instead
+    of discarding them, so a catalog change never forces a full range scan.
+    """
+
+    def __init__(self):
+        self._keys = []        # sorted (key, entry_id)
+        self._entries = {}     # entry_id -> public entry dict
+        self._texts = {}       # entry_id -> normalized title/artist
+        self._songs = {}       # song_id -> (title, artist)
+        self._popularity = {}  # song_id -> popularity
+        self._results = {}     # prefix -> [ranked (rank, entry_id) list, total matches]
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._songs)
+
+    @staticmethod
+    def _word_starts(text_norm: str) -> list[str]:
+        return [text_norm[m.start():] for m in re.finditer(r'(?:^|(?<=\s))\S', text_norm)]
+
+    def _rank_of(self, entry_id, prefix: str) -> tuple:
+        entry = self._entries[entry_id]
+        from_start = self._texts[entry_id].startswith(prefix)
+        return (-entry['popularity'], not from_start, entry['label'].lower())
+
+    def load(self, songs) -> None:
+        """Bulk (re)build from (song_id, title, artist) rows: one sort instead of per-key inserts."""
+        with self._lock:
+            self._keys, self._entries, self._texts, self._songs = [], {}, {}, {}
+            for song_id, title, artist in songs:
+                self._add_entries(song_id, title, artist, sort_keys=False)
+            self._keys.sort()
+            self._prime()
+
+    def _prime(self) -> None:
+        """Memoize every one- and two-character prefix present in the index."""
+        self._results = {}
+        for length in (1, 2):
+            for prefix in sorted({key[:length] for key, _ in self._keys}):
+                self._results[prefix] = self._rank(prefix)
+
+    def _insert_keys(self, entry_id, sort_keys: bool) -> None:
+        for key in self._word_starts(self._texts[entry_id]):
+            if sort_keys:
+                bisect.insort(self._keys, (key, entry_id))
+            else:
+                self._keys.append((key, entry_id))
+
+    def _delete_keys(self, entry_id) -> None:
+        for key in self._word_starts(self._texts[entry_id]):
+            i = bisect.bisect_left(self._keys, (key, entry_id))
+            if i < len(self._keys) and self._keys[i] == (key, entry_id):
+                del self._keys[i]
+
+    def _cached_prefixes(self, entry_id) -> set[str]:
+        """Memoized prefixes that this entry matches."""
+        return {
+            key[:length]
+            for key in self._word_starts(self._texts[entry_id])
+            for length in range(1, len(key) + 1)
+            if key[:length] in self._results
+        }
+
+    def _uncache(self, entry_id, prefixes) -> None:
+        for prefix in prefixes:
+            ranked, total = self._results[prefix]
+            ranked[:] = [item for item in ranked if item[1] != entry_id]
+            self._results[prefix][1] = total - 1
+
+    def _cache(self, entry_id, prefixes) -> None:
+        for prefix in prefixes:
+            ranked, total = self._results[prefix]
+            item = (self._rank_of(entry_id, prefix), entry_id)
+            # Only placeable if it beats the last kept entry, or nothing was cut off
+            if total == len(ranked) or (ranked and item < ranked[-1]):
+                bisect.insort(ranked, item)
+                del ranked[_SUGGEST_CACHE_DEPTH:]
+            self._results[prefix][1] = total + 1
+
+    def _add_entries(self, song_id, title, artist, sort_keys=True) -> None:
+        self._songs[song_id] = (title, artist)
+        popularity = self._popularity.get(song_id, 0)
+
+        entry_id = ('song', song_id)
+        self._entries[entry_id] = {
+            'type': 'song', 'label': title, 'artist': artist,
+            'song_id': song_id, 'popularity': popularity,
+        }
+        self._texts[entry_id] = normalize_text(title)
+        self._insert_keys(entry_id, sort_keys)
+        if sort_keys:
+            self._cache(entry_id, self._cached_prefixes(entry_id))
+
+        if artist:
+            entry_id = ('artist', normalize_text(artist))
+            entry = self._entries.get(entry_id)
+            if entry is None:
+                self._entries[entry_id] = {'type': 'artist', 'label': artist, 'songs': 1, 'popularity': popularity + 1}
+                self._texts[entry_id] = entry_id[1]
+                self._insert_keys(entry_id, sort_keys)
+                if sort_keys:
+                    self._cache(entry_id, self._cached_prefixes(entry_id))
+            else:
+                prefixes = self._cached_prefixes(entry_id) if sort_keys else ()
+                self._uncache(entry_id, prefixes)
+                entry['songs'] += 1
+                entry['popularity'] += popularity + 1
+                self._cache(entry_id, prefixes)
+
+    def add(self, song_id: int, title: str, artist: str | None = None) -> None:
+        """Index (or re-index) one song."""
+        with self._lock:
+            if song_id in self._songs:
+                self.remove(song_id)
+            self._add_entries(song_id, title, artist)
+
+    def remove(self, song_id: int) -> None:
+        with self._lock:
+            song = self._songs.pop(song_id, None)
+            if song is None:
+                return
+            title, artist = song
+
+            entry_id = ('song', song_id)
+            self._uncache(entry_id, self._cached_prefixes(entry_id))
+            self._delete_keys(entry_id)
+            popularity = self._entries.pop(entry_id)['popularity']
+            del self._texts[entry_id]
+
+            if artist:
+                entry_id = ('artist', normalize_text(artist))
+                entry = self._entries[entry_id]
+                prefixes = self._cached_prefixes(entry_id)
+                self._uncache(entry_id, prefixes)
+                entry['songs'] -= 1
+                entry['popularity'] -= popularity + 1
+                if entry['songs']:
+                    self._cache(entry_id, prefixes)
+                else:
+                    self._delete_keys(entry_id)
+                    del self._entries[entry_id]
+                    del self._texts[entry_id]
+
+    def set_popularity(self, popularity: dict[int, float]) -> None:
+        """Replace song popularity scores (e.g. view counts); ids not yet indexed apply when added."""
+        with self._lock:
+            self._popularity = dict(popularity)
+            for entry in self._entries.values():
+                if entry['type'] == 'artist':
+                    entry['popularity'] = entry['songs']
+            for song_id, (_, artist) in self._songs.items():
+                value = self._popularity.get(song_id, 0)
+                self._entries[('song', song_id)]['popularity'] = value
+                if artist:
+                    self._entries[('artist', normalize_text(artist))]['popularity'] += value
+            self._prime()
+
+    def popularity(self, song_id: int) -> float:
+        return self._popularity.get(song_id, 0)
+
+    def update_popularity(self, popularity: dict[int, float]) -> None:
+        """Change the popularity of some songs, re-ranking only their entries."""
+        with self._lock:
+            for song_id, value in popularity.items():
+                self._popularity[song_id] = value
+                song = self._songs.get(song_id)
+                if song is not None:
+                    self.remove(song_id)
+                    self._add_entries(song_id, *song)
+
+    def suggest(self, prefix: str, limit: int = 8) -> list[dict]:
+        """Top `limit` songs and artists with a word starting with `prefix`, most popular first."""
+        prefix_norm = ' '.join(normalize_text(prefix).split())
+        if not prefix_norm:
+            return []
+
+        with self._lock:
+            cached = self._results.get(prefix_norm)
+            if cached is None or (len(cached[0]) < limit and cached[1] > len(cached[0])):
+                if len(self._results) >= _SUGGEST_MAX_PREFIXES:
+                    # Keep the primed one- and two-character prefixes; longer ones are cheap to redo
+                    self._results = {p: v for p, v in self._results.items() if len(p) <= 2}
+                cached = self._results[prefix_norm] = self._rank(prefix_norm, limit)
+            return [dict(self._entries[entry_id]) for _, entry_id in cached[0][:limit]]
+
+    def _rank(self, prefix: str, limit: int = 0) -> list:
+        """[best entries as sorted (rank, entry_id), total matching entries] for a prefix."""
+        keys = self._keys
+        i = bisect.bisect_left(keys, (prefix,))
+        matched = set()
+        while i < len(keys) and keys[i][0].startswith(prefix):
+            matched.add(keys[i][1])
+            i += 1
+        ranked = heapq.nsmallest(
+            max(limit, _SUGGEST_CACHE_DEPTH),
+            ((self._rank_of(entry_id, prefix), entry_id) for entry_id in matched)
+        )
+        return [ranked, len(matched)]
+
+
+class CatalogSearch:
+    """
+    Per-process search and autocomplete indexes over the song catalog, kept
+    consistent across workers through a shared marker file whose mtime
+    changes whenever any process creates, edits or deletes a song. The
+    writing process updates its own indexes incrementally; other processes
+    notice the new mtime on their next lookup and sync the rows whose
+    version changed in a background thread, serving the current index
+    meanwhile.
+    """
+
+    def __init__(self, marker_path: str):
+        self.marker_path = marker_path
+        self.index = FuzzySearchIndex()
+        self.suggestions = SuggestIndex()
+        self._stamp = None   # marker mtime the index reflects; None = never built
+        self._versions = {}  # song id -> row version the index reflects
+        self._touched = set()  # ids saved or deleted here while a sync was loading rows
+        self._sync_thread = None
+        self._lock = threading.RLock()
+
+    def _marker_stamp(self):
+        try:
+            return os.stat(self.marker_path).st_mtime_ns
+        except FileNotFoundError:
+            return 0
+
+    def _touch_marker(self):
+        os.makedirs(os.path.dirname(self.marker_path), exist_ok=True)
+        with open(self.marker_path, 'a'):
+            pass
+        os.utime(self.marker_path)
+        return self._marker_stamp()
+
+    def build(self, songs) -> None:
+        """(Re)build the index from an iterable of songs (or id/version/title/artist rows)."""
+        with self._lock:
+            stamp = self._marker_stamp()
+            songs = list(songs)
+            rows = [(song.id, song.title, song.artist) for song in songs]
+            index = FuzzySearchIndex()
+            for row in rows:
+                index.add(*row)
+            suggestions = SuggestIndex()
+            # Most viewed songs (and their artists) are suggested first
+            suggestions.set_popularity({
+                song.id: song.view_count for song in songs if getattr(song, 'view_count', 0)
+            })
+            suggestions.load(rows)
+            self.index = index
+            self.suggestions = suggestions
+            self._versions = {song.id: getattr(song, 'version', None) for song in songs}
+            self._stamp = stamp
+
+    def sync(self, songs, stamp) -> int:
+        """
+        Bring the indexes up to date with `songs` (the full catalog as
+        id/version/title/artist rows, read after the marker showed `stamp`),
+        re-indexing only rows whose version changed, dropping missing ones
+        and picking up new view counts. Returns the number of songs updated.
+        """
+        with self._lock:
+            changed = 0
+            seen, views = set(), {}
+            for song in songs:
+                seen.add(song.id)
+                view_count = getattr(song, 'view_count', None)
+                if view_count is not None and view_count != self.suggestions.popularity(song.id):
+                    views[song.id] = view_count
+                if song.id in self._touched or self._versions.get(song.id, -1) == song.version:
+                    continue
+                self.index.add(song.id, song.title, song.artist)
+                self.suggestions.add(song.id, song.title, song.artist)
+                self._versions[song.id] = song.version
+                changed += 1
+            for song_id in [i for i in self._versions if i not in seen and i not in self._touched]:
+                self.index.remove(song_id)
+                self.suggestions.remove(song_id)
+                del self._versions[song_id]
+                changed += 1
+            # View counts flushed by other workers re-rank suggestions too
+            self.suggestions.update_popularity(views)
+            self._touched.clear()
+            self._stamp = stamp
+            return changed
+
+    def _sync_from(self, load_songs) -> None:
+        try:
+            # Read the stamp first: changes made while loading trigger another sync
+            stamp = self._marker_stamp()
+            self.sync(load_songs(), stamp)
+        finally:
+            with self._lock:
+                self._sync_thread = None
+
+    def ensure_fresh(self, load_songs) -> None:
+        """
+        Build via load_songs() on first use. Afterwards, if another process
+        changed the catalog, start a background sync unless one is running;
+        load_songs must then work outside the caller's app context.
+        """
+        if self._stamp is not None and self._stamp == self._marker_stamp():
+            return
+        with self._lock:
+            # Re-check under the lock: another thread may have built or started a sync
+            if self._stamp is None:
+                self.build(load_songs())
+                return
+            if self._sync_thread is not None or self._stamp == self._marker_stamp():
+                return
+            self._touched.clear()
+            self._sync_thread = threading.Thread(target=self._sync_from, args=(load_songs,), daemon=True)
+            self._sync_thread.start()
+
+    def wait_for_sync(self, timeout: float | None = None) -> None:
+        """Block until a running background sync has finished."""
+        thread = self._sync_thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def song_saved(self, song) -> None:
+        with self._lock:
+            self.index.add(song.id, song.title, song.artist)
+            self.suggestions.add(song.id, song.title, song.artist)
+            self._versions[song.id] = getattr(song, 'version', None)
+            if self._sync_thread is not None:
+                self._touched.add(song.id)
+            up_to_date = self._stamp is not None and self._stamp == self._marker_stamp()
+            stamp = self._touch_marker()
+            if up_to_date:
+                self._stamp = stamp
+
+    def update_popularity(self, view_counts: dict[int, int]) -> None:
+        """Re-rank suggestions for songs whose view counts this process just wrote."""
+        with self._lock:
+            self.suggestions.update_popularity(view_counts)
+
+    def song_deleted(self, song_id: int) -> None:
+        with self._lock:
+            self.index.remove(song_id)
+            self.suggestions.remove(song_id)
+            self._versions.pop(song_id, None)
+            if self._sync_thread is not None:
+                self._touched.add(song_id)
+            up_to_date = self._stamp is not None and self._stamp == self._marker_stamp()
+            stamp = self._touch_marker()
+            if up_to_date:
+                self._stamp = stamp
+
+    def search(self, query: str, load_songs, limit: int | None = 20) -> list[tuple[int, float]]:
+        self.ensure_fresh(load_songs)
+        return self.index.search(query, limit)
+
+    def suggest(self, prefix: str, load_songs, limit: int = 8) -> list[dict]:
+        self.ensure_fresh(load_songs)
+        return self.suggestions.suggest(prefix, limit)
@@ -0,0 +1,35 @@
+def get_spotify_client(app):
+    """
+    Return the app's Spotipy client, building it on first use.
+
+    spotipy (and requests) take a noticeable share of cold-start time, so they
+    are only imported when a request actually needs artwork. Returns None when
+    credentials are missing or initialization fails; the result is cached in
+    app.extensions['spotify'] either way.
+    """
+    if 'spotify' in app.extensions:
+        return app.extensions['spotify']
+
+    client_id = app.config.get('SPOTIPY_CLIENT_ID')
+    client_secret = app.config.get('SPOTIPY_CLIENT_SECRET')
+
+    sp_client = None  # Default to None
+
+    if client_id and client_secret:
+        try:
+            import spotipy
+            from spotipy.oauth2 import SpotifyClientCredentials
+
+            auth_manager = SpotifyClientCredentials(
+                client_id=client_id,
+                client_secret=client_secret
+            )
+            sp_client = spotipy.Spotify(auth_manager=auth_manager)
+            app.logger.info("Spotipy client initialized successfully.")
+        except Exception:
+            app.logger.error("Spotipy initialization failed. Images will not be fetched.")
+    else:
+        app.logger.warning("SPOTIPY_CLIENT_ID or SECRET not found. Artist images disabled.")
+
+    app.extensions['spotify'] = sp_client
+    return sp_client
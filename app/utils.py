@@ -1,4 +1,6 @@
 import re
+import unicodedata
+from functools import lru_cache
 
 # Central regex for bracketed chords, used by both highlighting and parsing
 BRACKETED_CHORD_REGEX = re.compile(
@@ -19,6 +21,9 @@ SECTION_KEYWORDS = [
 # Normalize section keywords to lowercase for faster lookups
 _SECTION_KEYWORDS_LOWER = {kw.lower() for kw in SECTION_KEYWORDS}
 
+# Matches the markup added by highlight_chords, to recover visible text widths
+_HTML_TAG_REGEX = re.compile(r'<[^>]+>')
+
 
 def normalise_spacing(text: str) -> str:
     """
@@ -116,18 +121,26 @@ def split_chord_lyric_line(line: str) -> tuple[str, str]:
     return chord_str, lyric_str
 
 
+def process_line(line: str, add_data_attr: bool = False) -> tuple[str, str] | None:
+    """Splits a single line into a highlighted chord/lyric pair. Returns None for blank lines."""
+    if not line.strip():
+        return None
+    chord_line, lyric_line = split_chord_lyric_line(line)
+    # Avoid double-highlighting for section headers
+    if not chord_line.strip().startswith('<span'):
+        chord_line = highlight_chords(chord_line, add_data_attr=add_data_attr)
+    return chord_line, lyric_line
+
+
 def process_song_text(text: str, add_data_attr: bool = False) -> list[tuple[str, str]]:
     """Splits lines into chord/lyric pairs, highlights chords."""
     lines = text.split('\n')
     processed = []
     
     for line in lines:
-        if line.strip():
-            chord_line, lyric_line = split_chord_lyric_line(line)
-            # Avoid double-highlighting for section headers
-            if not chord_line.strip().startswith('<span'):
-                chord_line = highlight_chords(chord_line, add_data_attr=add_data_attr)
-            processed.append((chord_line, lyric_line))
+        pair = process_line(line, add_data_attr=add_data_attr)
+        if pair is not None:
+            processed.append(pair)
     
     return processed
 
@@ -138,6 +151,55 @@ def prepare_song(text: str, add_data_attr: bool = False) -> list[tuple[str, str]
     return process_song_text(cleaned, add_data_attr=add_data_attr)
 
 
+def compute_layout_metrics(lines: list[tuple[str, str]]) -> dict:
+    """
+    Computes layout hints for the sheet viewer from processed chord/lyric pairs,
+    so the client does not have to measure every line in the DOM:
+    - longest_line: widest visible chord or lyric line, in characters
+    - line_count: number of rendered blocks (line pairs and section headers)
+    - row_count: number of rendered text rows (used to estimate sheet height)
+    - sections: [start, length] block ranges, each beginning at a section header
+      (or the top of the sheet); natural candidates for column breaks
+    """
+    longest_line = 0
+    row_count = 0
+    section_starts = [0] if lines else []
+
+    for index, (chord_line, lyric_line) in enumerate(lines):
+        chord_text = _HTML_TAG_REGEX.sub('', chord_line)
+        longest_line = max(longest_line, len(chord_text), len(lyric_line))
+
+        if lyric_line == '':
+            # Section header (rendered on a single row)
+            row_count += 1
+            if index > 0:
+                section_starts.append(index)
+        else:
+            row_count += (1 if chord_text else 0) + 1
+
+    section_ends = section_starts[1:] + [len(lines)]
+    sections = [[start, end - start] for start, end in zip(section_starts, section_ends)]
+
+    return {
+        'longest_line': longest_line,
+        'line_count': len(lines),
+        'row_count': row_count,
+        'sections': sections,
+    }
+
+
+@lru_cache(maxsize=65536)
+def normalize_text(text):
+    """
+    Normalize text for accent-insensitive comparison.
+    Removes diacritical marks and converts to lowercase.
+    """
+    return ''.join(
+        char for char in unicodedata.normalize('NFD', text)
+        if unicodedata.category(char) != 'Mn'
+    ).lower()
+
+
 def get_key_preference(key: str) -> str:
     """Returns 'sharp' or 'flat' based on key signature."""
     SHARP_KEYS = {'C', 'G', 'D', 'A', 'E', 'B', 'F#', 'C#'}
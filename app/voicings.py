@@ -0,0 +1,289 @@
+import json
+import os
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+
+import click
+
+from .parsing import parse_chord, NOTE_TO_PC, SHARP_NAMES
+
+# Splits the quality part returned by parse_chord, e.g. 'm7b5' -> ('m', '7', '', 'b5')
+_QUALITY_REGEX = re.compile(r'^(maj|min|m|sus|dim|aug)?(\d*)((?:add\d+)?)((?:[b#]\d+)*)$')
+_ALTERATION_REGEX = re.compile(r'([b#])(\d+)')
+
+# Semitone offset of each scale degree above the root
+_DEGREES = {2: 2, 4: 5, 5: 7, 6: 9, 9: 2, 11: 5, 13: 9}
+
+# Chord qualities precomputed for every root in the shipped table
+TABLE_QUALITIES = [
+    '', 'm', '5', '6', 'm6', '7', 'm7', 'maj7', '9', 'm9', 'maj9', 'add9', 'madd9',
+    '11', '13', 'sus2', 'sus4', 'dim', 'dim7', 'aug', 'm7b5', '7b9', '7#9',
+]
+
+TABLE_PATH = os.path.join(os.path.dirname(__file__), 'voicing_table.json')
+
+
+def _midi(note: str) -> int:
+    """MIDI number for a note like 'E2' or 'Bb3'."""
+    return NOTE_TO_PC[note[:-1]] + 12 * (int(note[-1]) + 1)
+
+
+@dataclass(frozen=True)
+class Instrument:
+    label: str
+    tuning: tuple[int, ...]     # MIDI numbers of the open strings, in string order
+    max_fret: int = 12
+    max_span: int = 3           # frets between the lowest and highest fretted note
+    max_fingers: int = 4        # a barre across the lowest fret counts as one
+    min_strings: int = 4        # sounding strings required
+    root_in_bass: bool = True   # false for re-entrant tunings
+    allow_mutes: bool = True    # muted strings are only allowed on the bass side
+
+
+INSTRUMENTS = {
+    'guitar': Instrument('Guitar', tuple(_midi(n) for n in ('E2', 'A2', 'D3', 'G3', 'B3', 'E4'))),
+    'guitar_drop_d': Instrument('Guitar (Drop D)', tuple(_midi(n) for n in ('D2', 'A2', 'D3', 'G3', 'B3', 'E4'))),
+    'ukulele': Instrument(
+        'Ukulele', tuple(_midi(n) for n in ('G4', 'C4', 'E4', 'A4')),
+        min_strings=4, root_in_bass=False, allow_mutes=False
+    ),
+    'baritone_ukulele': Instrument(
+        'Baritone Ukulele', tuple(_midi(n) for n in ('D3', 'G3', 'B3', 'E4')),
+        min_strings=4, allow_mutes=False
+    ),
+    'mandolin': Instrument(
+        'Mandolin', tuple(_midi(n) for n in ('G3', 'D4', 'A4', 'E5')),
+        min_strings=4, max_span=4, root_in_bass=False, allow_mutes=False
+    ),
+}
+
+
+def chord_tones(chord_text: str):
+    """
+    Resolve a chord into (root_pc, bass_pc, required, optional) pitch classes.
+    Optional tones (perfect fifth, inner extensions) may be left out of a voicing.
+    Returns None if the chord cannot be parsed.
+    """
+    root, quality, bass = parse_chord(chord_text)
+    match = _QUALITY_REGEX.match(quality) if root else None
+    if not match:
+        return None
+
+    kind, number, add, alterations = match.groups()
+    number = int(number) if number else 0
+    third, fifth = 4, 7
+    intervals = set()
+    optional = set()
+
+    if kind in ('m', 'min'):
+        third = 3
+    elif kind == 'dim':
+        third, fifth = 3, 6
+    elif kind == 'aug':
+        fifth = 8
+    elif kind == 'sus':
+        third = 2 if number == 2 else 5
+        number = 0 if number in (2, 4) else number
+
+    if number == 5 and not kind:
+        third = None  # power chord
+    elif number == 6:
+        intervals.add(9)
+    elif number in (7, 9, 11, 13):
+        if kind == 'dim' and number == 7:
+            seventh = 9
+        else:
+            seventh = 11 if kind == 'maj' else 10
+        intervals.add(seventh)
+        extensions = [d for d in (9, 11, 13) if d <= number]
+        for degree in extensions:
+            (intervals if degree == number else optional).add(_DEGREES[degree])
+
+    if add:
+        intervals.add(_DEGREES.get(int(add[3:]), 2))
+
+    for accidental, degree in _ALTERATION_REGEX.findall(alterations):
+        degree = int(degree)
+        base = _DEGREES.get(degree, 7)
+        shifted = (base + (1 if accidental == '#' else -1)) % 12
+        if degree == 5:
+            fifth = shifted
+        else:
+            optional.discard(base)
+            intervals.discard(base)
+            intervals.add(shifted)
+
+    intervals.add(0)
+    if third is not None:
+        intervals.add(third)
+    (optional if fifth == 7 else intervals).add(fifth)
+
+    root_pc = NOTE_TO_PC[root]
+    bass_pc = NOTE_TO_PC.get(re.sub(r'\d', '', bass), root_pc) if bass else root_pc
+    required = frozenset((root_pc + i) % 12 for i in intervals - optional) | {bass_pc}
+    optional_pcs = frozenset((root_pc + i) % 12 for i in optional) - required
+    return root_pc, bass_pc, required, optional_pcs
+
+
+def _fingers_needed(frets: list) -> int:
+    """Fretted notes, counting a playable barre on the lowest fret as one finger."""
+    fretted = [f for f in frets if f]
+    if not fretted:
+        return 0
+    low = min(fretted)
+    first = next(i for i, f in enumerate(frets) if f == low)
+    barre_ok = all(f is None or f >= low for f in frets[first:])
+    at_low = fretted.count(low)
+    return len(fretted) - at_low + 1 if barre_ok and at_low > 1 else len(fretted)
+
+
+def _score(frets: list, optional_missing: int) -> float:
+    """Lower is easier: low positions, few fingers, few mutes, complete chords."""
+    fretted = [f for f in frets if f]
+    low = min(fretted) if fretted else 0
+    high = max(fretted) if fretted else 0
+    muted = sum(1 for f in frets if f is None)
+    return low + 0.3 * high + 0.5 * _fingers_needed(frets) + 0.8 * muted + 0.5 * optional_missing
+
+
+def search_voicings(tones, instrument: Instrument, limit: int = 3) -> list[tuple]:
+    """
+    Depth-first search over fret choices per string (muted, open, or a fret
+    sounding a chord tone), pruned by fret span, finger count and whether the
+    remaining strings can still supply the missing required tones.
+    """
+    root_pc, bass_pc, required, optional = tones
+    allowed = required | optional
+    strings = instrument.tuning
+    count = len(strings)
+    results = []
+
+    options = []
+    for open_note in strings:
+        choices = [f for f in range(instrument.max_fret + 1) if (open_note + f) % 12 in allowed]
+        options.append(choices)
+
+    def dfs(index, frets, low, high, covered, prefix_muted):
+        remaining = count - index
+        if len(required - covered) > remaining:
+            return
+
+        if index == count:
+            sounding = [(strings[i] + f) for i, f in enumerate(frets) if f is not None]
+            if len(sounding) < instrument.min_strings or not required <= covered:
+                return
+            if instrument.root_in_bass and min(sounding) % 12 != bass_pc:
+                return
+            if _fingers_needed(frets) > instrument.max_fingers:
+                return
+            results.append((_score(frets, len(optional - covered)), tuple(frets)))
+            return
+
+        # Muting is only allowed on a run of bass-side strings
+        if instrument.allow_mutes and prefix_muted and remaining > instrument.min_strings:
+            dfs(index + 1, frets + [None], low, high, covered, True)
+
+        for fret in options[index]:
+            note = strings[index] + fret
+            if instrument.root_in_bass and prefix_muted and note % 12 != bass_pc:
+                continue  # first sounding string must carry the bass
+            new_low, new_high = low, high
+            if fret:
+                new_low = min(low, fret)
+                new_high = max(high, fret)
+                if new_high - new_low > instrument.max_span:
+                    continue
+                # Notes above the lowest fret need a finger each (the lowest can be barred)
+                upper = sum(1 for f in frets if f and f != new_low) + (fret != new_low)
+                if upper > instrument.max_fingers - 1:
+                    continue
+            dfs(index + 1, frets + [fret], new_low, new_high, covered | {note % 12}, False)
+
+    dfs(0, [], 99, 0, frozenset(), True)
+    results.sort(key=lambda item: item[0])
+
+    unique = []
+    for _, frets in results:
+        if frets not in unique:
+            unique.append(frets)
+        if len(unique) == limit:
+            break
+    return unique
+
+
+def format_frets(frets: tuple) -> str:
+    """Render frets as 'x32010', or space-separated once any fret reaches 10."""
+    parts = ['x' if f is None else str(f) for f in frets]
+    return ' '.join(parts) if any(len(p) > 1 for p in parts) else ''.join(parts)
+
+
+def canonical_chord_name(chord_text: str, steps: int = 0) -> str:
+    """
+    Spell a chord with sharp roots and a normalized quality, optionally
+    transposed, e.g. '[Bbmin7/Db]' -> 'A#m7/C#'. Returns '' if unparseable.
+    """
+    root, quality, bass = parse_chord(chord_text)
+    if not root:
+        return ''
+    if quality.startswith('min'):
+        quality = 'm' + quality[3:]
+    name = SHARP_NAMES[(NOTE_TO_PC[root] + steps) % 12] + quality
+    bass_note = re.sub(r'\d', '', bass)
+    if bass_note in NOTE_TO_PC:
+        name += '/' + SHARP_NAMES[(NOTE_TO_PC[bass_note] + steps) % 12]
+    return name
+
+
+@lru_cache(maxsize=4096)
+def generate_voicings(chord_name: str, instrument: str = 'guitar', limit: int = 3) -> tuple[str, ...]:
+    """Search fingerings for a chord on an instrument; memoized per process."""
+    tones = chord_tones(chord_name)
+    if tones is None:
+        return ()
+    return tuple(format_frets(f) for f in search_voicings(tones, INSTRUMENTS[instrument], limit))
+
+
+@lru_cache(maxsize=1)
+def load_voicing_table() -> dict:
+    """The precomputed table shipped with the app (empty if it has not been built)."""
+    try:
+        with open(TABLE_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def get_voicings(chord_text: str, instrument: str = 'guitar', steps: int = 0) -> list[str]:
+    """Voicings for a chord: from the precomputed table, else generated on demand."""
+    name = canonical_chord_name(chord_text, steps)
+    if not name:
+        return []
+    table = load_voicing_table().get(instrument, {})
+    if name in table:
+        return table[name]
+    return list(generate_voicings(name, instrument))
+
+
+def build_voicing_table(limit: int = 3) -> dict:
+    """Precompute voicings for every root x TABLE_QUALITIES on every instrument."""
+    return {
+        instrument: {
+            name: list(voicings)
+            for name in (root + quality for root in SHARP_NAMES for quality in TABLE_QUALITIES)
+            if (voicings := generate_voicings(name, instrument, limit))
+        }
+        for instrument in INSTRUMENTS
+    }
+
+
+@click.command('build-voicings')
+@click.option('--limit', default=3, show_default=True, help='Voicings kept per chord.')
+def build_voicings_command(limit):
+    """Precompute the chord voicing table shipped with the app."""
+    table = build_voicing_table(limit)
+    with open(TABLE_PATH, 'w', encoding='utf-8') as f:
+        json.dump(table, f, separators=(',', ':'), sort_keys=True)
+    load_voicing_table.cache_clear()
+    total = sum(len(chords) for chords in table.values())
+    click.echo(f"Wrote {total} chord entries for {len(table)} instruments to {TABLE_PATH}")
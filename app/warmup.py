@@ -0,0 +1,48 @@
+from . import db
+from .models import Song
+from .routes.main import get_song_filepath
+from .utils import normalize_text
+
+
+def warm_up(app) -> dict:
+    """
+    Load hot data into this process before it accepts traffic.
+
+    Meant to run once in the server master before workers are forked, so the
+    warmed caches are shared copy-on-write: the song list (and SQLite pages),
+    the normalized title/artist search keys, the fuzzy search index, and the
+    prepared sheets of the WARMUP_SHEET_COUNT most viewed songs.
+    """
+    stats = {'songs': 0, 'search_keys': 0, 'search_terms': 0, 'sheets': 0}
+
+    with app.app_context():
+        songs = Song.query.order_by(Song.view_count.desc(), Song.id).all()
+        stats['songs'] = len(songs)
+
+        for song in songs:
+            normalize_text(song.title)
+            stats['search_keys'] += 1
+            if song.artist:
+                normalize_text(song.artist)
+                stats['search_keys'] += 1
+
+        app.catalog_search.build(songs)
+        stats['search_terms'] = app.catalog_search.index.vocabulary_size
+
+        for song in songs[:app.config['WARMUP_SHEET_COUNT']]:
+            try:
+                app.sheet_cache.get(song.id, get_song_filepath(song.id))
+                stats['sheets'] += 1
+            except FileNotFoundError:
+                continue
+
+        # Never hand pooled connections opened here to forked workers
+        db.session.remove()
+        db.engine.dispose()
+
+    app.warmed_up = True
+    app.logger.info(
+        "Warmup complete: %(songs)d songs, %(search_keys)d search keys, "
+        "%(search_terms)d search terms, %(sheets)d sheets", stats
+    )
+    return stats
@@ -0,0 +1,171 @@
+"""
+Reader throughput and latency while a writer is active, for each database
+engine profile.
+
+Runs N reader processes issuing view_sheet-style primary key lookups and one
+writer process running long write transactions (a batch of inserts plus a
+view-count style UPDATE over many rows, held open for --write-hold seconds
+as a rekey or import batch would), against a fresh SQLite file. Each process
+has its own engine, as gunicorn/serve.py workers do, so readers contend with
+the writer for SQLite's file locks rather than the GIL. Runs once with the
+stock SQLAlchemy engine ('default': rollback journal, where a writer that
+spills or commits takes an exclusive lock and stalls every reader) and once
+with the tuned engine ('production': WAL, busy_timeout, pragmas, pool sizing).
+
+Reports reads/s, read latency percentiles and the number of reads and write
+transactions that failed with "database is locked".
+
+Usage:
+    python benchmarks/db_concurrency.py --readers 4 --seconds 10
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import text  # noqa: E402
+from sqlalchemy.exc import OperationalError  # noqa: E402
+
+from app import create_app, db  # noqa: E402
+from app.models import Song  # noqa: E402
+
+
+def make_app(db_path, profile, readers):
+    return create_app({
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}',
+        'DB_ENGINE_PROFILE': profile,
+        'DB_POOL_SIZE': readers + 2,
+    })
+
+
+def seed(app, count):
+    with app.app_context():
+        db.create_all()
+        db.session.add_all(
+            Song(title=f"Song {i}", artist=f"Artist {i % 97}", song_key="C major")
+            for i in range(count)
+        )
+        db.session.commit()
+        db.engine.dispose()
+
+
+def reader(db_path, profile, readers, seed_count, start_at, seconds, results):
+    app = make_app(db_path, profile, readers)
+    latencies, errors = [], 0
+    with app.app_context():
+        time.sleep(max(0.0, start_at - time.time()))
+        deadline = start_at + seconds
+        while time.time() < deadline:
+            started = time.perf_counter()
+            try:
+                db.session.get(Song, random.randint(1, seed_count))
+                latencies.append(time.perf_counter() - started)
+            except OperationalError:
+                errors += 1
+            finally:
+                db.session.remove()
+        db.engine.dispose()
+    results.put(('reader', latencies, errors))
+
+
+def writer(db_path, profile, readers, seed_count, start_at, seconds, write_batch, write_rows, write_hold,
+           results):
+    app = make_app(db_path, profile, readers)
+    transactions, errors, n = 0, 0, 0
+    with app.app_context():
+        time.sleep(max(0.0, start_at - time.time()))
+        deadline = start_at + seconds
+        while time.time() < deadline:
+            try:
+                for _ in range(write_batch):
+                    db.session.add(Song(title=f"New {n}", artist="Writer", song_key="G major"))
+                    n += 1
+                first = random.randint(1, max(1, seed_count - write_rows))
+                db.session.execute(
+                    text("UPDATE songs SET view_count = view_count + 1 WHERE id BETWEEN :first AND :last"),
+                    {'first': first, 'last': first + write_rows}
+                )
+                time.sleep(write_hold)
+                db.session.commit()
+                transactions += 1
+            except OperationalError:
+                db.session.rollback()
+                errors += 1
+        db.session.remove()
+        db.engine.dispose()
+    results.put(('writer', transactions, errors))
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+
+
+def run_profile(profile, readers, seconds, seed_count, write_batch, write_rows, write_hold):
+    tmp_dir = tempfile.mkdtemp(prefix='chordstrikers-bench-')
+    db_path = os.path.join(tmp_dir, 'bench.db')
+    seed(make_app(db_path, profile, readers), seed_count)
+
+    results = multiprocessing.Queue()
+    start_at = time.time() + 2.0  # let every process build its app first
+    common = (db_path, profile, readers, seed_count, start_at, seconds)
+    processes = [multiprocessing.Process(target=reader, args=(*common, results)) for _ in range(readers)]
+    processes.append(multiprocessing.Process(
+        target=writer, args=(*common, write_batch, write_rows, write_hold, results)
+    ))
+    for process in processes:
+        process.start()
+
+    latencies, read_errors, transactions, write_errors = [], 0, 0, 0
+    for _ in processes:
+        kind, first, errors = results.get()
+        if kind == 'reader':
+            latencies.extend(first)
+            read_errors += errors
+        else:
+            transactions, write_errors = first, errors
+    for process in processes:
+        process.join()
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    latencies.sort()
+    return {
+        'profile': profile,
+        'reads_per_sec': round(len(latencies) / seconds, 1),
+        'read_p50_ms': round(statistics.median(latencies) * 1000, 2) if latencies else None,
+        'read_p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+        'read_max_ms': round(latencies[-1] * 1000, 2) if latencies else None,
+        'read_errors': read_errors,
+        'write_transactions_per_sec': round(transactions / seconds, 1),
+        'write_errors': write_errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--readers', type=int, default=4, help='reader processes')
+    parser.add_argument('--seconds', type=float, default=10.0)
+    parser.add_argument('--seed', type=int, default=200000, help='songs to seed before measuring')
+    parser.add_argument('--write-batch', type=int, default=20, help='rows inserted per write transaction')
+    parser.add_argument('--write-rows', type=int, default=100000, help='rows updated per write transaction')
+    parser.add_argument('--write-hold', type=float, default=1.0,
+                        help='seconds each write transaction stays open before committing')
+    args = parser.parse_args()
+
+    results = [
+        run_profile(profile, args.readers, args.seconds, args.seed,
+                    args.write_batch, args.write_rows, args.write_hold)
+        for profile in ('default', 'production')
+    ]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
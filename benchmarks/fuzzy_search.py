@@ -0,0 +1,109 @@
+"""
+Fuzzy search latency versus catalog size.
+
+Builds a FuzzySearchIndex over synthetic catalogs (titles and artists drawn
+from a generated vocabulary) and times queries with exact words, prefixes and
+one or two typos. Reports build time and p50/p95/p99 query latency per size.
+
+Usage:
+    python benchmarks/fuzzy_search.py --sizes 1000 10000 100000 --queries 500
+"""
+import argparse
+import json
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.search import FuzzySearchIndex  # noqa: E402
+
+
+def make_vocabulary(rng, size):
+    words = set()
+    while len(words) < size:
+        words.add(''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 10))))
+    return sorted(words)
+
+
+def typo(rng, word):
+    if len(word) < 4:
+        return word
+    i = rng.randrange(len(word) - 1)
+    edit = rng.choice(('swap', 'drop', 'replace'))
+    if edit == 'swap':
+        return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+    if edit == 'drop':
+        return word[:i] + word[i + 1:]
+    return word[:i] + rng.choice(string.ascii_lowercase) + word[i + 1:]
+
+
+def make_queries(rng, catalog, count):
+    queries = []
+    for _ in range(count):
+        title, artist = rng.choice(catalog)
+        words = title.split()
+        kind = rng.choice(('exact', 'prefix', 'typo', 'title+artist'))
+        if kind == 'exact':
+            queries.append(rng.choice(words))
+        elif kind == 'prefix':
+            queries.append(rng.choice(words)[:3])
+        elif kind == 'typo':
+            queries.append(' '.join(typo(rng, w) for w in words[:2]))
+        else:
+            queries.append(f"{typo(rng, words[0])} {artist.split()[0]}")
+    return queries
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def run(size, query_count, seed):
+    rng = random.Random(seed)
+    vocabulary = make_vocabulary(rng, max(2000, size // 2))
+    catalog = [
+        (
+            ' '.join(rng.choice(vocabulary) for _ in range(rng.randint(1, 4))).title(),
+            ' '.join(rng.choice(vocabulary) for _ in range(rng.randint(1, 2))).title(),
+        )
+        for _ in range(size)
+    ]
+
+    started = time.perf_counter()
+    index = FuzzySearchIndex()
+    for song_id, (title, artist) in enumerate(catalog, start=1):
+        index.add(song_id, title, artist)
+    build_ms = (time.perf_counter() - started) * 1000
+
+    latencies = []
+    for query in make_queries(rng, catalog, query_count):
+        started = time.perf_counter()
+        index.search(query, limit=20)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    return {
+        'songs': size,
+        'vocabulary': index.vocabulary_size,
+        'build_ms': round(build_ms, 1),
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p95_ms': round(percentile(latencies, 95), 3),
+        'p99_ms': round(percentile(latencies, 99), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--queries', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    print(json.dumps([run(size, args.queries, args.seed) for size in args.sizes], indent=2))
+
+
+if __name__ == '__main__':
+    main()
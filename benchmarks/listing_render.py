@@ -0,0 +1,108 @@
+"""
+Explore listing response time versus catalog size, with and without the
+song card fragment cache.
+
+Seeds a synthetic catalog into a temporary database and times full
+/explore requests (query, sort and render) through the test client:
+with the cache disabled (every card rendered, as before the cache), with
+a cold cache, with a warm cache, and with a warm cache after 1% of songs
+were edited (their row versions bumped). Prints the medians and the
+fragment cache hit rate as JSON.
+
+Usage:
+    python benchmarks/listing_render.py --sizes 500 2000 10000 --repeat 5
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app, db  # noqa: E402
+from app.cache import FragmentCache  # noqa: E402
+from app.models import Song  # noqa: E402
+from load_test import KEYS, make_title  # noqa: E402
+
+
+def timed_get(client, url):
+    started = time.perf_counter()
+    response = client.get(url)
+    elapsed = (time.perf_counter() - started) * 1000
+    assert response.status_code == 200
+    return elapsed
+
+
+def median_ms(client, url, repeat):
+    return round(statistics.median(timed_get(client, url) for _ in range(repeat)), 2)
+
+
+def run(size, repeat, seed):
+    rng = random.Random(seed)
+    tmp_dir = tempfile.mkdtemp(prefix='chordstrikers-listing-')
+    try:
+        app = create_app({
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(tmp_dir, 'listing.db')}",
+            'SONG_DATA_DIR': tmp_dir,
+            'FRAGMENT_CACHE_SIZE': size * 2,
+        })
+        with app.app_context():
+            db.create_all()
+            db.session.add_all(
+                Song(title=make_title(rng), artist=make_title(rng), song_key=rng.choice(KEYS),
+                     image_url=f"https://i.scdn.co/image/{n}" if rng.random() < 0.7 else None)
+                for n in range(size)
+            )
+            db.session.commit()
+
+            client = app.test_client()
+            url = '/explore'
+
+            cached_cache = app.fragment_cache
+            app.fragment_cache = FragmentCache(max_entries=0)  # every lookup renders
+            uncached = median_ms(client, url, repeat)
+
+            app.fragment_cache = cached_cache
+            cold = round(timed_get(client, url), 2)
+            warm = median_ms(client, url, repeat)
+
+            edited = rng.sample(range(1, size + 1), max(1, size // 100))
+            for song in Song.query.filter(Song.id.in_(edited)):
+                song.bump_version()
+            db.session.commit()
+            after_edits = round(timed_get(client, url), 2)
+
+            stats = app.fragment_cache.stats()
+            db.session.remove()
+            db.engine.dispose()
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    return {
+        'songs': size,
+        'uncached_ms': uncached,
+        'cold_ms': cold,
+        'warm_ms': warm,
+        'after_1pct_edits_ms': after_edits,
+        'speedup': round(uncached / warm, 1) if warm else None,
+        'fragment_cache': stats,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[500, 2000, 10000])
+    parser.add_argument('--repeat', type=int, default=5, help='requests per timed median')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    print(json.dumps([run(size, args.repeat, args.seed) for size in args.sizes], indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,313 @@
+"""
+Load test: how many concurrent users a server configuration can handle.
+
+Seeds a synthetic catalog into a temporary database and SONG_DATA_DIR, starts
+the app in a separate process (waitress, or the pre-forked gunicorn setup
+from serve.py) on a free local port, and drives it with a weighted traffic
+mix from concurrent keep-alive clients. The Spotify client is replaced by a
+stub with configurable latency, so /create and /edit_song never leave the
+machine. Prints throughput, latency percentiles and error rates per route
+as JSON.
+
+Usage:
+    python benchmarks/load_test.py --songs 2000 --concurrency 16 --seconds 20
+    python benchmarks/load_test.py --server gunicorn --workers 4 --threads 4 \\
+        --mix view_sheet=60,explore=25,suggest=5,create=4,edit_song=6
+"""
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import socket
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlencode
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app, db  # noqa: E402
+from app.models import Song  # noqa: E402
+from app.warmup import warm_up  # noqa: E402
+
+DEFAULT_MIX = 'view_sheet=70,explore=20,create=4,edit_song=6'
+
+WORDS = (
+    'love night river heart fire summer rain blue road home light dream gold '
+    'shadow morning wind stone ocean song city wild time sky moon star dance '
+    'winter lonely highway sweet fallen broken angel little train'
+).split()
+KEYS = ['C', 'G', 'D', 'A', 'E', 'F', 'Bb', 'Eb', 'Am', 'Em', 'Dm', 'F#m', 'C#m', 'Bm']
+CHORDS = ['C', 'G', 'Am', 'F', 'D', 'Em', 'A7', 'Bm', 'E', 'Dsus4', 'Cmaj7', 'G/B']
+SECTIONS = ['Verse 1:', 'Chorus:', 'Verse 2:', 'Bridge:', 'Chorus:']
+
+
+class StubSpotify:
+    """Stands in for spotipy.Spotify: canned search results after a fixed delay."""
+
+    def __init__(self, latency_ms: float):
+        self.latency = latency_ms / 1000
+
+    def search(self, q, type='track', limit=1):
+        time.sleep(self.latency)
+        image = {'url': f"https://i.scdn.co/image/stub-{abs(hash(q)) % 10**8}"}
+        if type == 'artist':
+            return {'artists': {'items': [{'images': [image]}]}}
+        return {'tracks': {'items': [{'album': {'images': [image]}, 'artists': []}]}}
+
+    def artist(self, artist_id):
+        time.sleep(self.latency)
+        return {'images': []}
+
+
+def make_title(rng):
+    return ' '.join(rng.choice(WORDS) for _ in range(rng.randint(1, 4))).title()
+
+
+def make_sheet(rng, sections=4, lines=4):
+    out = []
+    for section in SECTIONS[:sections]:
+        out.append(section)
+        for _ in range(lines):
+            words = [rng.choice(WORDS) for _ in range(rng.randint(4, 8))]
+            for i in sorted(rng.sample(range(len(words)), 2)):
+                words[i] = f"[{rng.choice(CHORDS)}]{words[i]}"
+            out.append(' '.join(words))
+        out.append('')
+    return '\n'.join(out)
+
+
+def seed_catalog(app, count, rng):
+    data_dir = app.config['SONG_DATA_DIR']
+    with app.app_context():
+        db.create_all()
+        songs = [
+            Song(title=make_title(rng), artist=make_title(rng) if rng.random() < 0.9 else None,
+                 song_key=rng.choice(KEYS))
+            for _ in range(count)
+        ]
+        db.session.add_all(songs)
+        db.session.commit()
+        for song in songs:
+            with open(os.path.join(data_dir, f"{song.id}.txt"), 'w', encoding='utf-8') as f:
+                f.write(make_sheet(rng))
+        return [song.id for song in songs]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def run_server(app, server, port, threads):
+    """Target of the server process (forked, so it inherits the stub client)."""
+    warm_up(app)
+    if server == 'gunicorn':
+        from serve import serve_gunicorn
+        serve_gunicorn(app)
+    else:
+        from waitress import serve
+        serve(app, host='127.0.0.1', port=port, threads=threads, _quiet=True)
+
+
+def wait_for_server(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            conn.request('GET', '/readyz')
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError(f"Server on port {port} did not become ready")
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        if name not in REQUESTS:
+            raise SystemExit(f"Unknown route '{name}' (choose from {', '.join(REQUESTS)})")
+        mix[name] = float(weight)
+    return mix
+
+
+# Each builder returns (method, path, form body or None)
+def view_sheet_request(rng, song_ids):
+    return 'GET', f"/view_sheet/{rng.choice(song_ids)}", None
+
+
+def explore_request(rng, song_ids):
+    params = {}
+    roll = rng.random()
+    if roll < 0.6:
+        word = rng.choice(WORDS)
+        if rng.random() < 0.3 and len(word) > 4:
+            i = rng.randrange(len(word) - 1)
+            word = word[:i] + word[i + 1] + word[i] + word[i + 2:]  # typo
+        params['query'] = word
+    if roll > 0.4:
+        params['key'] = rng.choice(KEYS)
+    return 'GET', '/explore' + (f"?{urlencode(params)}" if params else ''), None
+
+
+def suggest_request(rng, song_ids):
+    word = rng.choice(WORDS)
+    return 'GET', f"/api/suggest?{urlencode({'q': word[:rng.randint(1, 4)]})}", None
+
+
+def create_request(rng, song_ids):
+    return 'POST', '/create', {
+        'title': make_title(rng), 'artist': make_title(rng),
+        'song_key': rng.choice(KEYS), 'sheet_content': make_sheet(rng),
+    }
+
+
+def edit_song_request(rng, song_ids):
+    song_id = rng.choice(song_ids)
+    return 'POST', f"/edit_song/{song_id}", {
+        'title': make_title(rng), 'artist': make_title(rng),
+        'song_key': rng.choice(KEYS), 'sheet_content': make_sheet(rng),
+    }
+
+
+REQUESTS = {
+    'view_sheet': view_sheet_request,
+    'explore': explore_request,
+    'suggest': suggest_request,
+    'create': create_request,
+    'edit_song': edit_song_request,
+}
+
+
+def client(port, mix, song_ids, stop, results, seed):
+    rng = random.Random(seed)
+    names, weights = zip(*mix.items())
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    while not stop.is_set():
+        name = rng.choices(names, weights)[0]
+        method, path, form = REQUESTS[name](rng, song_ids)
+        body = urlencode(form) if form else None
+        headers = {'Content-Type': 'application/x-www-form-urlencoded'} if form else {}
+        started = time.perf_counter()
+        try:
+            conn.request(method, path, body=body, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            ok = response.status < 400
+        except (OSError, http.client.HTTPException):
+            ok = False
+            conn.close()
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        results[name].append(((time.perf_counter() - started) * 1000, ok))
+    conn.close()
+
+
+def percentile(ordered, pct):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))] if ordered else None
+
+
+def summarize(samples, seconds):
+    latencies = sorted(ms for ms, _ in samples)
+    errors = sum(1 for _, ok in samples if not ok)
+    return {
+        'requests': len(samples),
+        'throughput_rps': round(len(samples) / seconds, 1),
+        'errors': errors,
+        'error_rate': round(errors / len(samples), 4) if samples else 0.0,
+        'p50_ms': round(percentile(latencies, 50), 2) if latencies else None,
+        'p95_ms': round(percentile(latencies, 95), 2) if latencies else None,
+        'p99_ms': round(percentile(latencies, 99), 2) if latencies else None,
+        'max_ms': round(latencies[-1], 2) if latencies else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--songs', type=int, default=2000, help='songs in the synthetic catalog')
+    parser.add_argument('--concurrency', type=int, default=16, help='concurrent client connections')
+    parser.add_argument('--seconds', type=float, default=15.0, help='measured duration')
+    parser.add_argument('--warmup-seconds', type=float, default=2.0, help='unmeasured ramp-up')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help=f"route=weight list (default: {DEFAULT_MIX})")
+    parser.add_argument('--server', choices=('waitress', 'gunicorn'), default='waitress')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn worker processes')
+    parser.add_argument('--threads', type=int, default=8, help='threads per server process')
+    parser.add_argument('--spotify-latency-ms', type=float, default=50.0)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    mix = parse_mix(args.mix)
+
+    if sys.platform == 'win32':
+        raise SystemExit("The load test forks the seeded app into the server process; run it on Linux or macOS")
+
+    tmp_dir = tempfile.mkdtemp(prefix='chordstrikers-load-')
+    port = free_port()
+    data_dir = os.path.join(tmp_dir, 'data')
+    os.makedirs(data_dir)
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(tmp_dir, 'load.db')}",
+        'SONG_DATA_DIR': data_dir,
+        'ARTWORK_CACHE_DIR': os.path.join(tmp_dir, 'artwork'),
+        'SERVE_HOST': '127.0.0.1',
+        'SERVE_PORT': port,
+        'SERVE_WORKERS': args.workers,
+        'SERVE_THREADS': args.threads,
+    })
+    app.extensions['spotify'] = StubSpotify(args.spotify_latency_ms)
+    song_ids = seed_catalog(app, args.songs, random.Random(args.seed))
+    with app.app_context():
+        db.engine.dispose()
+
+    context = multiprocessing.get_context('fork')
+    server = context.Process(target=run_server, args=(app, args.server, port, args.threads), daemon=True)
+    server.start()
+    try:
+        wait_for_server(port)
+
+        stop = threading.Event()
+        results = {name: [] for name in mix}
+        clients = [
+            threading.Thread(target=client, args=(port, mix, song_ids, stop, results, args.seed + i))
+            for i in range(args.concurrency)
+        ]
+        for t in clients:
+            t.start()
+        time.sleep(args.warmup_seconds)
+        for samples in results.values():
+            samples.clear()  # list.clear is atomic; appends after it are measured
+        time.sleep(args.seconds)
+        stop.set()
+        for t in clients:
+            t.join()
+    finally:
+        server.terminate()
+        server.join(10)
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    all_samples = [sample for samples in results.values() for sample in samples]
+    report = {
+        'config': {
+            'server': args.server,
+            'workers': args.workers if args.server == 'gunicorn' else 1,
+            'threads': args.threads,
+            'concurrency': args.concurrency,
+            'seconds': args.seconds,
+            'songs': args.songs,
+            'mix': mix,
+            'spotify_latency_ms': args.spotify_latency_ms,
+        },
+        'total': summarize(all_samples, args.seconds),
+        'routes': {name: summarize(samples, args.seconds) for name, samples in results.items()},
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
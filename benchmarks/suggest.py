@@ -0,0 +1,97 @@
+"""
+Autocomplete latency versus catalog size.
+
+Builds a SuggestIndex over the same synthetic catalogs as fuzzy_search.py
+and times prefix lookups of 1-6 characters: the first lookup of each prefix,
+a repeated lookup, and lookups interleaved with incremental add + remove
+(whose own cost is reported too).
+
+Usage:
+    python benchmarks/suggest.py --sizes 1000 10000 100000 --queries 2000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.search import SuggestIndex  # noqa: E402
+from fuzzy_search import make_vocabulary, percentile  # noqa: E402
+
+
+def summarize(latencies):
+    return {
+        'p50_ms': round(percentile(latencies, 50), 4),
+        'p99_ms': round(percentile(latencies, 99), 4),
+    }
+
+
+def run(size, query_count, seed):
+    rng = random.Random(seed)
+    vocabulary = make_vocabulary(rng, max(2000, size // 2))
+    catalog = [
+        (
+            ' '.join(rng.choice(vocabulary) for _ in range(rng.randint(1, 4))).title(),
+            ' '.join(rng.choice(vocabulary) for _ in range(rng.randint(1, 2))).title(),
+        )
+        for _ in range(size)
+    ]
+
+    index = SuggestIndex()
+    index.set_popularity({song_id: rng.randint(0, 1000) for song_id in range(1, size + 1)})
+    started = time.perf_counter()
+    index.load((song_id, title, artist) for song_id, (title, artist) in enumerate(catalog, start=1))
+    build_ms = (time.perf_counter() - started) * 1000
+
+    prefixes = []
+    for _ in range(query_count):
+        word = rng.choice(rng.choice(catalog)[rng.randint(0, 1)].split()).lower()
+        prefixes.append(word[:rng.randint(1, min(6, len(word)))])
+
+    first, repeat = [], []
+    for prefix in prefixes:
+        started = time.perf_counter()
+        index.suggest(prefix)
+        first.append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        index.suggest(prefix)
+        repeat.append((time.perf_counter() - started) * 1000)
+
+    updates, after_update = [], []
+    for i, prefix in enumerate(prefixes[:500]):
+        title, artist = rng.choice(catalog)
+        started = time.perf_counter()
+        index.add(size + 1 + i, title, artist)
+        index.remove(size + 1 + i)
+        updates.append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        index.suggest(prefix)
+        after_update.append((time.perf_counter() - started) * 1000)
+
+    return {
+        'songs': size,
+        'build_ms': round(build_ms, 1),
+        'first_lookup': summarize(first),
+        'repeat_lookup': summarize(repeat),
+        'lookup_after_update': summarize(after_update),
+        'add_remove': summarize(updates),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--queries', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    print(json.dumps([run(size, args.queries, args.seed) for size in args.sizes], indent=2))
+
+
+if __name__ == '__main__':
+    main()
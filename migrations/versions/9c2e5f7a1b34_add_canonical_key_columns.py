@@ -0,0 +1,55 @@
+"""Add canonical key columns (tonic pitch class, mode) to songs
+
+Revision ID: 9c2e5f7a1b34
+Revises: 14637d76aaff
+Create Date: 2026-10-19 09:12:41.518204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.parsing import parse_key
+
+
+# revision identifiers, used by Alembic.
+revision = '9c2e5f7a1b34'
+down_revision = '14637d76aaff'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('songs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('key_tonic', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('key_mode', sa.Integer(), nullable=True))
+        batch_op.create_index('ix_songs_key_tonic_mode', ['key_tonic', 'key_mode'], unique=False)
+
+    # Backfill existing rows from the free-text song_key
+    conn = op.get_bind()
+    songs = sa.table(
+        'songs',
+        sa.column('id', sa.Integer),
+        sa.column('song_key', sa.String),
+        sa.column('key_tonic', sa.Integer),
+        sa.column('key_mode', sa.Integer),
+    )
+    updates = []
+    for song_id, song_key in conn.execute(sa.select(songs.c.id, songs.c.song_key)):
+        parsed = parse_key(song_key)
+        if parsed:
+            updates.append({'song_id': song_id, 'tonic': parsed[0], 'mode': parsed[1]})
+
+    if updates:
+        conn.execute(
+            songs.update()
+            .where(songs.c.id == sa.bindparam('song_id'))
+            .values(key_tonic=sa.bindparam('tonic'), key_mode=sa.bindparam('mode')),
+            updates
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('songs', schema=None) as batch_op:
+        batch_op.drop_index('ix_songs_key_tonic_mode')
+        batch_op.drop_column('key_mode')
+        batch_op.drop_column('key_tonic')
@@ -0,0 +1,32 @@
+"""Add view_count and trending_score to songs
+
+Revision ID: b71d4e0c92a5
+Revises: 9c2e5f7a1b34
+Create Date: 2026-10-19 14:03:27.902114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b71d4e0c92a5'
+down_revision = '9c2e5f7a1b34'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('songs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('view_count', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('trending_score', sa.Float(), nullable=True))
+        batch_op.create_index('ix_songs_view_count', ['view_count'], unique=False)
+        batch_op.create_index('ix_songs_trending_score', ['trending_score'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('songs', schema=None) as batch_op:
+        batch_op.drop_index('ix_songs_trending_score')
+        batch_op.drop_index('ix_songs_view_count')
+        batch_op.drop_column('trending_score')
+        batch_op.drop_column('view_count')
@@ -0,0 +1,26 @@
+"""Add row version to songs
+
+Revision ID: d4a8c31f6e07
+Revises: b71d4e0c92a5
+Create Date: 2026-10-19 16:41:09.337820
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4a8c31f6e07'
+down_revision = 'b71d4e0c92a5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('songs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+
+
+def downgrade():
+    with op.batch_alter_table('songs', schema=None) as batch_op:
+        batch_op.drop_column('version')
@@ -1,10 +1,7 @@
 from app import create_app
 import os
-from dotenv import load_dotenv
-
-# Load environment variables from .env file
-load_dotenv()
 
+# Environment variables from .env are loaded once, in app/config.py
 app = create_app()
 app.secret_key = os.environ.get('SECRET_KEY', 'fallback-dev-key')
 
@@ -0,0 +1,93 @@
+"""
+Production entry point.
+
+Creates the app once, warms its caches, then forks SERVE_WORKERS gunicorn
+workers from the warmed master so imported modules and caches are shared
+copy-on-write. All settings come from app.config.Config (SERVE_* keys).
+
+    python serve.py
+
+Signals sent to the master process:
+    HUP   gracefully replace all workers (re-forked from the warmed master)
+    USR2  start a new master with fresh code; then TERM the old master
+    TERM  graceful shutdown, waiting up to SERVE_GRACEFUL_TIMEOUT
+
+On platforms without fork (Windows) it falls back to a single waitress process.
+"""
+from app import create_app, db
+from app.popularity import flush_view_counts, start_view_flusher
+from app.warmup import warm_up
+
+
+def build_app():
+    app = create_app()
+    warm_up(app)
+    return app
+
+
+def _post_fork(server, worker):
+    app = server.app.application
+    # Connections must never be shared across processes; drop any inherited ones
+    with app.app_context():
+        db.engine.dispose(close=False)
+    worker.view_flusher = start_view_flusher(app)
+
+
+def _worker_exit(server, worker):
+    # Don't lose view counts still buffered in the exiting worker
+    stop = getattr(worker, 'view_flusher', None)
+    if stop is not None:
+        stop.set()
+    flush_view_counts(server.app.application)
+
+
+def serve_gunicorn(app):
+    from gunicorn.app.base import BaseApplication
+
+    class ChordStrikersServer(BaseApplication):
+        def __init__(self, application, options):
+            self.application = application
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return self.application
+
+    config = app.config
+    options = {
+        'bind': f"{config['SERVE_HOST']}:{config['SERVE_PORT']}",
+        'workers': config['SERVE_WORKERS'],
+        'threads': config['SERVE_THREADS'],
+        'worker_class': 'gthread',
+        'timeout': config['SERVE_TIMEOUT'],
+        'graceful_timeout': config['SERVE_GRACEFUL_TIMEOUT'],
+        'preload_app': True,
+        'post_fork': _post_fork,
+        'worker_exit': _worker_exit,
+    }
+    ChordStrikersServer(app, options).run()
+
+
+def serve_waitress(app):
+    from waitress import serve
+
+    config = app.config
+    stop_flusher = start_view_flusher(app)
+    try:
+        serve(app, host=config['SERVE_HOST'], port=config['SERVE_PORT'], threads=config['SERVE_THREADS'])
+    finally:
+        stop_flusher.set()
+        flush_view_counts(app)
+
+
+if __name__ == "__main__":
+    app = build_app()
+    try:
+        serve_gunicorn(app)
+    except ImportError:
+        app.logger.warning("gunicorn is not available on this platform; serving with waitress.")
+        serve_waitress(app)
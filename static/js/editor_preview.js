@@ -0,0 +1,115 @@
+// ===== editor_preview.js =====
+// Live preview for the sheet editor. Only the lines that changed since the
+// last sync are sent to /api/preview; the server renders just those lines and
+// returns the same splice, which is patched into the preview DOM.
+
+(function () {
+  const textarea = document.getElementById('sheet_content');
+  const preview = document.getElementById('live-preview');
+  if (!textarea || !preview || !window.previewUrl) return;
+
+  const sessionId = window.crypto?.randomUUID?.() || `${Date.now()}-${Math.random().toString(16).slice(2)}`;
+  let syncedLines = [];   // editor lines as last acknowledged by the server
+  let version = null;     // null until the session has been (re)started
+  let inFlight = false;
+  let pending = false;
+  // Sessions live in one server worker. If requests keep landing on workers
+  // that don't know this session (no sticky routing), stop sending splices
+  // and send the full text each time; the server still renders only lines
+  // it hasn't seen for this session.
+  const MAX_CONFLICTS = 3;
+  let conflicts = 0;
+
+  function renderLine(rendered) {
+    const el = document.createElement('div');
+    if (!rendered) {
+      el.className = 'preview-blank';
+    } else if (rendered.lyric === '') {
+      el.className = 'section-header';
+      el.innerHTML = rendered.chord;
+    } else {
+      el.className = 'line-block';
+      const chord = document.createElement('div');
+      chord.className = 'chord-line';
+      chord.innerHTML = rendered.chord;
+      const lyric = document.createElement('div');
+      lyric.className = 'lyric-line';
+      lyric.textContent = rendered.lyric;
+      el.append(chord, lyric);
+    }
+    return el;
+  }
+
+  function applySplice(result) {
+    for (let i = 0; i < result.delete; i++) {
+      preview.children[result.start]?.remove();
+    }
+    const anchor = preview.children[result.start] || null;
+    result.insert.forEach(rendered => preview.insertBefore(renderLine(rendered), anchor));
+  }
+
+  // Single splice covering everything between the common prefix and suffix
+  function diffLines(oldLines, newLines) {
+    let start = 0;
+    while (start < oldLines.length && start < newLines.length && oldLines[start] === newLines[start]) {
+      start++;
+    }
+    let oldEnd = oldLines.length;
+    let newEnd = newLines.length;
+    while (oldEnd > start && newEnd > start && oldLines[oldEnd - 1] === newLines[newEnd - 1]) {
+      oldEnd--;
+      newEnd--;
+    }
+    return { start, delete: oldEnd - start, insert: newLines.slice(start, newEnd) };
+  }
+
+  async function sync() {
+    if (inFlight) {
+      pending = true;
+      return;
+    }
+
+    const lines = textarea.value.split('\n');
+    let body;
+    if (version === null || conflicts >= MAX_CONFLICTS) {
+      if (version !== null && lines.join('\n') === syncedLines.join('\n')) return;
+      body = { session: sessionId, full: lines };
+    } else {
+      const edit = diffLines(syncedLines, lines);
+      if (!edit.delete && !edit.insert.length) return;
+      body = { session: sessionId, version, ...edit };
+    }
+
+    inFlight = true;
+    try {
+      const response = await fetch(window.previewUrl, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(body)
+      });
+      if (response.status === 409) {
+        // Session unknown to this worker or out of date: resend everything
+        version = null;
+        conflicts++;
+        pending = true;
+      } else if (response.ok) {
+        const result = await response.json();
+        if (body.full) preview.replaceChildren();
+        applySplice(result);
+        version = result.version;
+        syncedLines = lines;
+      }
+    } catch (err) {
+      // Network hiccup: the next keystroke retries from the last synced state
+    } finally {
+      inFlight = false;
+      if (pending) {
+        pending = false;
+        sync();
+      }
+    }
+  }
+
+  textarea.addEventListener('input', sync);
+  sync();
+})();
@@ -0,0 +1,82 @@
+// ===== explore_suggest.js =====
+// Autocomplete for the explore search box, served by /api/suggest. Requests
+// are debounced and stale responses (for an older prefix) are dropped.
+
+(function () {
+  const input = document.getElementById('explore-query');
+  const list = document.getElementById('search-suggestions');
+  if (!input || !list || !window.suggestUrl) return;
+
+  let timer = null;
+  let latest = '';
+  let active = -1;
+
+  function close() {
+    list.replaceChildren();
+    list.classList.add('d-none');
+    input.setAttribute('aria-expanded', 'false');
+    active = -1;
+  }
+
+  function render(suggestions) {
+    list.replaceChildren();
+    suggestions.forEach(item => {
+      const li = document.createElement('li');
+      li.className = 'list-group-item list-group-item-action';
+      li.setAttribute('role', 'option');
+      const link = document.createElement('a');
+      link.href = item.url;
+      link.textContent = item.label;
+      const detail = document.createElement('small');
+      detail.className = 'text-muted ms-2';
+      detail.textContent = item.type === 'artist'
+        ? `Artist · ${item.songs} song${item.songs === 1 ? '' : 's'}`
+        : (item.artist || '');
+      li.append(link, detail);
+      list.appendChild(li);
+    });
+    list.classList.toggle('d-none', !suggestions.length);
+    input.setAttribute('aria-expanded', String(suggestions.length > 0));
+    active = -1;
+  }
+
+  async function fetchSuggestions(prefix) {
+    try {
+      const response = await fetch(`${window.suggestUrl}?q=${encodeURIComponent(prefix)}`);
+      if (!response.ok) return;
+      const data = await response.json();
+      if (data.query === latest) render(data.suggestions);
+    } catch (err) {
+      // Autocomplete is best-effort; the form still submits normally
+    }
+  }
+
+  input.addEventListener('input', () => {
+    latest = input.value.trim();
+    clearTimeout(timer);
+    if (!latest) {
+      close();
+      return;
+    }
+    timer = setTimeout(() => fetchSuggestions(latest), 80);
+  });
+
+  input.addEventListener('keydown', event => {
+    const items = list.querySelectorAll('li');
+    if (!items.length) return;
+    if (event.key === 'ArrowDown' || event.key === 'ArrowUp') {
+      event.preventDefault();
+      active = (active + (event.key === 'ArrowDown' ? 1 : -1) + items.length) % items.length;
+      items.forEach((li, i) => li.classList.toggle('active', i === active));
+    } else if (event.key === 'Enter' && active >= 0) {
+      event.preventDefault();
+      window.location.href = items[active].querySelector('a').href;
+    } else if (event.key === 'Escape') {
+      close();
+    }
+  });
+
+  document.addEventListener('click', event => {
+    if (!list.contains(event.target) && event.target !== input) close();
+  });
+})();
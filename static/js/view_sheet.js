@@ -1,31 +1,34 @@
 // ===== view_sheet.js =====
 
 // --- Column layout handling ---
+// Line metrics are computed server-side (see compute_layout_metrics in app/utils.py),
+// so layout only needs the character size, measured once, and the container width.
+const sheetLayout = JSON.parse(document.getElementById('sheet-layout')?.textContent || 'null');
+let charWidth = 0;
+let rowHeight = 0;
+
+function measureCharMetrics(container) {
+  const probe = document.createElement('div');
+  probe.className = 'lyric-line';
+  probe.style.visibility = 'hidden';
+  probe.style.position = 'absolute';
+  const testSpan = document.createElement('span');
+  testSpan.textContent = 'M';
+  probe.appendChild(testSpan);
+  container.appendChild(probe);
+  charWidth = testSpan.getBoundingClientRect().width;
+  rowHeight = probe.getBoundingClientRect().height;
+  container.removeChild(probe);
+}
+
 function updateColumnCount() {
   const container = document.querySelector('.song-content');
-  if (!container) return;
+  if (!container || !sheetLayout || !sheetLayout.line_count) return;
 
-  const lines = [...container.querySelectorAll('.line-block, .section-header')];
-  if (!lines.length) return;
+  if (!charWidth) measureCharMetrics(container);
 
   const extraPadding = 5;
-
-  // Measure longest line (chord or lyric)
-  const longestLineLength = Math.max(...lines.map(line => {
-    const chordLen = line.querySelector('.chord-line')?.textContent.length || 0;
-    const lyricLen = line.querySelector('.lyric-line')?.textContent.length || 0;
-    return Math.max(chordLen, lyricLen);
-  }));
-
-  // Measure monospace character width
-  const testSpan = document.createElement('span');
-  testSpan.textContent = 'M';
-  testSpan.style.visibility = 'hidden';
-  container.appendChild(testSpan);
-  const charWidth = testSpan.getBoundingClientRect().width;
-  container.removeChild(testSpan);
-
-  const desiredColWidth = (longestLineLength + extraPadding) * charWidth;
+  const desiredColWidth = (sheetLayout.longest_line + extraPadding) * charWidth;
 
   // Handle vertical mode
   if (container.classList.contains('vertical-mode')) {
@@ -43,8 +46,8 @@ function updateColumnCount() {
   const MAX_COLS = 3;
   const colCount = Math.max(1, Math.min(MAX_COLS, Math.floor(containerWidth / desiredColWidth)));
 
-  // NEW: Check vertical height to avoid splitting short songs
-  const totalHeight = container.scrollHeight;
+  // Check estimated vertical height to avoid splitting short songs
+  const totalHeight = sheetLayout.row_count * rowHeight;
   const viewportHeight = window.innerHeight;
   const isTallEnough = totalHeight > viewportHeight * 0.8;
 
@@ -66,9 +69,16 @@ function updateColumnCount() {
   }
 }
 
-// Run on load and resize
+// Run on load (after fonts are ready) and at most once per frame on resize
+let resizeFrame = null;
 window.addEventListener('load', updateColumnCount);
-window.addEventListener('resize', updateColumnCount);
+window.addEventListener('resize', () => {
+  if (resizeFrame) return;
+  resizeFrame = requestAnimationFrame(() => {
+    resizeFrame = null;
+    updateColumnCount();
+  });
+});
 
 // --- Transposition + preference ---
 let currentSteps = parseInt(window.initialSteps, 10) || 0;
@@ -253,48 +263,78 @@ document.getElementById('btn-download-txt')?.addEventListener('click', () => {
 });
 
 // --- Interactive Chord Fingering Tooltips ---
+// Voicings come from /api/voicings/<song_id> (generated by app/voicings.py) and
+// are keyed by sharp-spelled chord name, for the sheet's current transposition.
 (function() {
-  const GUITAR_CHORD_DB = {
-    'C': 'x32010', 'Cm': 'x35543', 'C7': 'x32310', 'Cmaj7': 'x32000',
-    'D': 'xx0231', 'Dm': 'xx0231', 'D7': 'xx0212', 'Dmaj7': 'xx0222',
-    'E': '022100', 'Em': '022000', 'E7': '020100', 'Emaj7': '021100',
-    'F': '133211', 'Fm': '133111', 'F7': '131211', 'Fmaj7': 'xx3210',
-    'G': '320003', 'Gm': '355333', 'G7': '320001', 'Gmaj7': '320002',
-    'A': 'x02220', 'Am': 'x02210', 'A7': 'x02020', 'Amaj7': 'x02120',
-    'B': 'x24442', 'Bm': 'x24432', 'B7': 'x21202', 'Bmaj7': 'x24342',
-    'Bb': 'x13331', 'Bbm': 'x13321', 'F#': '244322', 'F#m': '244222'
-  };
+  const voicingRequests = {};  // `${instrument}:${steps}` -> Promise of {chord: [frets]}
+  const instrumentSelect = document.getElementById('instrument-select');
+
+  function loadVoicings(steps) {
+    if (!window.voicingsUrl) return Promise.resolve({});  // e.g. pre-rendered static pages
+    const instrument = instrumentSelect?.value || 'guitar';
+    const cacheKey = `${instrument}:${steps}`;
+    if (!voicingRequests[cacheKey]) {
+      const url = `${window.voicingsUrl}?instrument=${encodeURIComponent(instrument)}&steps=${steps}`;
+      voicingRequests[cacheKey] = fetch(url)
+        .then(response => response.ok ? response.json() : { voicings: {} })
+        .then(data => data.voicings)
+        .catch(() => ({}));
+    }
+    return voicingRequests[cacheKey];
+  }
+
+  function toSharpName(note) {
+    const idx = flatNotes.indexOf(note);
+    return idx === -1 ? note : sharpNotes[idx];
+  }
+
+  function getCanonicalChordName(rawChord) {
+    return rawChord.replace(/[\[\]]/g, '').trim()
+      .replace(/^([A-G][#b]?)min/, '$1m')
+      .replace(/^[A-G][#b]?/, toSharpName)
+      .replace(/\/([A-G][#b]?)$/, (match, bass) => '/' + toSharpName(bass));
+  }
 
   const tooltip = document.createElement('div');
   tooltip.className = 'chord-tooltip d-none';
   document.body.appendChild(tooltip);
 
-  function getCleanChordName(rawChord) {
-    return rawChord.replace(/[\[\]]/g, '').trim().split('/')[0];
-  }
+  let hoveredChord = null;
+
+  // Prefetch for the initial key
+  if (window.voicingsUrl) loadVoicings(currentSteps);
+  instrumentSelect?.addEventListener('change', () => loadVoicings(currentSteps));
 
   document.addEventListener('mouseover', (e) => {
     const chordSpan = e.target.closest('.chord');
     if (!chordSpan) {
+      hoveredChord = null;
       tooltip.classList.add('d-none');
       return;
     }
 
-    const cleanChord = getCleanChordName(chordSpan.textContent);
-    const tabs = GUITAR_CHORD_DB[cleanChord] || 'Fingering available';
+    hoveredChord = chordSpan;
+    const displayName = chordSpan.textContent.replace(/[\[\]]/g, '').trim();
+    const steps = currentSteps;
 
-    tooltip.innerHTML = `<strong>${cleanChord}</strong><br><small style="letter-spacing: 2px;">Frets: ${tabs}</small>`;
-    
-    const rect = chordSpan.getBoundingClientRect();
-    tooltip.style.left = `${rect.left + window.scrollX}px`;
-    tooltip.style.top = `${rect.top + window.scrollY - 45}px`;
-    tooltip.classList.remove('d-none');
+    loadVoicings(steps).then(voicings => {
+      if (hoveredChord !== chordSpan) return;  // pointer moved on
+      const shapes = voicings[getCanonicalChordName(chordSpan.textContent)] || [];
+      const tabs = shapes.length ? shapes.slice(0, 2).join(' / ') : 'Fingering available';
+
+      tooltip.innerHTML = `<strong>${displayName}</strong><br><small style="letter-spacing: 2px;">Frets: ${tabs}</small>`;
+
+      const rect = chordSpan.getBoundingClientRect();
+      tooltip.style.left = `${rect.left + window.scrollX}px`;
+      tooltip.style.top = `${rect.top + window.scrollY - 45}px`;
+      tooltip.classList.remove('d-none');
+    });
   });
 
   document.addEventListener('mouseout', (e) => {
     if (e.target.closest('.chord')) {
+      hoveredChord = null;
       tooltip.classList.add('d-none');
     }
   });
 })();
-
@@ -1,5 +1,6 @@
 import pytest
 import os
+import shutil
 import tempfile
 from app import create_app, db
 from app.models import Song
@@ -8,11 +9,13 @@ from app.models import Song
 def app():
     # Create a temporary database file
     db_fd, db_path = tempfile.mkstemp()
+    data_dir = tempfile.mkdtemp()
     
-    app = create_app()
-    app.config.update({
+    app = create_app({
         'TESTING': True,
         'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}',
+        'SONG_DATA_DIR': data_dir,
+        'ARTWORK_CACHE_DIR': os.path.join(data_dir, 'artwork'),
         'SECRET_KEY': 'test-secret-key',
         'WTF_CSRF_ENABLED': False
     })
@@ -30,9 +33,11 @@ def app():
         yield app
         db.session.remove()
         db.drop_all()
+        db.engine.dispose()  # closes the last connection so SQLite removes -wal/-shm files
 
     os.close(db_fd)
     os.unlink(db_path)
+    shutil.rmtree(data_dir, ignore_errors=True)
 
 @pytest.fixture
 def client(app):
@@ -0,0 +1,191 @@
+import io
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from PIL import Image
+from app.artwork import ArtworkCache, ArtworkError, THUMBNAIL_SIZES
+
+
+def _png_bytes(width=1000, height=800):
+    buffer = io.BytesIO()
+    Image.new('RGB', (width, height), (200, 30, 30)).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+def _file_fetcher(calls):
+    def fetch(url):
+        calls.append(url)
+        with open(url.removeprefix('file://'), 'rb') as f:
+            return f.read()
+    return fetch
+
+def test_artwork_cache_fetches_once_and_resizes(tmp_path):
+    source = tmp_path / "cover.png"
+    source.write_bytes(_png_bytes())
+    calls = []
+    cache = ArtworkCache(str(tmp_path / "cache"), max_bytes=10 * 1024 * 1024, fetcher=_file_fetcher(calls))
+    url = f"file://{source}"
+
+    path = cache.get(url, 'sm', 'webp')
+    with Image.open(path) as thumb:
+        assert thumb.format == 'WEBP'
+        assert thumb.size == (THUMBNAIL_SIZES['sm'], THUMBNAIL_SIZES['sm'] * 4 // 5)
+
+    with Image.open(cache.get(url, 'lg', 'jpeg')) as thumb:
+        assert thumb.format == 'JPEG'
+    assert calls == [url]
+    assert cache.hits == 1 and cache.misses == 1
+
+def test_artwork_cache_evicts_least_recently_used(tmp_path):
+    calls = []
+    cache = ArtworkCache(str(tmp_path / "cache"), max_bytes=1, fetcher=_file_fetcher(calls))
+    sources = []
+    for name in ("a", "b"):
+        source = tmp_path / f"{name}.png"
+        source.write_bytes(_png_bytes(300, 300))
+        sources.append(f"file://{source}")
+
+    cache.get(sources[0], 'md', 'jpeg')
+    # Cap is tiny, so everything not just written is evicted
+    cache.max_bytes = cache.size() + 1
+    cache.get(sources[1], 'md', 'jpeg')
+    assert cache.size() <= cache.max_bytes
+    cache.get(sources[0], 'md', 'jpeg')
+    assert calls == [sources[0], sources[1], sources[0]]
+
+def test_artwork_cache_rejects_bad_images(tmp_path):
+    cache = ArtworkCache(str(tmp_path), max_bytes=1024, fetcher=lambda url: b"not an image")
+    with pytest.raises(ArtworkError):
+        cache.get("https://example.com/x.jpg", 'md', 'webp')
+
+def test_artwork_cache_remembers_failures(tmp_path, monkeypatch):
+    calls = []
+    def fetch(url):
+        calls.append(url)
+        raise ArtworkError("HTTP 404")
+    cache = ArtworkCache(str(tmp_path), max_bytes=1024, fetcher=fetch, failure_ttl=30)
+    url = "https://example.com/missing.jpg"
+
+    for size in ('sm', 'md', 'md'):
+        with pytest.raises(ArtworkError):
+            cache.get(url, size, 'webp')
+    assert calls == [url]
+
+    now = time.monotonic()
+    monkeypatch.setattr(time, 'monotonic', lambda: now + 31)
+    with pytest.raises(ArtworkError):
+        cache.get(url, 'md', 'webp')
+    assert calls == [url, url]
+
+def test_artwork_cache_concurrent_misses_share_one_fetch(tmp_path):
+    source = tmp_path / "cover.png"
+    source.write_bytes(_png_bytes(300, 300))
+    calls = []
+    release = threading.Event()
+    fetch_file = _file_fetcher(calls)
+    def slow_fetch(url):
+        release.wait(5)
+        return fetch_file(url)
+    cache = ArtworkCache(str(tmp_path / "cache"), max_bytes=10 * 1024 * 1024, fetcher=slow_fetch)
+    url = f"file://{source}"
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        futures = [pool.submit(cache.get, url, 'md', 'jpeg') for _ in range(8)]
+        time.sleep(0.1)
+        release.set()
+        paths = {future.result() for future in futures}
+    assert len(paths) == 1
+    assert calls == [url]
+    assert cache._fetch_locks == {}
+
+def test_artwork_route_serves_cached_thumbnails(app, client, tmp_path):
+    from app import db
+    from app.models import Song
+    source = tmp_path / "cover.png"
+    source.write_bytes(_png_bytes())
+    song = db.session.get(Song, 1)
+    song.image_url = f"file://{source}"
+    db.session.commit()
+    app.artwork_cache.fetcher = _file_fetcher([])
+
+    page = client.get('/explore').data.decode()
+    assert 'src="/artwork/1/md?v=' in page
+    assert 'file://' not in page
+
+    url = page.split('src="', 1)[1].split('"', 1)[0]
+    response = client.get(url, headers={'Accept': 'image/webp,*/*'})
+    assert response.status_code == 200
+    assert response.mimetype == 'image/webp'
+    assert 'immutable' in response.headers['Cache-Control']
+    assert client.get(url, headers={'Accept': '*/*'}).mimetype == 'image/jpeg'
+
+    app.artwork_cache.fetcher = lambda url: b"broken"
+    song.image_url = "https://example.com/moved.jpg"
+    db.session.commit()
+    response = client.get('/artwork/1/md')
+    assert response.status_code == 302
+    assert response.headers['Location'] == "https://example.com/moved.jpg"
+
+def test_artwork_cache_keeps_image_larger_than_cap(tmp_path):
+    source = tmp_path / "cover.png"
+    source.write_bytes(_png_bytes())
+    cache = ArtworkCache(str(tmp_path / "cache"), max_bytes=1, fetcher=_file_fetcher([]))
+    path = cache.get(f"file://{source}", 'md', 'webp')
+    assert open(path, 'rb').read(4) == b"RIFF"
+
+@pytest.mark.parametrize("url", [
+    "file:///etc/passwd",
+    "ftp://example.com/cover.png",
+    "http://127.0.0.1:5000/admin",
+    "http://169.254.169.254/latest/meta-data/",
+    "http://10.0.0.8/cover.png",
+    "http://[::1]/cover.png",
+    "http://[::ffff:127.0.0.1]/cover.png",
+])
+def test_http_fetcher_refuses_non_public_urls(url):
+    from app.artwork import http_fetcher
+    with pytest.raises(ArtworkError):
+        http_fetcher(url)
+
+def test_http_fetcher_checks_resolved_addresses(monkeypatch):
+    import socket
+    from app import artwork
+    monkeypatch.setattr(artwork.socket, "getaddrinfo", lambda host, port, **kwargs: [
+        (socket.AF_INET, socket.SOCK_STREAM, 6, "", ("93.184.216.34", port)),
+        (socket.AF_INET, socket.SOCK_STREAM, 6, "", ("192.168.1.20", port)),
+    ])
+    with pytest.raises(ArtworkError, match="non-public"):
+        artwork.http_fetcher("https://images.example.com/cover.png")
+
+def test_http_fetcher_does_not_follow_redirects(monkeypatch):
+    import threading
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from app import artwork
+    image = _png_bytes(10, 10)
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/cover.png":
+                self.send_response(200)
+                self.send_header("Content-Length", str(len(image)))
+                self.end_headers()
+                self.wfile.write(image)
+            else:
+                self.send_response(302)
+                self.send_header("Location", "http://169.254.169.254/latest/meta-data/")
+                self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(artwork, "is_public_address", lambda address: True)  # allow the test server
+    try:
+        base = f"http://127.0.0.1:{server.server_port}"
+        assert artwork.http_fetcher(f"{base}/cover.png", timeout=5) == image
+        with pytest.raises(ArtworkError, match="302"):
+            artwork.http_fetcher(f"{base}/redirect", timeout=5)
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,73 @@
+import os
+import pytest
+from app.cache import SheetCache, FragmentCache
+
+def test_sheet_cache_hit_and_file_change(tmp_path):
+    sheet = tmp_path / "1.txt"
+    sheet.write_text("[C]Hello [G]world", encoding="utf-8")
+    cache = SheetCache(max_entries=2)
+
+    first = cache.get(1, str(sheet))
+    assert cache.get(1, str(sheet)) is first
+    assert cache.hits == 1 and cache.misses == 1
+
+    sheet.write_text("[Am]Changed line here", encoding="utf-8")
+    os.utime(sheet, ns=(0, 0))
+    updated = cache.get(1, str(sheet))
+    assert "[Am]" in updated["lines"][0]["chord"]
+    assert updated["layout"]["longest_line"] == len("Changed line here")
+
+def test_sheet_cache_evicts_least_recent(tmp_path):
+    cache = SheetCache(max_entries=2)
+    for song_id in (1, 2, 3):
+        path = tmp_path / f"{song_id}.txt"
+        path.write_text("[C]La", encoding="utf-8")
+        cache.get(song_id, str(path))
+    assert 1 not in cache
+    assert len(cache) == 2
+
+def test_sheet_cache_missing_file(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        SheetCache().get(1, str(tmp_path / "missing.txt"))
+
+def test_fragment_cache_hits_evicts_and_invalidates():
+    cache = FragmentCache(max_entries=2)
+    renders = []
+
+    def render(text):
+        renders.append(text)
+        return text
+
+    assert cache.get((1, 1, 'live'), lambda: render("one")) == "one"
+    assert cache.get((1, 1, 'live'), lambda: render("again")) == "one"
+    assert cache.get((1, 2, 'live'), lambda: render("one v2")) == "one v2"  # new row version
+    cache.get((2, 1, 'live'), lambda: render("two"))
+    assert renders == ["one", "one v2", "two"]
+    assert cache.stats() == {'entries': 2, 'hits': 1, 'misses': 3, 'hit_rate': 0.25}
+
+    cache.invalidate(2)
+    assert len(cache) == 1
+
+def test_explore_cards_come_from_fragment_cache(app, client):
+    from app import db
+    from app.models import Song
+
+    client.get('/explore')
+    client.get('/explore?sort=popular')
+    stats = client.get('/cachez').get_json()['fragments']
+    assert stats['misses'] == 1 and stats['hits'] == 1
+
+    # Editing bumps the row version, so the card is rendered again with the new title
+    song = Song.query.first()
+    old_version = song.version
+    response = client.post(f'/edit_song/{song.id}', data={
+        'title': 'Renamed Song', 'artist': 'Test Artist', 'song_key': 'C', 'sheet_content': '[C]La'
+    })
+    assert response.status_code == 302
+    html = client.get('/explore').get_data(as_text=True)
+    assert 'Renamed Song' in html and 'Test Song' not in html
+    db.session.expire_all()
+    assert db.session.get(Song, song.id).version == old_version + 1
+
+    client.post(f'/delete_song/{song.id}')
+    assert len(app.fragment_cache) == 0
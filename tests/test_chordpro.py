@@ -0,0 +1,129 @@
+import os
+
+from app.chordpro import ChordProReader, native_to_chordpro
+from app.models import Song
+
+CHORDPRO = """{title: Sunshine}
+{subtitle: Jimmie Davis}
+{key: C}
+{capo: 2}
+# arranged for choir
+
+{c: Intro}
+[C] [F] [C]
+
+{start_of_verse}
+The [C]other night dear, as I lay [F]sleeping
+{end_of_verse}
+
+{soc}
+You are my [C]sunshine, my only [C7]sunshine
+{eoc}
+
+{c: slowly}
+{chorus}
+"""
+
+
+def test_chordpro_import_maps_directives_and_sections():
+    reader = ChordProReader()
+    lines = list(reader.convert(CHORDPRO.splitlines()))
+
+    assert lines == [
+        "Intro:",
+        "[C] [F] [C]",
+        "",
+        "Verse 1:",
+        "The [C]other night dear, as I lay [F]sleeping",
+        "",
+        "Chorus:",
+        "You are my [C]sunshine, my only [C7]sunshine",
+        "",
+        "(slowly)",
+        "",
+        "Chorus:",
+    ]
+    assert reader.song_fields() == {'title': 'Sunshine', 'artist': 'Jimmie Davis', 'song_key': 'C'}
+    assert reader.metadata['capo'] == '2'
+
+
+def test_native_to_chordpro_round_trips():
+    native = "Intro:\n[G] [D]\n\nVerse 1:\n[G]Hello [D/F#]there\n\nChorus:\n[C]La la\n"
+    fields = {'title': 'Hi', 'artist': None, 'song_key': 'G'}
+    exported = list(native_to_chordpro(fields, native.splitlines()))
+
+    assert exported[:2] == ["{title: Hi}", "{key: G}"]
+    assert "{comment: Intro}" in exported
+    assert exported[exported.index("{start_of_verse: Verse 1}") + 1] == "[G]Hello [D/F#]there"
+    assert exported[-1] == "{end_of_chorus}"
+    assert exported.index("{end_of_verse}") < exported.index("{start_of_chorus: Chorus}")
+
+    reader = ChordProReader()
+    assert '\n'.join(reader.convert(exported)) == native.rstrip('\n')
+    assert reader.song_fields()['title'] == 'Hi'
+
+
+def test_import_and_export_commands(app, runner, tmp_path):
+    source = tmp_path / 'library' / 'nested'
+    source.mkdir(parents=True)
+    (source / 'sunshine.cho').write_text(CHORDPRO, encoding='utf-8')
+    (source / 'untitled_song.pro').write_text("[Am]No title here\n", encoding='utf-8')
+    (source / 'notes.txt').write_text("not chordpro", encoding='utf-8')
+
+    result = runner.invoke(args=['import-chordpro', str(tmp_path / 'library'), '--workers', '2'])
+    assert result.exit_code == 0, result.output
+    assert "Imported 2 songs." in result.output
+
+    song = Song.query.filter_by(title='Sunshine').one()
+    assert song.artist == 'Jimmie Davis' and song.key_tonic == 0
+    assert Song.query.filter_by(title='untitled song').count() == 1
+    with open(os.path.join(app.config['SONG_DATA_DIR'], f"{song.id}.txt"), encoding='utf-8') as f:
+        assert f.read().startswith("Intro:\n[C] [F] [C]")
+    assert not os.listdir(os.path.join(app.config['SONG_DATA_DIR'], '.import'))
+
+    out_dir = tmp_path / 'export'
+    result = runner.invoke(args=['export-chordpro', '--out', str(out_dir), '--ids', str(song.id), '--workers', '1'])
+    assert result.exit_code == 0, result.output
+    exported = (out_dir / f"{song.id}-sunshine.cho").read_text(encoding='utf-8')
+    assert exported.startswith("{title: Sunshine}\n{artist: Jimmie Davis}\n{key: C}")
+    assert "{start_of_chorus: Chorus}" in exported
+
+
+def test_chordpro_download(app, client):
+    song = Song.query.first()
+    with open(os.path.join(app.config['SONG_DATA_DIR'], f"{song.id}.txt"), 'w', encoding='utf-8') as f:
+        f.write("Chorus:\n[C]Hey\n")
+
+    response = client.get(f'/song/{song.id}/chordpro')
+    assert response.status_code == 200
+    assert 'attachment' in response.headers['Content-Disposition']
+    assert response.get_data(as_text=True) == (
+        "{title: Test Song}\n{artist: Test Artist}\n{key: C major}\n\n"
+        "{start_of_chorus: Chorus}\n[C]Hey\n{end_of_chorus}\n"
+    )
+
+
+def test_chorus_recall_and_tab_block_round_trip():
+    source = [
+        "{title: Sunshine}",
+        "{soc}",
+        "You are my [C]sunshine",
+        "{eoc}",
+        "",
+        "{chorus}",
+        "{c: repeat twice}",
+        "{sot}",
+        "e|---0---3---|",
+        "B|---1---0---|",
+        "{eot}",
+    ]
+    reader = ChordProReader()
+    native = list(reader.convert(source))
+    exported = list(native_to_chordpro(reader.song_fields(), native))
+
+    assert exported.count("{start_of_chorus: Chorus}") == exported.count("{end_of_chorus}") == 1
+    assert "{chorus}" in exported
+    tab = exported.index("{start_of_tab}")
+    assert exported[tab - 1] == "(repeat twice)"  # outside any environment
+    assert exported[tab + 1:tab + 4] == ["e|---0---3---|", "B|---1---0---|", "{end_of_tab}"]
+    assert list(ChordProReader().convert(exported)) == native
@@ -0,0 +1,50 @@
+import pytest
+from sqlalchemy import text
+from app import create_app, db
+from app.database import build_engine_options, sqlite_pragmas
+
+
+def test_production_profile_enables_wal(app):
+    with db.engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar().lower() == "wal"
+        assert conn.execute(text("PRAGMA busy_timeout")).scalar() == app.config['SQLITE_BUSY_TIMEOUT_MS']
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+
+
+def test_server_uri_gets_pool_options():
+    options = build_engine_options({
+        'SQLALCHEMY_DATABASE_URI': 'postgresql://user:pw@db/chords',
+        'DB_ENGINE_PROFILE': 'production',
+        'DB_POOL_SIZE': 8,
+        'DB_MAX_OVERFLOW': 4,
+        'DB_POOL_RECYCLE': 600,
+    })
+    assert options['pool_size'] == 8
+    assert options['max_overflow'] == 4
+    assert options['pool_recycle'] == 600
+    assert options['pool_pre_ping'] is True
+
+
+def test_default_profile_leaves_engine_untouched():
+    options = build_engine_options({
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///songs.db',
+        'DB_ENGINE_PROFILE': 'default',
+        'SQLALCHEMY_ENGINE_OPTIONS': {'echo': True},
+    })
+    assert options == {'echo': True}
+
+
+def test_invalid_pragma_values_rejected():
+    with pytest.raises(ValueError):
+        sqlite_pragmas({
+            'SQLITE_JOURNAL_MODE': 'WAL; DROP TABLE songs',
+            'SQLITE_SYNCHRONOUS': 'NORMAL',
+            'SQLITE_BUSY_TIMEOUT_MS': 5000,
+            'SQLITE_CACHE_SIZE_KB': 1024,
+            'SQLITE_MMAP_SIZE': 0,
+        })
+
+
+def test_unknown_profile_rejected():
+    with pytest.raises(ValueError):
+        create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://', 'DB_ENGINE_PROFILE': 'turbo'})
@@ -0,0 +1,131 @@
+import os
+import time
+
+from app import db
+from app.models import Song
+from app.popularity import (
+    ViewCounter, combine_trending, decayed_views, flush_view_counts, start_view_flusher,
+    trending_increment, write_view_counts
+)
+
+HALF_LIFE = 3600
+
+
+def add_song(app, title, text="[C]La la\n"):
+    song = Song(title=title, artist="Band", song_key="C")
+    db.session.add(song)
+    db.session.commit()
+    with open(os.path.join(app.config['SONG_DATA_DIR'], f"{song.id}.txt"), 'w', encoding='utf-8') as f:
+        f.write(text)
+    return song
+
+
+def test_trending_scores_decay_and_combine():
+    now = time.time()
+    score = trending_increment(4, now, HALF_LIFE)
+    assert abs(decayed_views(score, now, HALF_LIFE) - 4) < 1e-9
+    assert abs(decayed_views(score, now + HALF_LIFE, HALF_LIFE) - 2) < 1e-9
+
+    # Views an hour apart add up as their decayed values
+    combined = combine_trending(score, trending_increment(1, now + HALF_LIFE, HALF_LIFE))
+    assert abs(decayed_views(combined, now + HALF_LIFE, HALF_LIFE) - 3) < 1e-9
+    assert decayed_views(None, now, HALF_LIFE) == 0
+
+
+def test_view_counter_batches_until_due():
+    counter = ViewCounter(flush_interval=3600, max_pending=3)
+    assert not counter.record(1)
+    assert not counter.record(1)
+    assert counter.record(2)
+    assert counter.drain() == {1: 2, 2: 1}
+    assert counter.pending == 0
+
+    counter.restore({1: 2})
+    assert counter.drain() == {1: 2}
+
+
+def test_views_are_flushed_in_batches(app, client):
+    song = add_song(app, "Viewed")
+    for _ in range(3):
+        assert client.get(f'/view_sheet/{song.id}').status_code == 200
+    db.session.expire_all()
+    assert db.session.get(Song, song.id).view_count == 0  # still buffered in this worker
+
+    assert flush_view_counts(app) == 3
+    db.session.expire_all()
+    flushed = db.session.get(Song, song.id)
+    assert flushed.view_count == 3 and flushed.trending_score is not None
+    assert flush_view_counts(app) == 0
+
+
+def test_flush_runs_after_response_when_due(app, client):
+    song = add_song(app, "Hot")
+    app.view_counter.max_pending = 2
+    client.get(f'/view_sheet/{song.id}').close()
+    client.get(f'/view_sheet/{song.id}').close()  # the server closing the response triggers the flush
+    db.session.expire_all()
+    assert db.session.get(Song, song.id).view_count == 2
+    assert app.view_counter.pending == 0
+
+
+def test_background_flusher_writes_without_another_view(app, client):
+    song = add_song(app, "Quiet")
+    client.get(f'/view_sheet/{song.id}').close()
+    assert app.view_counter.pending == 1  # not due yet, so the request didn't flush
+
+    stop = start_view_flusher(app, interval=0.05)
+    try:
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            db.session.expire_all()
+            if db.session.get(Song, song.id).view_count == 1:
+                break
+            time.sleep(0.02)
+    finally:
+        stop.set()
+    assert db.session.get(Song, song.id).view_count == 1
+    assert app.view_counter.pending == 0
+
+
+def test_explore_popular_and_trending_sorts(app, client):
+    classic = add_song(app, "Classic")
+    fresh = add_song(app, "Fresh")
+    now = time.time()
+    half_life = app.config['TRENDING_HALF_LIFE_HOURS'] * 3600
+    write_view_counts({classic.id: 50}, now - 10 * half_life, half_life)
+    write_view_counts({fresh.id: 5}, now, half_life)
+
+    def titles(url):
+        html = client.get(url).data.decode()
+        return sorted((t for t in ("Classic", "Fresh", "Test Song") if t in html), key=html.index)
+
+    assert titles('/explore?sort=popular') == ["Classic", "Fresh", "Test Song"]
+    assert titles('/explore?sort=trending') == ["Fresh", "Classic", "Test Song"]
+    assert titles('/explore') == ["Classic", "Fresh", "Test Song"]
+    assert titles('/explore?query=fresh&sort=trending') == ["Fresh"]
+
+
+def test_flush_reranks_suggestions(app, client):
+    add_song(app, "Love Me Do")
+    lovely = add_song(app, "Lovely Day")
+    labels = lambda: [s['label'] for s in client.get('/api/suggest?q=lov').get_json()['suggestions']]
+    assert labels() == ["Love Me Do", "Lovely Day"]
+
+    for _ in range(2):
+        client.get(f'/view_sheet/{lovely.id}')
+    flush_view_counts(app)
+    assert labels() == ["Lovely Day", "Love Me Do"]
+
+
+def test_warmup_prepares_most_viewed_sheets(app):
+    from app.warmup import warm_up
+    quiet = add_song(app, "Quiet")
+    popular = add_song(app, "Popular")
+    popular.view_count = 50
+    db.session.commit()
+    popular_id, quiet_id = popular.id, quiet.id
+
+    app.config['WARMUP_SHEET_COUNT'] = 1
+    warm_up(app)
+    assert popular_id in app.sheet_cache and quiet_id not in app.sheet_cache
+    assert len(app.sheet_cache) == 1
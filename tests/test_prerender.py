@@ -0,0 +1,86 @@
+import json
+import os
+
+from app import db
+from app.models import Song
+from app.prerender import MANIFEST_NAME, key_slug, prerender_site
+from app.parsing import KEY_MAJOR, KEY_MINOR
+
+
+def write_sheet(app, song_id, text):
+    with open(os.path.join(app.config['SONG_DATA_DIR'], f"{song_id}.txt"), 'w', encoding='utf-8') as f:
+        f.write(text)
+
+
+def read(out_dir, relpath):
+    with open(os.path.join(out_dir, relpath), encoding='utf-8') as f:
+        return f.read()
+
+
+def test_key_slug():
+    assert key_slug(1, KEY_MINOR) == 'c-sharp-minor'
+    assert key_slug(10, KEY_MAJOR) == 'b-flat-major'
+    assert key_slug(0, KEY_MAJOR) == 'c-major'
+
+
+def test_prerender_writes_sheets_variants_and_listings(app, tmp_path):
+    song = Song.query.first()
+    write_sheet(app, song.id, "Verse:\n[C]Hello [G/B]world\n")
+    out_dir = str(tmp_path / 'site')
+
+    stats = prerender_site(out_dir, transpose=True, workers=1, page_size=10)
+    assert stats['rendered'] == 1
+
+    page = read(out_dir, f"view_sheet/{song.id}/index.html")
+    assert 'data-chord="[C]"' in page and 'Test Song' in page
+    assert 'Edit' not in page and 'voicingsUrl' not in page
+
+    # Db major spells with flats; data-chord keeps the written chord for the client
+    variant = read(out_dir, f"view_sheet/{song.id}/transpose/1/index.html")
+    assert 'data-chord="[C]">[Db]</span>' in variant
+    assert 'data-chord="[G/B]">[Ab/C]</span>' in variant
+    assert 'window.initialSteps = 1' in variant
+
+    assert 'Test Song' in read(out_dir, 'explore/index.html')
+    assert 'Test Song' in read(out_dir, 'explore/key/c-major/index.html')
+    assert os.path.exists(os.path.join(out_dir, 'static', 'styles.css'))
+    assert not os.path.exists(os.path.join(out_dir, 'static', 'data'))
+
+
+def test_prerender_is_incremental(app, tmp_path):
+    song = Song.query.first()
+    write_sheet(app, song.id, "[C]One\n")
+    other = Song(title="Other Song", artist="Someone", song_key="Am")
+    db.session.add(other)
+    db.session.commit()
+    write_sheet(app, other.id, "[Am]Two\n")
+    out_dir = str(tmp_path / 'site')
+
+    assert prerender_site(out_dir, workers=1)['rendered'] == 2
+    unchanged = prerender_site(out_dir, workers=1)
+    assert unchanged['rendered'] == 0 and unchanged['files_written'] == 0
+
+    write_sheet(app, other.id, "[Am]Two, edited\n")
+    assert prerender_site(out_dir, workers=1)['rendered'] == 1
+    assert 'edited' in read(out_dir, f"view_sheet/{other.id}/index.html")
+
+    db.session.delete(other)
+    db.session.commit()
+    stats = prerender_site(out_dir, workers=1)
+    assert stats['removed'] == 1
+    assert not os.path.exists(os.path.join(out_dir, 'view_sheet', str(other.id)))
+    assert 'Other Song' not in read(out_dir, 'explore/index.html')
+
+    with open(os.path.join(out_dir, MANIFEST_NAME), encoding='utf-8') as f:
+        assert list(json.load(f)['songs']) == [str(song.id)]
+
+
+def test_prerender_command_uses_worker_pool(app, runner, tmp_path):
+    song = Song.query.first()
+    write_sheet(app, song.id, "[C]Hello\n")
+    out_dir = str(tmp_path / 'site')
+
+    result = runner.invoke(args=['prerender', '--out', out_dir, '--workers', '2', '--transpose'])
+    assert result.exit_code == 0, result.output
+    assert 'Rendered 1 of 1 songs' in result.output
+    assert os.path.exists(os.path.join(out_dir, 'view_sheet', str(song.id), 'transpose', '11', 'index.html'))
@@ -0,0 +1,61 @@
+import pytest
+from app.preview import PreviewStore, PreviewConflict
+from app.utils import prepare_song
+
+def test_splice_renders_only_inserted_lines():
+    store = PreviewStore()
+    first = store.reset("s1", ["Verse 1:", "[C]Hello [G]world", "", "[Am]Bye"])
+    assert first["insert"][0] == {"chord": "Verse 1:", "lyric": ""}
+    assert first["insert"][2] is None
+
+    result = store.apply("s1", first["version"], 1, 1, ["[F]Hello there"])
+    assert result["start"] == 1 and result["delete"] == 1
+    assert len(result["insert"]) == 1
+    assert 'data-chord="[F]"' in result["insert"][0]["chord"]
+    assert result["version"] == first["version"] + 1
+
+def test_preview_matches_full_render():
+    text = "Chorus:\n[C]Singing ayo,   [G]technology  \n\n\n[Am]Walk into the club"
+    store = PreviewStore()
+    rendered = [r for r in store.reset("s1", text.split("\n"))["insert"] if r]
+    expected = [{"chord": c, "lyric": l} for c, l in prepare_song(text, add_data_attr=True)]
+    assert rendered == expected
+
+def test_line_cache_reuses_identical_lines():
+    store = PreviewStore()
+    store.reset("s1", ["[C]La la", "[C]La la"])
+    session = store._session("s1", create=False)
+    assert len(session.line_cache) == 1
+
+def test_stale_version_and_unknown_session_conflict():
+    store = PreviewStore()
+    with pytest.raises(PreviewConflict):
+        store.apply("missing", 1, 0, 0, [])
+    store.reset("s1", ["a"])
+    with pytest.raises(PreviewConflict):
+        store.apply("s1", 99, 0, 0, ["b"])
+    with pytest.raises(ValueError):
+        store.apply("s1", 1, 5, 0, ["b"])
+
+def test_preview_route_round_trip(client):
+    response = client.post('/api/preview', json={"session": "abc", "full": ["[C]Hi"]})
+    assert response.status_code == 200
+    version = response.get_json()["version"]
+
+    response = client.post('/api/preview', json={
+        "session": "abc", "version": version, "start": 1, "delete": 0, "insert": ["[G]There"]
+    })
+    assert response.status_code == 200
+    assert 'data-chord="[G]"' in response.get_json()["insert"][0]["chord"]
+
+    response = client.post('/api/preview', json={
+        "session": "other", "version": 1, "start": 0, "delete": 0, "insert": []
+    })
+    assert response.status_code == 409
+    assert response.get_json() == {"resync": True}
+
+
+@pytest.mark.parametrize("body", [["[C]Hi"], "[C]Hi", 3, None])
+def test_preview_route_rejects_non_object_body(client, body):
+    response = client.post('/api/preview', json=body)
+    assert response.status_code == 400
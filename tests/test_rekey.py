@@ -0,0 +1,109 @@
+import os
+
+from app import db
+from app.models import Song
+from app.parsing import respell_key, transpose_sheet
+from app.revisions import get_revision_store
+
+
+def write_sheet(app, song_id, text):
+    with open(os.path.join(app.config['SONG_DATA_DIR'], f"{song_id}.txt"), 'w', encoding='utf-8') as f:
+        f.write(text)
+
+
+def read_sheet(app, song_id):
+    with open(os.path.join(app.config['SONG_DATA_DIR'], f"{song_id}.txt"), encoding='utf-8') as f:
+        return f.read()
+
+
+def test_transpose_sheet_and_respell_key():
+    assert transpose_sheet("[C]Hello [G/B]world [F#m7]", 1, 'flat') == "[Db]Hello [Ab/C]world [Gm7]"
+    assert transpose_sheet("Chorus:\nno chords here", 5) == "Chorus:\nno chords here"
+    assert respell_key("C major", 8) == "Ab major"
+    assert respell_key("Am", 4) == "C#m"
+    assert respell_key("bb minor", 2) == "C minor"
+    assert respell_key("whatever", 2) is None
+
+
+def test_rekey_dry_run_reports_without_writing(app, runner):
+    song = Song.query.first()
+    write_sheet(app, song.id, "[C]Hello [G]world\n")
+
+    result = runner.invoke(args=['rekey', '--ids', str(song.id), '--steps', '3', '--dry-run', '--workers', '1'])
+    assert result.exit_code == 0, result.output
+    assert "Key: C major -> Eb major" in result.output
+    assert "+[Eb]Hello [Bb]world" in result.output
+    assert "Would rekey 1 of 1" in result.output
+    assert read_sheet(app, song.id) == "[C]Hello [G]world\n"
+    assert db.session.get(Song, song.id).song_key == "C major"
+
+
+def test_rekey_filters_and_writes_with_revision(app, runner):
+    first = Song.query.first()
+    write_sheet(app, first.id, "[C]One [Am]two\n")
+    other = Song(title="Other", artist="Choir", song_key="Em")
+    untouched = Song(title="Third", artist="Choir", song_key="G")
+    db.session.add_all([other, untouched])
+    db.session.commit()
+    write_sheet(app, other.id, "[Em]Three [B7]four\n")
+    write_sheet(app, untouched.id, "[G]Five\n")
+
+    # Choir songs currently in E minor move to D minor, spelled with flats
+    result = runner.invoke(args=['rekey', '--artist', 'choir', '--key', 'Em', '--to', 'Dm', '--workers', '2'])
+    assert result.exit_code == 0, result.output
+    assert "Rekeyed 1 of 1" in result.output
+
+    db.session.expire_all()
+    rekeyed = db.session.get(Song, other.id)
+    assert rekeyed.song_key == "Dm" and rekeyed.key_tonic == 2
+    assert read_sheet(app, other.id) == "[Dm]Three [A7]four\n"
+    assert read_sheet(app, untouched.id) == "[G]Five\n"
+    assert read_sheet(app, first.id) == "[C]One [Am]two\n"
+    # The original is kept as a revision, so the rekey can be undone from the history page
+    assert len(get_revision_store().list_revisions(other.id)) == 2
+
+
+def test_rekey_requires_filter_and_transposition(app, runner):
+    assert runner.invoke(args=['rekey', '--steps', '2']).exit_code != 0
+    assert runner.invoke(args=['rekey', '--all']).exit_code != 0
+    result = runner.invoke(args=['rekey', '--all', '--to', 'H', '--workers', '1'])
+    assert result.exit_code != 0 and "Unrecognised target key" in result.output
+
+
+def test_rekey_skips_unreadable_sheet_and_continues(app, runner):
+    first = Song.query.first()
+    second = Song(title="Second", artist="Choir", song_key="G")
+    db.session.add(second)
+    db.session.commit()
+    with open(os.path.join(app.config['SONG_DATA_DIR'], f"{first.id}.txt"), 'wb') as f:
+        f.write(b"[C]\xff\xfe not utf-8\n")
+    write_sheet(app, second.id, "[G]Two\n")
+
+    result = runner.invoke(args=['rekey', '--all', '--steps', '2', '--workers', '1'])
+    assert result.exit_code == 0, result.output
+    assert f"Skipped song {first.id}: UnicodeDecodeError" in result.output
+    assert "Rekeyed 1 of 2" in result.output
+    assert read_sheet(app, second.id) == "[A]Two\n"
+
+
+def test_rekey_restores_sheets_when_commit_fails(app, runner, monkeypatch):
+    first = Song.query.first()
+    second = Song(title="Second", artist="Choir", song_key="G")
+    db.session.add(second)
+    db.session.commit()
+    write_sheet(app, first.id, "[C]One\n")
+    write_sheet(app, second.id, "[G]Two\n")
+
+    def failing_commit():
+        raise RuntimeError("disk full")
+    monkeypatch.setattr(db.session, "commit", failing_commit)
+
+    result = runner.invoke(args=['rekey', '--all', '--steps', '2', '--workers', '1'])
+    assert isinstance(result.exception, RuntimeError)
+    monkeypatch.undo()
+
+    db.session.expire_all()
+    assert read_sheet(app, first.id) == "[C]One\n"
+    assert read_sheet(app, second.id) == "[G]Two\n"
+    assert db.session.get(Song, first.id).song_key == "C major"
+    assert db.session.get(Song, second.id).song_key == "G"
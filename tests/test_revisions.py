@@ -0,0 +1,107 @@
+import os
+import pytest
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from app.revisions import RevisionStore, content_hash
+
+def make_versions(count):
+    base = [f"[C]Line {i}" for i in range(20)]
+    versions = []
+    for n in range(count):
+        lines = list(base)
+        lines[n % 20] = f"[G]Edited line {n}"
+        lines.append(f"[Am]Added {n}")
+        base = lines
+        versions.append("\n".join(lines))
+    return versions
+
+def test_snapshots_bound_delta_chains(tmp_path):
+    store = RevisionStore(str(tmp_path), snapshot_interval=4)
+    versions = make_versions(10)
+    for content in versions:
+        store.record(1, content)
+
+    kinds = [entry["kind"] for entry in store.list_revisions(1)]
+    assert kinds == ["snap", "delta", "delta", "delta"] * 2 + ["snap", "delta"]
+    for rev, content in enumerate(versions, start=1):
+        assert store.get_content(1, rev) == content
+
+def test_unchanged_content_is_not_recorded(tmp_path):
+    store = RevisionStore(str(tmp_path))
+    assert store.record(1, "[C]Same") is not None
+    assert store.record(1, "[C]Same") is None
+    assert len(store.list_revisions(1)) == 1
+
+def test_diff_between_revisions(tmp_path):
+    store = RevisionStore(str(tmp_path))
+    store.record(1, "[C]Hello\n[G]world")
+    store.record(1, "[C]Hello\n[F]there")
+    diff = store.diff(1, 1, 2)
+    assert "-[G]world" in diff
+    assert "+[F]there" in diff
+
+def test_compaction_keeps_remaining_revisions_readable(tmp_path):
+    store = RevisionStore(str(tmp_path), snapshot_interval=5)
+    versions = make_versions(8)
+    for content in versions:
+        store.record(1, content)
+
+    assert store.compact(1, keep=3) == 5
+    index = store.list_revisions(1)
+    assert [entry["rev"] for entry in index] == [6, 7, 8]
+    assert index[0]["kind"] == "snap"
+    for rev in (6, 7, 8):
+        assert store.get_content(1, rev) == versions[rev - 1]
+    assert len(os.listdir(tmp_path / "1")) == 4  # index + 3 revisions
+
+def test_failed_compaction_keeps_history_readable(tmp_path, monkeypatch):
+    store = RevisionStore(str(tmp_path), snapshot_interval=5)
+    versions = make_versions(8)
+    for content in versions:
+        store.record(1, content)
+    files = sorted(os.listdir(tmp_path / "1"))
+
+    def fail(song_id, index):
+        raise OSError("disk full")
+    monkeypatch.setattr(store, "_save_index", fail)
+    with pytest.raises(OSError):
+        store.compact(1, keep=3)
+
+    assert sorted(os.listdir(tmp_path / "1")) == files
+    for rev, content in enumerate(versions, start=1):
+        assert store.get_content(1, rev) == content
+
+def record_versions(root, worker):
+    store = RevisionStore(root, snapshot_interval=3)
+    for n in range(5):
+        store.record(1, f"[C]Worker {worker} edit {n}")
+
+def test_concurrent_records_are_serialised(tmp_path):
+    root = str(tmp_path)
+    with ProcessPoolExecutor(max_workers=3) as processes, ThreadPoolExecutor(max_workers=3) as threads:
+        futures = [processes.submit(record_versions, root, worker) for worker in range(3)]
+        futures += [threads.submit(record_versions, root, worker) for worker in range(3, 6)]
+        for future in futures:
+            future.result()
+
+    store = RevisionStore(root, snapshot_interval=3)
+    index = store.list_revisions(1)
+    assert [entry["rev"] for entry in index] == list(range(1, 31))
+    for entry in index:
+        assert content_hash(store.get_content(1, entry["rev"])) == entry["hash"]
+    assert not [name for name in os.listdir(tmp_path / "1") if name.endswith(".tmp")]
+
+def test_edit_records_history_and_restores(app, client, tmp_path):
+    app.config['SONG_DATA_DIR'] = str(tmp_path)
+    (tmp_path / "1.txt").write_text("[C]Original", encoding="utf-8")
+    form = {"title": "Test Song", "artist": "Test Artist", "song_key": "C major"}
+
+    client.post('/edit_song/1', data={**form, "sheet_content": "[G]Changed"})
+    client.post('/edit_song/1', data={**form, "sheet_content": "[G]Changed"})  # no-op
+
+    response = client.get('/song/1/history?from=1&to=2')
+    assert response.status_code == 200
+    assert b"+[G]Changed" in response.data
+    assert b"#3" not in response.data
+
+    client.post('/song/1/history/1/restore')
+    assert (tmp_path / "1.txt").read_text(encoding="utf-8") == "[C]Original"
@@ -1,3 +1,4 @@
+import os
 import pytest
 
 def test_home_route(client):
@@ -23,3 +24,109 @@ def test_creator_route(client):
     response = client.get('/creator')
     assert response.status_code == 200
     assert b"Create New Song" in response.data
+
+def test_health_route(client):
+    response = client.get('/healthz')
+    assert response.status_code == 200
+    assert response.get_json()['status'] == 'ok'
+
+def test_readiness_waits_for_warmup(app, client):
+    from app.warmup import warm_up
+
+    response = client.get('/readyz')
+    assert response.status_code == 503
+    assert response.get_json()['checks']['warmup'] == 'pending'
+
+    warm_up(app)
+    response = client.get('/readyz')
+    assert response.status_code == 200
+    assert response.get_json()['checks'] == {'database': 'ok', 'warmup': 'ok'}
+
+def test_view_sheet_includes_layout_hints(app, client, tmp_path):
+    app.config['SONG_DATA_DIR'] = str(tmp_path)
+    (tmp_path / "1.txt").write_text("Verse 1:\n[C]You are my sunshine", encoding="utf-8")
+    response = client.get('/view_sheet/1')
+    assert response.status_code == 200
+    assert b'id="sheet-layout"' in response.data
+    assert b'"longest_line":19' in response.data.replace(b' ', b'')
+
+def test_delete_keeps_sheet_and_history_when_commit_fails(app, client, monkeypatch):
+    from app import db
+    from app.models import Song
+    from app.revisions import get_revision_store
+    sheet = os.path.join(app.config['SONG_DATA_DIR'], "1.txt")
+    with open(sheet, "w", encoding="utf-8") as f:
+        f.write("[C]Keep me")
+    get_revision_store().record(1, "[C]Keep me")
+
+    def failing_commit():
+        raise RuntimeError("disk full")
+    monkeypatch.setattr(db.session, "commit", failing_commit)
+    with pytest.raises(RuntimeError):
+        client.post('/delete_song/1')
+    monkeypatch.undo()
+
+    db.session.rollback()
+    assert db.session.get(Song, 1) is not None
+    assert os.path.exists(sheet)
+    assert get_revision_store().get_content(1, 1) == "[C]Keep me"
+
+    client.post('/delete_song/1')
+    assert not os.path.exists(sheet)
+    assert get_revision_store().list_revisions(1) == []
+
+def test_explore_key_filter_is_enharmonic(app, client):
+    from app import db
+    from app.models import Song
+    db.session.add(Song(title="Minor Tune", artist="Someone", song_key="Dbm"))
+    db.session.commit()
+
+    for key in ("C#m", "C# minor", "c#m ", "Dbm"):
+        response = client.get('/explore', query_string={'key': key})
+        assert b"Minor Tune" in response.data
+        assert b"Test Song" not in response.data
+
+    response = client.get('/explore', query_string={'key': 'Am', 'relative': '1'})
+    assert b"Test Song" in response.data  # C major is the relative major of A minor
+
+@pytest.mark.parametrize("include_relative", [False, True])
+def test_key_filter_uses_index(app, include_relative):
+    from sqlalchemy import text
+    from app import db
+    from app.models import Song
+    from app.routes.main import key_filter_clause
+    # Same query the explore route builds for ?key=C#m
+    statement = Song.query.filter(key_filter_clause("C#m", include_relative)).statement
+    sql = str(statement.compile(dialect=db.engine.dialect, compile_kwargs={"literal_binds": True}))
+    plan = db.session.execute(text(f"EXPLAIN QUERY PLAN {sql}")).all()
+    details = [row[-1] for row in plan]
+    assert any("ix_songs_key_tonic_mode" in detail for detail in details)
+    assert not any(detail.startswith("SCAN") for detail in details)
+
+def test_explore_search_is_typo_tolerant_and_incremental(app, client):
+    response = client.get('/explore', query_string={'query': 'Tset Sogn'})
+    assert b"Test Song" in response.data
+
+    client.post('/create', data={'title': 'Bohemian Rhapsody', 'artist': 'Queen', 'song_key': 'Bb'})
+    response = client.get('/explore', query_string={'query': 'bohemain'})
+    assert b"Bohemian Rhapsody" in response.data
+
+    response = client.get('/explore', query_string={'query': 'queen', 'key': 'A#'})
+    assert b"Bohemian Rhapsody" in response.data
+
+    client.post('/delete_song/2')
+    response = client.get('/explore', query_string={'query': 'bohemian'})
+    assert b"Bohemian Rhapsody" not in response.data
+
+def test_suggest_endpoint(client):
+    response = client.get('/api/suggest', query_string={'q': 'tes'})
+    data = response.get_json()
+    assert response.status_code == 200
+    assert {s['label'] for s in data['suggestions']} == {"Test Song", "Test Artist"}
+    song = next(s for s in data['suggestions'] if s['type'] == 'song')
+    assert song['url'] == '/view_sheet/1'
+
+    client.post('/create', data={'title': 'Testament', 'artist': '', 'song_key': 'E'})
+    labels = [s['label'] for s in client.get('/api/suggest?q=testa').get_json()['suggestions']]
+    assert labels == ["Testament"]
+    assert client.get('/api/suggest?q=').get_json()['suggestions'] == []
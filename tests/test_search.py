@@ -0,0 +1,116 @@
+from app.search import FuzzySearchIndex, bounded_edit_distance
+
+
+def _index():
+    index = FuzzySearchIndex()
+    index.add(1, "Bohemian Rhapsody", "Queen")
+    index.add(2, "Wonderwall", "Oasis")
+    index.add(3, "Canción del Mariachi", "Antonio Banderas")
+    index.add(4, "Don't Stop Me Now", "Queen")
+    return index
+
+def test_bounded_edit_distance():
+    assert bounded_edit_distance("rhapsody", "rhapsody", 2) == 0
+    assert bounded_edit_distance("rapsody", "rhapsody", 2) == 1
+    assert bounded_edit_distance("bohemain", "bohemian", 1) == 1  # transposition
+    assert bounded_edit_distance("queen", "oasis", 2) == 3
+
+def test_search_tolerates_typos_and_accents():
+    index = _index()
+    assert index.search("Bohemain Rapsody")[0][0] == 1
+    assert index.search("cancion")[0][0] == 3
+    assert index.search("wonderwal")[0][0] == 2
+    assert index.search("zzzz") == []
+
+def test_search_ranks_exact_above_fuzzy():
+    index = _index()
+    ranked = [song_id for song_id, _ in index.search("queen")]
+    assert sorted(ranked) == [1, 4]
+    assert [song_id for song_id, _ in index.search("don")][0] == 4  # prefix match
+
+def test_search_requires_every_token():
+    index = _index()
+    assert [song_id for song_id, _ in index.search("queen stop")] == [4]
+
+def test_remove_and_reindex():
+    index = _index()
+    index.remove(2)
+    assert index.search("wonderwall") == []
+    index.add(1, "Under Pressure", "Queen")
+    assert index.search("bohemian") == []
+    assert index.search("presure")[0][0] == 1
+
+def test_suggest_matches_word_starts_and_ranks_by_popularity():
+    from app.search import SuggestIndex
+    suggestions = SuggestIndex()
+    suggestions.add(1, "Bohemian Rhapsody", "Queen")
+    suggestions.add(2, "Don't Stop Me Now", "Queen")
+    suggestions.add(3, "Quando Quando", "Michael Bublé")
+
+    assert [s['label'] for s in suggestions.suggest("rhap")] == ["Bohemian Rhapsody"]
+    assert [s['label'] for s in suggestions.suggest("BUB")] == ["Michael Bublé"]
+    # Queen has two songs, so it outranks the song
+    assert [s['label'] for s in suggestions.suggest("qu")] == ["Queen", "Quando Quando"]
+
+    suggestions.set_popularity({3: 10})
+    assert suggestions.suggest("qu")[0]['label'] == "Quando Quando"
+
+def test_suggest_updates_incrementally():
+    from app.search import SuggestIndex
+    suggestions = SuggestIndex()
+    suggestions.add(1, "Wonderwall", "Oasis")
+    assert suggestions.suggest("won")[0]['song_id'] == 1
+
+    suggestions.add(1, "Champagne Supernova", "Oasis")
+    assert suggestions.suggest("won") == []
+    assert suggestions.suggest("champ")[0]['song_id'] == 1
+
+    suggestions.remove(1)
+    assert suggestions.suggest("oas") == []
+    assert len(suggestions) == 0
+
+def test_catalog_syncs_changed_rows_from_other_workers(tmp_path):
+    import threading
+    from types import SimpleNamespace
+    from app.search import CatalogSearch
+
+    def row(song_id, version, title, artist):
+        return SimpleNamespace(id=song_id, version=version, title=title, artist=artist, view_count=0)
+
+    catalog = {1: row(1, 1, "Wonderwall", "Oasis"), 2: row(2, 1, "Bohemian Rhapsody", "Queen"),
+               3: row(3, 1, "Yesterday", "The Beatles")}
+    loads, release = [], threading.Event()
+    def load_songs():
+        loads.append(1)
+        if len(loads) > 2:
+            release.wait(5)  # hold the background sync until the test lets it run
+        return list(catalog.values())
+
+    marker = str(tmp_path / ".catalog_version")
+    writer, reader = CatalogSearch(marker), CatalogSearch(marker)
+    assert reader.search("wonderwall", load_songs)[0][0] == 1
+    writer.ensure_fresh(load_songs)
+    index = reader.index
+
+    # Another worker renames, adds and deletes songs
+    catalog[1] = row(1, 2, "Champagne Supernova", "Oasis")
+    catalog[4] = row(4, 7, "Under Pressure", "Queen")
+    del catalog[3]
+    catalog[2].view_count = 9  # flushed by another worker; the row version is unchanged
+    for song_id in (1, 4):
+        writer.song_saved(catalog[song_id])
+    writer.song_deleted(3)
+
+    # The stale worker keeps serving its index while it syncs in the background
+    assert reader.search("wonderwall", load_songs)[0][0] == 1
+    assert reader.suggest("wonder", load_songs)[0]['song_id'] == 1  # no second sync started
+    release.set()
+    reader.wait_for_sync()
+    assert reader.search("champagne", load_songs)[0][0] == 1
+    assert reader.search("wonderwall", load_songs) == []
+    assert reader.search("presure", load_songs)[0][0] == 4
+    assert reader.search("yesterday", load_songs) == []
+    assert [s['label'] for s in reader.suggest("und", load_songs)] == ["Under Pressure"]
+    assert reader.suggestions.popularity(2) == 9
+    assert reader.index is index  # synced in place, not rebuilt
+    assert len(loads) == 3  # two initial builds and one sync
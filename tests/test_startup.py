@@ -0,0 +1,22 @@
+from app.config import Config
+from app.profiling import profile_startup
+
+
+def test_create_app_within_startup_budget():
+    report = profile_startup()
+    assert report['total_ms'] <= Config.STARTUP_BUDGET_MS, (
+        f"Startup took {report['total_ms']} ms (budget {Config.STARTUP_BUDGET_MS} ms). "
+        f"Slowest imports: {report['imports_by_package_ms']}"
+    )
+    # Optional subsystems must stay out of the cold-start path
+    assert report['spotipy_loaded'] is False
+    assert report['deferred_loaded'] == []
+
+
+def test_spotify_client_built_lazily_and_cached(app):
+    from app.spotify import get_spotify_client
+
+    assert 'spotify' not in app.extensions
+    app.config.update({'SPOTIPY_CLIENT_ID': None, 'SPOTIPY_CLIENT_SECRET': None})
+    assert get_spotify_client(app) is None
+    assert app.extensions['spotify'] is None
@@ -4,6 +4,7 @@ from app.utils import (
     highlight_chords,
     split_chord_lyric_line,
     process_song_text,
+    compute_layout_metrics,
     get_key_preference
 )
 
@@ -39,3 +40,32 @@ def test_get_key_preference():
     assert get_key_preference("F major") == "flat"
     assert get_key_preference("Bb major") == "flat"
     assert get_key_preference("D major") == "sharp"
+
+def test_compute_layout_metrics():
+    lines = process_song_text("[C]Hello [G]world\nChorus:\n[Am]Sing along\nno chords here", add_data_attr=True)
+    layout = compute_layout_metrics(lines)
+    assert layout["longest_line"] == len("no chords here")
+    assert layout["line_count"] == 4
+    assert layout["row_count"] == 2 + 1 + 2 + 1
+    assert layout["sections"] == [[0, 1], [1, 3]]
+
+def test_parse_key_enharmonic_spellings():
+    from app.parsing import parse_key, relative_key, KEY_MAJOR, KEY_MINOR
+    assert parse_key("C#m") == parse_key("Dbm") == parse_key("C# minor") == parse_key("c#m ") == (1, KEY_MINOR)
+    assert parse_key("Bb major") == parse_key("A#") == (10, KEY_MAJOR)
+    assert parse_key("") is None
+    assert parse_key("Cm7") is None
+    assert relative_key(0, KEY_MAJOR) == (9, KEY_MINOR)
+    assert relative_key(9, KEY_MINOR) == (0, KEY_MAJOR)
+
+def test_transpose_chord_spelling():
+    from app.parsing import transpose_chord, transpose_key, key_name, key_accidentals, KEY_MAJOR, KEY_MINOR
+    assert transpose_chord("[F#m7/C#]", 1) == "[Gm7/D]"
+    assert transpose_chord("C", 1, prefer="flat") == "Db"
+    assert transpose_chord("Bbmaj7", 2) == "Cmaj7"
+    assert transpose_chord("N.C.", 3) == "N.C."
+    assert transpose_key("C", 8) == "Ab"
+    assert transpose_key("Am", 4) == "C#m"
+    assert key_name(10, KEY_MINOR) == "Bbm"
+    assert key_accidentals(5, KEY_MAJOR) == "flat"
+    assert key_accidentals(4, KEY_MINOR) == "sharp"
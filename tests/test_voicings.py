@@ -0,0 +1,57 @@
+import pytest
+from app.voicings import (
+    INSTRUMENTS,
+    canonical_chord_name,
+    chord_tones,
+    generate_voicings,
+    get_voicings,
+    load_voicing_table,
+)
+
+@pytest.mark.parametrize("chord, expected", [
+    ("C", "x32010"), ("G", "320003"), ("Am", "x02210"), ("E", "022100"),
+    ("F", "133211"), ("Dm", "xx0231"), ("B7", "x21202"), ("Cmaj7", "x32000"),
+])
+def test_common_guitar_shapes_rank_first(chord, expected):
+    assert generate_voicings(chord, "guitar")[0] == expected
+
+def test_ukulele_shapes():
+    assert generate_voicings("C", "ukulele")[0] == "0003"
+    assert generate_voicings("G", "ukulele")[0] == "0232"
+
+def test_slash_chord_puts_bass_note_lowest():
+    tuning = INSTRUMENTS["guitar"].tuning
+    for shape in generate_voicings("G/B", "guitar"):
+        frets = [None if c == "x" else int(c) for c in shape]
+        lowest = min(tuning[i] + f for i, f in enumerate(frets) if f is not None)
+        assert lowest % 12 == 11  # B
+
+def test_chord_tones_for_extended_and_altered_chords():
+    _, _, required, optional = chord_tones("[Bm7b5]")
+    assert required == {11, 2, 5, 9}
+    _, _, required, _ = chord_tones("Cadd9")
+    assert required == {0, 4, 2}
+    assert chord_tones("[H7]") is None
+
+def test_canonical_chord_name_transposes_to_sharps():
+    assert canonical_chord_name("[Bbmin7/Db]") == "A#m7/C#"
+    assert canonical_chord_name("[C]", steps=3) == "D#"
+
+def test_shipped_table_matches_generator():
+    table = load_voicing_table()
+    assert set(table) == set(INSTRUMENTS)
+    assert table["guitar"]["C"] == list(generate_voicings("C", "guitar"))
+    assert get_voicings("[Db]", "ukulele") == table["ukulele"]["C#"]
+
+def test_voicings_endpoint_returns_sheet_chords(app, client, tmp_path):
+    app.config['SONG_DATA_DIR'] = str(tmp_path)
+    (tmp_path / "1.txt").write_text("[C]You are my [G/B]sunshine [C]again", encoding="utf-8")
+
+    data = client.get('/api/voicings/1').get_json()
+    assert set(data["voicings"]) == {"C", "G/B"}
+    assert data["voicings"]["C"][0] == "x32010"
+
+    data = client.get('/api/voicings/1?instrument=ukulele&steps=2').get_json()
+    assert set(data["voicings"]) == {"D", "A/C#"}
+
+    assert client.get('/api/voicings/1?instrument=banjo').status_code == 400